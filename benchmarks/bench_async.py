@@ -0,0 +1,205 @@
+"""
+Compare the API under WSGI, sync views under ASGI and async views.
+
+Each mode runs in its own process with 500 requests in flight, split
+between the recipe list, a recipe and the user, all token authenticated:
+
+* ``wsgi``: the WSGI application called from a pool of threads, as a
+  threaded WSGI server calls it.
+* ``asgi-sync``: the ASGI application serving the sync views, each run in
+  a worker thread.
+* ``asgi-async``: the ASGI application serving the async views, as
+  config/asgi.py does.
+
+The applications are called directly, without sockets, so only the
+framework's cost is measured. DebugToolbarMiddleware, a sync-only
+development tool, is left out.
+"""
+import argparse
+import asyncio
+import io
+import os
+import statistics
+import subprocess
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from wsgiref.util import setup_testing_defaults
+
+MODES = ["wsgi", "asgi-sync", "asgi-async"]
+
+
+def setup(recipes):
+    """Seed a user with recipes and return the paths and its token."""
+    from benchmarks.common import (
+        bootstrap,
+        create_user,
+        seed_recipes,
+    )
+
+    bootstrap()
+    from django.conf import settings
+    from rest_framework.authtoken.models import Token
+
+    from core.models import Recipe
+
+    settings.MIDDLEWARE = [
+        name for name in settings.MIDDLEWARE if "debug_toolbar" not in name
+    ]
+    _client, user = create_user()
+    seed_recipes(user, recipes)
+    recipe = Recipe.objects.first()
+    paths = [
+        ("/api/recipe/recipes/", "page_size=20"),
+        (f"/api/recipe/recipes/{recipe.id}/", ""),
+        ("/api/user/me/", ""),
+    ]
+
+    return paths, Token.objects.create(user=user).key
+
+
+def drive(call, requests, concurrency):
+    """Await ``call(i)`` for every request from ``concurrency`` loops.
+
+    Returns the elapsed time and the latency of each request.
+    """
+    async def connection(indexes, latencies):
+        for i in indexes:
+            began = time.perf_counter()
+            await call(i)
+            latencies.append(time.perf_counter() - began)
+
+    async def main():
+        latencies = []
+        start = time.perf_counter()
+        await asyncio.gather(*(
+            connection(range(c, requests, concurrency), latencies)
+            for c in range(concurrency)
+        ))
+        return time.perf_counter() - start, latencies
+
+    return asyncio.run(main())
+
+
+def run_wsgi(paths, key, requests, concurrency, threads):
+    """Call the WSGI application in a pool of ``threads`` threads.
+
+    Requests past the thread count wait for a thread, as they would in a
+    threaded server's queue, and their latency includes the wait.
+    """
+    from django.core.wsgi import get_wsgi_application
+
+    application = get_wsgi_application()
+    executor = ThreadPoolExecutor(threads)
+
+    def call(i):
+        path, query = paths[i % len(paths)]
+        environ = {
+            "PATH_INFO": path,
+            "QUERY_STRING": query,
+            "HTTP_AUTHORIZATION": f"Token {key}",
+            "SERVER_NAME": "testserver",
+            "wsgi.input": io.BytesIO(),
+        }
+        setup_testing_defaults(environ)
+        statuses = []
+        body = application(
+            environ, lambda status, headers: statuses.append(status),
+        )
+        b"".join(body)
+        body.close()
+        assert statuses[0].startswith("200"), statuses[0]
+
+    async def acall(i):
+        await asyncio.get_running_loop().run_in_executor(executor, call, i)
+
+    with executor:
+        return drive(acall, requests, concurrency)
+
+
+def run_asgi(paths, key, requests, concurrency):
+    """Call the ASGI application from the event loop."""
+    from django.core.asgi import get_asgi_application
+
+    application = get_asgi_application()
+    headers = [
+        (b"host", b"testserver"),
+        (b"authorization", f"Token {key}".encode()),
+    ]
+
+    async def receive():
+        return {"type": "http.request", "body": b"", "more_body": False}
+
+    async def call(i):
+        path, query = paths[i % len(paths)]
+        scope = {
+            "type": "http",
+            "asgi": {"version": "3.0"},
+            "http_version": "1.1",
+            "method": "GET",
+            "scheme": "http",
+            "path": path,
+            "raw_path": path.encode(),
+            "query_string": query.encode(),
+            "root_path": "",
+            "headers": headers,
+            "client": ("127.0.0.1", 50000),
+            "server": ("testserver", 80),
+        }
+        messages = []
+
+        async def send(message):
+            messages.append(message)
+
+        await application(scope, receive, send)
+        assert messages[0]["status"] == 200, messages[0]
+
+    return drive(call, requests, concurrency)
+
+
+def run(mode, args):
+    paths, key = setup(args.recipes)
+    if mode == "wsgi":
+        elapsed, latencies = run_wsgi(
+            paths, key, args.requests, args.concurrency, args.threads,
+        )
+    else:
+        elapsed, latencies = run_asgi(
+            paths, key, args.requests, args.concurrency,
+        )
+    latencies.sort()
+    print(
+        f"{mode}: {args.requests / elapsed:,.0f} req/s, "
+        f"p50 {statistics.median(latencies) * 1000:.0f}ms, "
+        f"p99 {latencies[int(len(latencies) * 0.99)] * 1000:.0f}ms"
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--mode", choices=MODES)
+    parser.add_argument("--requests", type=int, default=10_000)
+    parser.add_argument("--concurrency", type=int, default=500)
+    parser.add_argument(
+        "--threads", type=int, default=32, help="WSGI worker threads",
+    )
+    parser.add_argument("--recipes", type=int, default=100)
+    args = parser.parse_args()
+
+    if args.mode:
+        run(args.mode, args)
+        return
+
+    for mode in MODES:
+        env = dict(os.environ)
+        env["DJANGO_API_ASYNC_VIEWS"] = "1" if mode == "asgi-async" else "0"
+        subprocess.run(
+            [sys.executable, "-m", "benchmarks.bench_async", "--mode", mode,
+             *sys.argv[1:]],
+            env=env,
+            check=True,
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,68 @@
+"""
+Compare authenticated request throughput with and without the token cache.
+
+Requests carry a real ``Authorization: Token`` header. The recipe detail is
+served from the response cache, so authentication is most of its work.
+"""
+import argparse
+
+from benchmarks.common import (
+    bootstrap,
+    create_user,
+    seed_recipes,
+    timer,
+)
+
+
+def run(label, client, url, requests):
+    """Request ``url`` ``requests`` times and print the rate and queries."""
+    from django.db import connection
+    from django.test.utils import CaptureQueriesContext
+
+    client.get(url)
+    with CaptureQueriesContext(connection) as queries:
+        with timer(label, requests):
+            for _ in range(requests):
+                assert client.get(url).status_code == 200
+    print(f"  {len(queries) / requests:.1f} queries/request")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--requests", type=int, default=2000)
+    args = parser.parse_args()
+
+    bootstrap()
+    from django.urls import reverse
+    from rest_framework.authentication import TokenAuthentication
+    from rest_framework.authtoken.models import Token
+    from rest_framework.test import APIClient
+
+    from core.authentication import CachedTokenAuthentication
+    from core.models import Recipe
+    from recipe.views import RecipeViewSet
+    from user.views import ManageUserView
+
+    _client, user = create_user()
+    seed_recipes(user, 1)
+    client = APIClient()
+    client.credentials(
+        HTTP_AUTHORIZATION=f"Token {Token.objects.create(user=user).key}"
+    )
+    urls = {
+        "user profile": reverse("user:me"),
+        "recipe detail": reverse(
+            "recipe:recipe-detail", args=[Recipe.objects.get().id],
+        ),
+    }
+    views = (ManageUserView, RecipeViewSet)
+    for title, url in urls.items():
+        print(title)
+        for authentication in (TokenAuthentication, CachedTokenAuthentication):
+            for view in views:
+                view.authentication_classes = [authentication]
+            run(f"  {authentication.__name__}", client, url, args.requests)
+
+
+if __name__ == "__main__":
+    main()
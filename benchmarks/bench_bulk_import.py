@@ -0,0 +1,76 @@
+"""
+Compare the bulk import endpoint with one POST per recipe.
+"""
+import argparse
+import json
+import tracemalloc
+
+from benchmarks.common import (
+    bootstrap,
+    create_user,
+    timer,
+)
+
+
+def records(count):
+    """Yield sample recipe payloads."""
+    for i in range(count):
+        yield {
+            "title": f"Recipe {i}",
+            "time_minutes": 30,
+            "price": "4.50",
+            "tags": [{"name": f"Tag {i % 10}"}],
+            "ingredients": [
+                {"name": f"Ingredient {i % 50}"},
+                {"name": f"Ingredient {(i + 1) % 50}"},
+            ],
+        }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--count", type=int, default=2000)
+    parser.add_argument("--memory-lines", type=int, default=100_000)
+    args = parser.parse_args()
+
+    bootstrap()
+    from django.urls import reverse
+    from recipe import bulk
+
+    list_url = reverse("recipe:recipe-list")
+    bulk_url = reverse("recipe:recipe-bulk")
+
+    client, _user = create_user("single@example.com")
+    with timer("per-request POST", args.count):
+        for record in records(args.count):
+            client.post(list_url, record, format="json")
+
+    client, _user = create_user("bulk@example.com")
+    body = "".join(json.dumps(r) + "\n" for r in records(args.count))
+    with timer("bulk NDJSON", args.count):
+        response = client.post(
+            bulk_url, body, content_type=bulk.NDJSON_CONTENT_TYPE,
+        )
+        for _line in response.streaming_content:
+            pass
+
+    if args.memory_lines:
+        client, _user = create_user("memory@example.com")
+        body = "".join(
+            json.dumps(r) + "\n" for r in records(args.memory_lines)
+        )
+        tracemalloc.start()
+        with timer(f"bulk NDJSON, {args.memory_lines} lines", args.memory_lines):
+            response = client.post(
+                bulk_url, body, content_type=bulk.NDJSON_CONTENT_TYPE,
+            )
+            for _line in response.streaming_content:
+                pass
+        _current, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        print(f"peak traced memory: {peak / 2**20:.1f} MiB "
+              f"(request body {len(body) / 2**20:.1f} MiB)")
+
+
+if __name__ == "__main__":
+    main()
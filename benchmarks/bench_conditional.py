@@ -0,0 +1,72 @@
+"""
+Compare a full recipe list response with a conditional 304 revalidation.
+
+The response cache is cleared before every request so both paths do their
+own database work; the serializer is instrumented to show the 304 path
+never reaches it.
+"""
+import argparse
+import statistics
+import time
+
+from benchmarks.common import (
+    bootstrap,
+    create_user,
+    seed_recipes,
+)
+
+
+def measure(client, url, repeat, expected, **headers):
+    """Return the median latency of ``repeat`` requests in milliseconds."""
+    from django.core.cache import cache
+
+    timings = []
+    for _ in range(repeat):
+        cache.clear()
+        start = time.perf_counter()
+        response = client.get(url, **headers)
+        timings.append(time.perf_counter() - start)
+        assert response.status_code == expected, response.status_code
+
+    return statistics.median(timings) * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--recipes", type=int, default=10_000)
+    parser.add_argument("--repeat", type=int, default=10)
+    args = parser.parse_args()
+
+    bootstrap()
+    from django.urls import reverse
+    from recipe.serializers import RecipeSerializer
+
+    client, user = create_user()
+    seed_recipes(user, args.recipes)
+    url = reverse("recipe:recipe-list")
+
+    calls = 0
+    to_representation = RecipeSerializer.to_representation
+
+    def counting(self, instance):
+        nonlocal calls
+        calls += 1
+        return to_representation(self, instance)
+
+    RecipeSerializer.to_representation = counting
+
+    etag = client.get(url)["ETag"]
+    calls = 0
+    full = measure(client, url, args.repeat, 200)
+    full_calls, calls = calls, 0
+    not_modified = measure(
+        client, url, args.repeat, 304, HTTP_IF_NONE_MATCH=etag,
+    )
+
+    print(f"{args.recipes} recipes, {args.repeat} requests each")
+    print(f"200 full list: {full:.2f}ms, {full_calls} recipes serialized")
+    print(f"304 revalidation: {not_modified:.2f}ms, {calls} recipes serialized")
+
+
+if __name__ == "__main__":
+    main()
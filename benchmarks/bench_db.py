@@ -0,0 +1,122 @@
+"""
+Compare per-request, persistent and pooled database connections.
+
+Each setup runs in its own process against an SQLite file, under WSGI from
+a pool of threads and under ASGI, with the requests of bench_async:
+
+* ``per-request``: Django's default, a new connection for each request.
+* ``persistent``: ``CONN_MAX_AGE`` keeps each thread's connection open.
+* ``pooled``: ``DB_POOL_SIZE`` connections shared by the process.
+
+Under ASGI each request's ORM calls run in a new thread, so persistent
+connections are opened for every request too.
+
+Opening an SQLite connection takes about 0.1ms. ``--connect-ms`` adds a wait
+to each new connection as a stand-in for Postgres, where the TCP handshake,
+authentication and starting a server process take a few milliseconds.
+"""
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+SETUPS = {
+    "per-request": {"DB_CONN_MAX_AGE": "0"},
+    "persistent": {"DB_CONN_MAX_AGE": "none"},
+    "pooled": {"DB_CONN_MAX_AGE": "0", "DB_POOL_SIZE": "8"},
+}
+SERVERS = ["wsgi", "asgi"]
+
+
+def run(server, setup_name, args):
+    from benchmarks import common  # noqa: F401, sets DJANGO_SETTINGS_MODULE
+    from django.conf import settings
+
+    # A file, as in-memory SQLite databases are never closed, and no
+    # response cache, so that every request queries the database.
+    directory = tempfile.TemporaryDirectory()
+    settings.DATABASES["default"]["TEST"] = {
+        "NAME": os.path.join(directory.name, "bench.sqlite3"),
+    }
+    settings.CACHES = {
+        "default": {"BACKEND": "django.core.cache.backends.dummy.DummyCache"},
+    }
+
+    from benchmarks.bench_async import (
+        run_asgi,
+        run_wsgi,
+        setup,
+    )
+    from django.db import connections
+    from django.db.backends.sqlite3 import base
+
+    paths, key = setup(args.recipes)
+    connections.close_all()
+    opened = []
+    connect = base.DatabaseWrapper.get_new_connection
+
+    def counted(self, conn_params):
+        opened.append(1)
+        time.sleep(args.connect_ms / 1000)
+        return connect(self, conn_params)
+
+    base.DatabaseWrapper.get_new_connection = counted
+
+    if server == "wsgi":
+        elapsed, latencies = run_wsgi(
+            paths, key, args.requests, args.concurrency, args.threads,
+        )
+    else:
+        elapsed, latencies = run_asgi(
+            paths, key, args.requests, args.concurrency,
+        )
+    latencies.sort()
+    print(
+        f"{server} {setup_name}: {args.requests / elapsed:,.0f} req/s, "
+        f"p50 {statistics.median(latencies) * 1000:.1f}ms, "
+        f"p99 {latencies[int(len(latencies) * 0.99)] * 1000:.1f}ms, "
+        f"{len(opened)} connections opened"
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--server", choices=SERVERS)
+    parser.add_argument("--setup", choices=SETUPS)
+    parser.add_argument("--requests", type=int, default=3000)
+    parser.add_argument("--concurrency", type=int, default=50)
+    parser.add_argument(
+        "--threads", type=int, default=8, help="WSGI worker threads",
+    )
+    parser.add_argument("--recipes", type=int, default=100)
+    parser.add_argument(
+        "--connect-ms", type=float, default=3,
+        help="Milliseconds added to opening each connection",
+    )
+    args = parser.parse_args()
+
+    if args.server:
+        run(args.server, args.setup, args)
+        return
+
+    for server in SERVERS:
+        for name, environ in SETUPS.items():
+            env = {
+                **os.environ,
+                "DB_POOL_SIZE": "0",
+                "DJANGO_API_ASYNC_VIEWS": "1" if server == "asgi" else "0",
+                **environ,
+            }
+            subprocess.run(
+                [sys.executable, "-m", "benchmarks.bench_db",
+                 "--server", server, "--setup", name, *sys.argv[1:]],
+                env=env,
+                check=True,
+            )
+
+
+if __name__ == "__main__":
+    main()
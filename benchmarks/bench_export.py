@@ -0,0 +1,70 @@
+"""
+Measure peak memory while streaming a full recipe export.
+
+Each size runs in a fresh process so the reported peak RSS is not inflated
+by an earlier run.
+"""
+import argparse
+import resource
+import subprocess
+import sys
+import tracemalloc
+
+from benchmarks.common import (
+    bootstrap,
+    create_user,
+    seed_recipes,
+    timer,
+)
+
+
+def run(count, export_format):
+    """Seed ``count`` recipes and stream them through the export endpoint."""
+    bootstrap()
+    from django.urls import reverse
+
+    client, user = create_user()
+    seed_recipes(user, count)
+    rss_before = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+    tracemalloc.start()
+    size = 0
+    with timer(f"export {count} recipes as {export_format}", count):
+        response = client.get(
+            reverse("recipe:recipe-export"),
+            {"export_format": export_format},
+        )
+        for chunk in response.streaming_content:
+            size += len(chunk)
+    _current, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    rss_after = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    print(f"  body {size / 2**20:.1f} MiB, "
+          f"peak traced {peak / 2**20:.1f} MiB, "
+          f"peak RSS {rss_after / 1024:.1f} MiB "
+          f"(+{(rss_after - rss_before) / 1024:.1f} MiB during export)")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--counts", type=int, nargs="+",
+                        default=[10_000, 100_000])
+    parser.add_argument("--format", default="ndjson",
+                        choices=["ndjson", "csv"])
+    parser.add_argument("--child", type=int, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        run(args.child, args.format)
+        return
+
+    for count in args.counts:
+        subprocess.run([
+            sys.executable, "-m", "benchmarks.bench_export",
+            "--child", str(count), "--format", args.format,
+        ], check=True)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,68 @@
+"""
+Compare DRF's stdlib JSON renderer and parser with the orjson ones.
+"""
+import argparse
+import gc
+import io
+import statistics
+import time
+
+from benchmarks.common import (
+    bootstrap,
+    create_user,
+    seed_recipes,
+)
+
+
+def measure(func, repeat):
+    """Return the median time of ``func`` in milliseconds."""
+    timings = []
+    for _ in range(repeat):
+        gc.collect()
+        start = time.perf_counter()
+        func()
+        timings.append(time.perf_counter() - start)
+
+    return statistics.median(timings) * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--recipes", type=int, default=10_000)
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    bootstrap()
+    from rest_framework import (
+        parsers,
+        renderers,
+    )
+    from core.models import Recipe
+    from core.parsers import JSONParser
+    from core.renderers import JSONRenderer
+    from recipe.serializers import RecipeRowListSerializer
+
+    _client, user = create_user()
+    seed_recipes(user, args.recipes)
+    data = RecipeRowListSerializer(
+        Recipe.objects.filter(user=user).order_by("-id").values(
+            *RecipeRowListSerializer.value_fields()
+        ),
+    ).data
+    body = renderers.JSONRenderer().render(data)
+    assert JSONRenderer().render(data) == body
+
+    print(f"{args.recipes} recipes, {len(body) / 2**20:.1f} MiB")
+    for label, renderer, json_parser in (
+        ("stdlib", renderers.JSONRenderer(), parsers.JSONParser()),
+        ("orjson", JSONRenderer(), JSONParser()),
+    ):
+        render = measure(lambda: renderer.render(data), args.repeat)
+        parse = measure(
+            lambda: json_parser.parse(io.BytesIO(body)), args.repeat,
+        )
+        print(f"{label}: render {render:.2f}ms, parse {parse:.2f}ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,75 @@
+"""
+Compare RecipeSerializer with the values() fast path on one page of recipes.
+"""
+import argparse
+import statistics
+import time
+
+from benchmarks.common import (
+    bootstrap,
+    create_user,
+    seed_recipes,
+)
+
+
+def measure(render, repeat, rows):
+    """Return the median time in ms and rows per second of ``render``."""
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        render()
+        timings.append(time.perf_counter() - start)
+
+    median = statistics.median(timings)
+    return median * 1000, rows / median
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--rows", type=int, default=1000)
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    bootstrap()
+    from django.db.models import Prefetch
+    from rest_framework.renderers import JSONRenderer
+    from core.models import (
+        Recipe,
+        Tag,
+        Ingredient,
+    )
+    from recipe.serializers import (
+        RecipeSerializer,
+        RecipeRowListSerializer,
+    )
+
+    _client, user = create_user()
+    seed_recipes(user, args.rows)
+    queryset = Recipe.objects.filter(user=user).order_by("-id")
+
+    def serializer():
+        return JSONRenderer().render(RecipeSerializer(
+            queryset.prefetch_related(
+                Prefetch("tags", queryset=Tag.objects.only("id", "name")),
+                Prefetch(
+                    "ingredients",
+                    queryset=Ingredient.objects.only("id", "name"),
+                ),
+            ).only(*RecipeRowListSerializer.value_fields()),
+            many=True,
+        ).data)
+
+    def fast():
+        return JSONRenderer().render(RecipeRowListSerializer(
+            queryset.values(*RecipeRowListSerializer.value_fields()),
+        ).data)
+
+    assert serializer() == fast()
+    print(f"{args.rows} rows with 3 tags and 5 ingredients each")
+    for label, render in (("RecipeSerializer", serializer), ("fast path", fast)):
+        elapsed, rate = measure(render, args.repeat, args.rows)
+        print(f"{label}: {elapsed:.2f}ms ({rate:,.0f} rows/s)")
+
+
+if __name__ == "__main__":
+    main()
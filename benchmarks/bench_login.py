@@ -0,0 +1,112 @@
+"""
+Measure recipe latency while a login storm hashes passwords.
+
+Storm threads post to the token endpoint as fast as they can while the
+main thread times recipe detail requests. Each scenario is run with
+Django's ``ModelBackend``, which hashes in every request thread, and with
+``PooledModelBackend``, which hashes in a bounded pool, with the login
+throttles off and on.
+"""
+import argparse
+import statistics
+import threading
+import time
+
+from benchmarks.common import (
+    bootstrap,
+    create_user,
+    seed_recipes,
+)
+
+UNTHROTTLED = {"ip": "1000000/s", "account": "1000000/s"}
+
+
+def storm(stop, results, index):
+    """Log in until ``stop`` is set, counting responses by status."""
+    from django.db import connection
+    from django.urls import reverse
+    from rest_framework.test import APIClient
+
+    client = APIClient()
+    url = reverse("user:token")
+    payload = {"email": "bench@example.com", "password": "bench1234"}
+    while not stop.is_set():
+        response = client.post(url, payload, REMOTE_ADDR=f"10.0.0.{index}")
+        code = response.status_code
+        results[code] = results.get(code, 0) + 1
+    connection.close()
+
+
+def run(label, client, url, threads, requests):
+    """Time ``requests`` fetches of ``url`` during a storm of ``threads``."""
+    stop = threading.Event()
+    results = [{} for _ in range(threads)]
+    workers = [
+        threading.Thread(target=storm, args=(stop, results[i], i))
+        for i in range(threads)
+    ]
+    for worker in workers:
+        worker.start()
+    time.sleep(0.5)
+
+    latencies = []
+    start = time.perf_counter()
+    for _ in range(requests):
+        began = time.perf_counter()
+        client.get(url)
+        latencies.append(time.perf_counter() - began)
+    elapsed = time.perf_counter() - start
+    stop.set()
+    for worker in workers:
+        worker.join()
+
+    statuses = {}
+    for result in results:
+        for code, count in result.items():
+            statuses[code] = statuses.get(code, 0) + count
+    latencies.sort()
+    print(
+        f"{label}: p50 {statistics.median(latencies) * 1000:.1f}ms, "
+        f"p99 {latencies[int(len(latencies) * 0.99)] * 1000:.1f}ms, "
+        f"logins {dict(sorted(statuses.items()))} "
+        f"({sum(statuses.values()) / elapsed:,.0f}/s)"
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--threads", type=int, default=16)
+    parser.add_argument("--requests", type=int, default=300)
+    args = parser.parse_args()
+
+    bootstrap()
+    from django.test.utils import override_settings
+    from django.urls import reverse
+
+    from core import throttling
+    from core.models import Recipe
+
+    client, user = create_user()
+    seed_recipes(user, 1)
+    url = reverse("recipe:recipe-detail", args=[Recipe.objects.get().id])
+
+    run("no logins", client, url, 0, args.requests)
+    scenarios = [
+        ("ModelBackend", "django.contrib.auth.backends.ModelBackend",
+         UNTHROTTLED),
+        ("PooledModelBackend", "core.backends.PooledModelBackend",
+         UNTHROTTLED),
+        ("PooledModelBackend, throttled", "core.backends.PooledModelBackend",
+         None),
+    ]
+    for label, backend, rates in scenarios:
+        throttling.reset()
+        overrides = {"AUTHENTICATION_BACKENDS": [backend]}
+        if rates:
+            overrides["LOGIN_THROTTLE_RATES"] = rates
+        with override_settings(**overrides):
+            run(label, client, url, args.threads, args.requests)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,93 @@
+"""
+Time the any/all/ranked ingredient filters for a user with many recipes.
+"""
+import argparse
+import random
+import statistics
+import time
+from decimal import Decimal
+
+from benchmarks.common import (
+    bootstrap,
+    create_user,
+)
+
+
+def seed(user, recipes, ingredients, per_recipe):
+    """Create recipes each linked to a random sample of ingredients."""
+    from core.models import (
+        Recipe,
+        Ingredient,
+    )
+
+    rng = random.Random(0)
+    ingredient_ids = [obj.id for obj in Ingredient.objects.bulk_create([
+        Ingredient(user=user, name=f"Ingredient {i}")
+        for i in range(ingredients)
+    ])]
+    recipe_objs = Recipe.objects.bulk_create([
+        Recipe(
+            user=user,
+            title=f"Recipe {i}",
+            time_minutes=20,
+            price=Decimal("3.00"),
+        )
+        for i in range(recipes)
+    ])
+    Recipe.ingredients.through.objects.bulk_create([
+        Recipe.ingredients.through(recipe_id=recipe.id, ingredient_id=pk)
+        for recipe in recipe_objs
+        for pk in rng.sample(ingredient_ids, per_recipe)
+    ])
+
+    return ingredient_ids
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--recipes", type=int, default=10_000)
+    parser.add_argument("--ingredients", type=int, default=200)
+    parser.add_argument("--per-recipe", type=int, default=8)
+    parser.add_argument("--query-size", type=int, default=5)
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    bootstrap()
+    from django.urls import reverse
+    from rest_framework.request import Request
+    from rest_framework.test import APIRequestFactory
+    from recipe.views import RecipeViewSet
+
+    client, user = create_user()
+    ingredient_ids = seed(
+        user, args.recipes, args.ingredients, args.per_recipe,
+    )
+    url = reverse("recipe:recipe-list")
+    ids = ",".join(map(str, ingredient_ids[:args.query_size]))
+
+    for match in ("any", "all", "ranked"):
+        params = {"ingredients": ids, "match": match}
+        request = Request(APIRequestFactory().get(url, params))
+        request.user = user
+        queryset = RecipeViewSet(
+            action="list", request=request, format_kwarg=None,
+        ).get_queryset()
+
+        query_timings = []
+        request_timings = []
+        for _ in range(args.repeat):
+            start = time.perf_counter()
+            matched = len(queryset.values_list("id", flat=True))
+            query_timings.append(time.perf_counter() - start)
+
+            start = time.perf_counter()
+            client.get(url, params)
+            request_timings.append(time.perf_counter() - start)
+        print(f"match={match}: "
+              f"query {statistics.median(query_timings) * 1000:.2f}ms, "
+              f"request {statistics.median(request_timings) * 1000:.2f}ms "
+              f"({matched} recipes)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,150 @@
+"""
+Compare media throughput of Django's static view with the media view.
+
+Both views are served over real sockets by a wsgiref server in a thread.
+"media view (sendfile)" runs the same server with a handler sending
+``wsgi.file_wrapper`` files with ``os.sendfile``, as gunicorn and uWSGI do.
+"""
+import argparse
+import http.client
+import os
+import shutil
+import tempfile
+import threading
+import time
+from wsgiref import simple_server
+
+from benchmarks.common import bootstrap
+
+
+class SendfileServerHandler(simple_server.ServerHandler):
+    """wsgiref handler sending wrapped files with ``os.sendfile``."""
+
+    def sendfile(self):
+        filelike = self.result.filelike
+        if not hasattr(filelike, "fileno"):
+            return False
+        self.send_headers()
+        offset = filelike.tell()
+        remaining = int(self.headers["Content-Length"])
+        while remaining:
+            sent = os.sendfile(
+                self.stdout.fileno(), filelike.fileno(), offset, remaining,
+            )
+            if not sent:
+                break
+            offset += sent
+            remaining -= sent
+        self.bytes_sent += offset - filelike.tell()
+        return True
+
+
+def request_handler(server_handler):
+    """Return a quiet wsgiref request handler using ``server_handler``."""
+
+    class RequestHandler(simple_server.WSGIRequestHandler):
+        def handle(self):
+            self.raw_requestline = self.rfile.readline(65537)
+            if not self.parse_request():
+                return
+            handler = server_handler(
+                self.rfile, self.wfile, self.get_stderr(), self.get_environ(),
+                multithread=False,
+            )
+            handler.request_handler = self
+            handler.run(self.server.get_app())
+
+        def log_message(self, *args):
+            pass
+
+    return RequestHandler
+
+
+def serve(app, server_handler):
+    """Start a threaded wsgiref server and return it."""
+    server = simple_server.make_server(
+        "127.0.0.1", 0, app, handler_class=request_handler(server_handler),
+    )
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def run(label, server, path, requests, headers=None):
+    """Fetch ``path`` ``requests`` times and print the throughput."""
+    received = 0
+    start = time.perf_counter()
+    for _ in range(requests):
+        connection = http.client.HTTPConnection(*server.server_address)
+        connection.request("GET", path, headers=headers or {})
+        response = connection.getresponse()
+        received += len(response.read())
+        status = response.status
+        connection.close()
+    elapsed = time.perf_counter() - start
+    print(
+        f"  {label}: {status}, {requests / elapsed:.0f} req/s, "
+        f"{received / elapsed / 2**20:.0f} MiB/s, "
+        f"{received / requests / 2**10:.0f} KiB/response"
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--size-mb", type=int, default=8)
+    parser.add_argument("--requests", type=int, default=200)
+    args = parser.parse_args()
+
+    bootstrap()
+    from django.conf import settings
+    from django.core.wsgi import get_wsgi_application
+    from django.test.utils import override_settings
+    from django.urls import re_path
+    from django.views.static import serve as static_serve
+
+    from core.views import serve_media
+
+    media_root = tempfile.mkdtemp()
+    name = "uploads/recipe/ab/cd/abcd" + "0" * 60 + ".jpg"
+    os.makedirs(os.path.join(media_root, os.path.dirname(name)))
+    with open(os.path.join(media_root, name), "wb") as file:
+        file.write(os.urandom(args.size_mb * 2**20))
+
+    class URLConf:
+        urlpatterns = [
+            re_path(r"^static/(?P<path>.+)$", static_serve, {
+                "document_root": media_root,
+            }),
+            re_path(r"^media/(?P<path>.+)$", serve_media),
+        ]
+
+    settings.ALLOWED_HOSTS = ["*"]
+    app = get_wsgi_application()
+    copying = serve(app, simple_server.ServerHandler)
+    sendfile = serve(app, SendfileServerHandler)
+    views = {
+        "static view": (copying, f"/static/{name}"),
+        "media view": (copying, f"/media/{name}"),
+        "media view (sendfile)": (sendfile, f"/media/{name}"),
+    }
+    cases = {
+        f"full {args.size_mb} MiB file": {},
+        "64 KiB range": {"Range": "bytes=0-65535"},
+        "revalidation": {"If-None-Match": '"abcd' + "0" * 60 + '"'},
+    }
+    try:
+        with override_settings(ROOT_URLCONF=URLConf, MEDIA_ROOT=media_root):
+            for title, headers in cases.items():
+                print(title)
+                for label, (server, path) in views.items():
+                    run(label, server, path, args.requests, headers)
+            print("offloaded with X-Accel-Redirect")
+            with override_settings(MEDIA_SENDFILE_HEADER="X-Accel-Redirect"):
+                run("media view", copying, f"/media/{name}", args.requests)
+    finally:
+        for server in (copying, sendfile):
+            server.shutdown()
+        shutil.rmtree(media_root)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,68 @@
+"""
+Compare the latency of the first and a deep page of the recipe list.
+"""
+import argparse
+import statistics
+import time
+from base64 import b64encode
+from urllib.parse import urlencode
+
+from benchmarks.common import (
+    bootstrap,
+    create_user,
+    seed_recipes,
+)
+
+
+def cursor_for(position):
+    """Encode a forward cursor starting after ``position``."""
+    return b64encode(urlencode({"p": position}).encode()).decode()
+
+
+def measure(client, url, params, repeat):
+    """Return the median latency of ``repeat`` requests in milliseconds."""
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        response = client.get(url, params)
+        timings.append(time.perf_counter() - start)
+        assert response.status_code == 200, response.status_code
+
+    return statistics.median(timings) * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--recipes", type=int, default=100_000)
+    parser.add_argument("--page-size", type=int, default=50)
+    parser.add_argument("--page", type=int, default=1000)
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    bootstrap()
+    from django.urls import reverse
+    from core.models import Recipe
+
+    client, user = create_user()
+    seed_recipes(user, args.recipes)
+    url = reverse("recipe:recipe-list")
+
+    # The last id on the page before the requested one.
+    skip = (args.page - 1) * args.page_size
+    position = Recipe.objects.filter(user=user).order_by(
+        "-id"
+    ).values_list("id", flat=True)[skip - 1]
+
+    first = measure(client, url, {"page_size": args.page_size}, args.repeat)
+    deep = measure(client, url, {
+        "page_size": args.page_size,
+        "cursor": cursor_for(position),
+    }, args.repeat)
+
+    print(f"{args.recipes} recipes, page size {args.page_size}")
+    print(f"page 1: {first:.2f}ms")
+    print(f"page {args.page}: {deep:.2f}ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,75 @@
+"""
+Compare JOIN + DISTINCT with EXISTS for the tag/ingredient list filters,
+and both with the usage counter for ``assigned_only``.
+
+The default seed gives 200k recipes with 5 ingredient links each, i.e. one
+million through-table rows.
+"""
+import argparse
+import statistics
+import time
+
+from benchmarks.common import (
+    bootstrap,
+    create_user,
+    seed_recipes,
+)
+
+
+def measure(queryset, repeat):
+    """Return the median time to fetch every matching id, in milliseconds."""
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        list(queryset.values_list("id", flat=True))
+        timings.append(time.perf_counter() - start)
+
+    return statistics.median(timings) * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--recipes", type=int, default=200_000)
+    parser.add_argument("--repeat", type=int, default=10)
+    args = parser.parse_args()
+
+    bootstrap()
+    from django.db.models import (
+        Exists,
+        OuterRef,
+    )
+    from core import stats
+    from core.models import (
+        Recipe,
+        Ingredient,
+    )
+
+    _client, user = create_user()
+    seed_recipes(user, args.recipes, tags=1, ingredients=5)
+    stats.rebuild_uses([user.id])
+    ids = list(Ingredient.objects.filter(user=user).values_list(
+        "id", flat=True,
+    )[:2])
+    links = Recipe.ingredients.through.objects
+    print(f"{links.count():,} through rows")
+
+    recipes = Recipe.objects.filter(user=user).order_by("-id")
+    distinct = recipes.filter(ingredients__id__in=ids).distinct()
+    exists = recipes.filter(Exists(links.filter(
+        recipe_id=OuterRef("pk"),
+        ingredient_id__in=ids,
+    )))
+    print(f"JOIN + DISTINCT: {measure(distinct, args.repeat):.2f}ms")
+    print(f"EXISTS:          {measure(exists, args.repeat):.2f}ms")
+
+    assigned = Ingredient.objects.filter(user=user).order_by("-name")
+    print("assigned_only JOIN + DISTINCT: "
+          f"{measure(assigned.filter(recipe__isnull=False).distinct(), args.repeat):.2f}ms")
+    print("assigned_only EXISTS:          "
+          f"{measure(assigned.filter(Exists(links.filter(ingredient_id=OuterRef('pk')))), args.repeat):.2f}ms")
+    print("assigned_only counter:         "
+          f"{measure(assigned.filter(recipe_count__gt=0), args.repeat):.2f}ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,85 @@
+"""
+Compare the full-text search backend with a naive ``icontains`` search.
+"""
+import argparse
+import random
+import statistics
+import time
+from decimal import Decimal
+
+from benchmarks.common import (
+    bootstrap,
+    create_user,
+)
+
+WORDS = (
+    "rice carrot onion lamb beef chicken garlic cumin pepper tomato "
+    "potato noodle dough butter yogurt mint dill quince apricot walnut "
+    "pumpkin bean lentil chickpea cabbage radish melon grape honey sesame"
+).split()
+
+
+def measure(queryset, repeat):
+    """Return the median time to fetch the matching ids, in milliseconds."""
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        count = len(queryset.values_list("id", flat=True))
+        timings.append(time.perf_counter() - start)
+
+    return statistics.median(timings) * 1000, count
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--recipes", type=int, default=100_000)
+    parser.add_argument(
+        "--query", default="quince walnut honey apricot melon grape sesame",
+    )
+    parser.add_argument("--repeat", type=int, default=10)
+    args = parser.parse_args()
+
+    bootstrap()
+    from django.db.models import Q
+    from core import search
+    from core.models import Recipe
+
+    rng = random.Random(0)
+    _client, user = create_user()
+    Recipe.objects.bulk_create([
+        Recipe(
+            user=user,
+            title=" ".join(rng.sample(WORDS, 3)),
+            description=" ".join(rng.choices(WORDS, k=40)),
+            time_minutes=30,
+            price=Decimal("4.00"),
+        )
+        for _ in range(args.recipes)
+    ], batch_size=5000)
+    start = time.perf_counter()
+    search.get_backend().rebuild()
+    print(f"indexed {args.recipes} recipes in "
+          f"{time.perf_counter() - start:.1f}s")
+
+    recipes = Recipe.objects.filter(user=user)
+    naive = recipes
+    for term in args.query.split():
+        naive = naive.filter(
+            Q(title__icontains=term)
+            | Q(description__icontains=term)
+            | Q(tags__name__icontains=term)
+            | Q(ingredients__name__icontains=term)
+        ).distinct()
+    indexed = search.get_backend().search(recipes, args.query).order_by(
+        "-search_rank", "-id",
+    )
+
+    elapsed, count = measure(naive, args.repeat)
+    print(f"icontains: {elapsed:.2f}ms ({count} recipes)")
+    elapsed, count = measure(indexed, args.repeat)
+    print(f"{type(search.get_backend()).__name__}, ranked: "
+          f"{elapsed:.2f}ms ({count} recipes)")
+
+
+if __name__ == "__main__":
+    main()
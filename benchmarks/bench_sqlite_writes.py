@@ -0,0 +1,139 @@
+"""
+Measure concurrent recipe writes on SQLite, stock and tuned.
+
+Writer threads create recipes with tags and ingredients through
+RecipeSerializer, then replace their tags, against an SQLite file:
+
+* ``stock``: SQLite's defaults, with Django's 5 second busy timeout.
+* ``wal``: write-ahead logging and the other PRAGMAs, but transactions
+  still begin deferred.
+* ``tuned``: the PRAGMAs and transactions beginning IMMEDIATE, as set by
+  DB_SQLITE_TUNING.
+
+A deferred transaction that has read and then writes can't wait for the
+lock; SQLite fails it at once with "database is locked".
+"""
+import argparse
+import os
+import subprocess
+import sys
+import tempfile
+import time
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from types import SimpleNamespace
+
+MODES = ["stock", "wal", "tuned"]
+
+
+def write(user, count):
+    """Create and update ``count`` recipes, counting the outcomes.
+
+    An update is skipped when its create fails.
+    """
+    from django.db import (
+        OperationalError,
+        connection,
+    )
+
+    from recipe.serializers import RecipeSerializer
+
+    context = {"request": SimpleNamespace(user=user)}
+    outcomes = Counter()
+    try:
+        for i in range(count):
+            try:
+                serializer = RecipeSerializer(data={
+                    "title": f"Recipe {i}",
+                    "time_minutes": 10,
+                    "price": "5.25",
+                    "tags": [{"name": f"Tag {i % 5}"}, {"name": "Daily"}],
+                    "ingredients": [{"name": f"Ingredient {i % 7}"}],
+                }, context=context)
+                serializer.is_valid(raise_exception=True)
+                recipe = serializer.save(user=user)
+                outcomes["ok"] += 1
+
+                serializer = RecipeSerializer(recipe, data={
+                    "tags": [{"name": f"Tag {(i + 1) % 5}"}],
+                }, partial=True, context=context)
+                serializer.is_valid(raise_exception=True)
+                serializer.save()
+                outcomes["ok"] += 1
+            except OperationalError as exc:
+                outcomes[str(exc)] += 1
+    finally:
+        connection.close()
+
+    return outcomes
+
+
+def run(mode, args):
+    from benchmarks import common  # noqa: F401, sets DJANGO_SETTINGS_MODULE
+    from django.conf import settings
+
+    directory = tempfile.TemporaryDirectory()
+    settings.DATABASES["default"]["TEST"] = {
+        "NAME": os.path.join(directory.name, "bench.sqlite3"),
+    }
+    if mode == "wal":
+        settings.DATABASES["default"]["OPTIONS"].pop("transaction_mode")
+
+    from benchmarks.common import (
+        bootstrap,
+        create_user,
+    )
+    from django.db import connection
+
+    bootstrap()
+    users = [
+        create_user(f"writer{i}@example.com")[1] for i in range(args.threads)
+    ]
+    connection.close()
+
+    outcomes = Counter()
+    start = time.perf_counter()
+    with ThreadPoolExecutor(args.threads) as executor:
+        for result in executor.map(write, users, [args.recipes] * len(users)):
+            outcomes.update(result)
+    elapsed = time.perf_counter() - start
+
+    errors = sum(n for outcome, n in outcomes.items() if outcome != "ok")
+    print(
+        f"{mode}: {outcomes['ok'] / elapsed:,.0f} writes/s, "
+        f"{outcomes['ok']} written, {errors} failed"
+        + "".join(
+            f"\n    {n} x {outcome}"
+            for outcome, n in outcomes.items() if outcome != "ok"
+        )
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--mode", choices=MODES)
+    parser.add_argument("--threads", type=int, default=32)
+    parser.add_argument(
+        "--recipes", type=int, default=25, help="Recipes per thread",
+    )
+    args = parser.parse_args()
+
+    if args.mode:
+        run(args.mode, args)
+        return
+
+    for mode in MODES:
+        env = {
+            **os.environ,
+            "DB_SQLITE_TUNING": "0" if mode == "stock" else "1",
+        }
+        subprocess.run(
+            [sys.executable, "-m", "benchmarks.bench_sqlite_writes",
+             "--mode", mode, *sys.argv[1:]],
+            env=env,
+            check=True,
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,85 @@
+"""
+Measure a delta sync of a few changes against a large recipe catalogue.
+"""
+import argparse
+import statistics
+import time
+
+from benchmarks.common import (
+    bootstrap,
+    create_user,
+    seed_recipes,
+    timer,
+)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--recipes", type=int, default=100_000)
+    parser.add_argument("--changes", type=int, default=10)
+    parser.add_argument("--repeat", type=int, default=20)
+    parser.add_argument(
+        "--full", action="store_true", help="Also time a full sync.",
+    )
+    args = parser.parse_args()
+
+    bootstrap()
+    from django.core.cache import cache
+    from django.db import connection
+    from django.test.utils import CaptureQueriesContext
+    from django.urls import reverse
+    from django.utils import timezone
+    from core.models import Recipe
+    from recipe import sync
+
+    client, user = create_user()
+    seed_recipes(user, args.recipes)
+    url = reverse("recipe:sync-list")
+
+    if args.full:
+        with timer(f"full sync of {args.recipes} recipes"):
+            response = client.get(url)
+        print(f"  body {len(response.content) / 2**20:.1f} MiB")
+    token = sync.encode_token(timezone.now())
+
+    # Half updates, the rest split between deletes and creates.
+    ids = list(Recipe.objects.filter(user=user).values_list("id", flat=True)[
+        :args.changes
+    ])
+    updates = args.changes // 2
+    deletes = (args.changes - updates) // 2
+    for recipe_id in ids[:updates]:
+        client.patch(
+            reverse("recipe:recipe-detail", args=[recipe_id]),
+            {"title": "Changed"},
+        )
+    for recipe_id in ids[updates:updates + deletes]:
+        client.delete(reverse("recipe:recipe-detail", args=[recipe_id]))
+    for i in range(args.changes - updates - deletes):
+        client.post(reverse("recipe:recipe-list"), {
+            "title": f"New {i}",
+            "time_minutes": 5,
+            "price": "1.00",
+        })
+
+    timings = []
+    for _ in range(args.repeat):
+        cache.clear()
+        with CaptureQueriesContext(connection) as ctx:
+            start = time.perf_counter()
+            response = client.get(url, {"since": token})
+            timings.append(time.perf_counter() - start)
+        assert response.status_code == 200, response.status_code
+
+    data = response.data
+    changed = len(data["recipes"]) + sum(map(len, data["deleted"].values()))
+    print(f"{args.recipes} recipes, {args.changes} changes")
+    print(
+        f"delta sync: {statistics.median(timings) * 1000:.2f}ms, "
+        f"{len(ctx.captured_queries)} queries, {changed} recipes in payload, "
+        f"body {len(response.content):,} bytes"
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,82 @@
+"""
+Compare the cost of verifying stored, cached and signed tokens.
+
+Each authentication class verifies the same user's token repeatedly; the
+signed token is also verified after a key rotation, when it only matches
+the fallback key.
+"""
+import argparse
+
+from benchmarks.common import (
+    bootstrap,
+    create_user,
+    timer,
+)
+
+
+def run(label, authentication, key, count):
+    """Verify ``key`` ``count`` times and print the rate and queries."""
+    from django.db import connection
+
+    queries = 0
+
+    def counting(execute, *args):
+        nonlocal queries
+        queries += 1
+        return execute(*args)
+
+    authentication.authenticate_credentials(key)
+    with connection.execute_wrapper(counting):
+        with timer(label, count):
+            for _ in range(count):
+                authentication.authenticate_credentials(key)
+    print(f"  {queries / count:.1f} queries/verification")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--count", type=int, default=20_000)
+    args = parser.parse_args()
+
+    bootstrap()
+    from django.conf import settings
+    from django.test.utils import override_settings
+    from rest_framework.authentication import TokenAuthentication
+    from rest_framework.authtoken.models import Token
+
+    from core import tokens
+    from core.authentication import (
+        CachedTokenAuthentication,
+        SignedTokenAuthentication,
+    )
+
+    _client, user = create_user()
+    key = Token.objects.create(user=user).key
+    access = tokens.access_token(user)
+
+    run("TokenAuthentication", TokenAuthentication(), key, args.count)
+    run(
+        "CachedTokenAuthentication",
+        CachedTokenAuthentication(),
+        key,
+        args.count,
+    )
+    run(
+        "SignedTokenAuthentication",
+        SignedTokenAuthentication(),
+        access,
+        args.count,
+    )
+    with override_settings(
+        SECRET_KEY="rotated-key", SECRET_KEY_FALLBACKS=[settings.SECRET_KEY],
+    ):
+        run(
+            "SignedTokenAuthentication, fallback key",
+            SignedTokenAuthentication(),
+            access,
+            args.count,
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,96 @@
+"""
+Compare Django's default upload handlers with the bounded image handler.
+
+Each case parses a multipart body the way the upload-image action does and
+validates the image like the serializer, reporting wall time, peak traced
+memory and how much of the body was read.
+"""
+import argparse
+import io
+import os
+import time
+import tracemalloc
+
+from benchmarks.common import bootstrap
+
+
+class CountingStream(io.BytesIO):
+    """Byte stream remembering how much of it was read."""
+
+    def read(self, *args):
+        data = super().read(*args)
+        self.consumed = self.tell()
+        return data
+
+
+def png_prefix():
+    """Return the bytes of a small valid PNG."""
+    from PIL import Image
+
+    buffer = io.BytesIO()
+    Image.new("RGB", (100, 100)).save(buffer, format="PNG")
+    return buffer.getvalue()
+
+
+def run(label, body, boundary, handlers):
+    """Parse ``body`` with ``handlers`` and print what it cost."""
+    from django import forms
+    from django.http.multipartparser import MultiPartParser
+
+    stream = CountingStream(body)
+    stream.consumed = 0
+    meta = {
+        "CONTENT_TYPE": f"multipart/form-data; boundary={boundary}",
+        "CONTENT_LENGTH": str(len(body)),
+    }
+    tracemalloc.start()
+    start = time.perf_counter()
+    try:
+        _post, files = MultiPartParser(meta, stream, handlers).parse()
+        forms.ImageField().clean(files["image"])
+        outcome = "accepted"
+    except Exception as exc:
+        outcome = f"rejected ({type(exc).__name__})"
+    elapsed = time.perf_counter() - start
+    _current, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    print(
+        f"  {label}: {outcome} in {elapsed * 1000:.1f}ms, "
+        f"peak traced {peak / 2**20:.2f} MiB, "
+        f"read {stream.consumed / 2**20:.1f} of {len(body) / 2**20:.1f} MiB"
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--size-mb", type=int, default=50)
+    args = parser.parse_args()
+
+    bootstrap()
+    from django.conf import settings
+    from django.core.files.uploadhandler import load_handler
+    from django.test.client import (
+        BOUNDARY,
+        encode_multipart,
+    )
+    from recipe.uploads import ImageUploadHandler
+
+    cases = {
+        f"{args.size_mb} MiB upload": png_prefix() + os.urandom(
+            args.size_mb * 2**20
+        ),
+        "non-image upload": b"%PDF-1.7" + os.urandom(5 * 2**20),
+    }
+    for title, data in cases.items():
+        upload = io.BytesIO(data)
+        upload.name = "image.png"
+        body = encode_multipart(BOUNDARY, {"image": upload})
+        print(title)
+        run("default handlers", body, BOUNDARY, [
+            load_handler(path) for path in settings.FILE_UPLOAD_HANDLERS
+        ])
+        run("ImageUploadHandler", body, BOUNDARY, [ImageUploadHandler()])
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,97 @@
+"""
+Shared setup for the benchmark scripts.
+
+Run a benchmark from the project root, e.g.::
+
+    python -m benchmarks.bench_bulk_import
+"""
+import os
+import time
+from contextlib import contextmanager
+from decimal import Decimal
+
+import django
+
+os.environ.setdefault("DJANGO_SETTINGS_MODULE", "config.settings")
+
+
+def bootstrap():
+    """Set up Django against a throwaway test database."""
+    django.setup()
+
+    from django.conf import settings
+    from django.db import connection
+    from django.test.utils import setup_test_environment
+
+    # Match the test runner: no debug toolbar or query logging.
+    settings.DEBUG = False
+    setup_test_environment()
+    connection.creation.create_test_db(verbosity=0, autoclobber=True)
+
+
+def create_user(email="bench@example.com"):
+    """Create and return an authenticated API client and its user."""
+    from django.contrib.auth import get_user_model
+    from rest_framework.test import APIClient
+
+    user = get_user_model().objects.create_user(
+        email=email,
+        password="bench1234",
+    )
+    client = APIClient()
+    client.force_authenticate(user)
+
+    return client, user
+
+
+def seed_recipes(user, count, tags=3, ingredients=5, batch_size=5000):
+    """Bulk insert ``count`` recipes linked to a few tags and ingredients."""
+    from core.models import (
+        Recipe,
+        Tag,
+        Ingredient,
+    )
+
+    tag_objs = Tag.objects.bulk_create([
+        Tag(user=user, name=f"Tag {i}") for i in range(tags)
+    ])
+    ingredient_objs = Ingredient.objects.bulk_create([
+        Ingredient(user=user, name=f"Ingredient {i}")
+        for i in range(ingredients)
+    ])
+    for start in range(0, count, batch_size):
+        recipes = Recipe.objects.bulk_create([
+            Recipe(
+                user=user,
+                title=f"Recipe {i}",
+                description="Benchmark recipe",
+                time_minutes=10 + i % 50,
+                price=Decimal("5.25"),
+            )
+            for i in range(start, min(start + batch_size, count))
+        ])
+        Recipe.tags.through.objects.bulk_create([
+            Recipe.tags.through(recipe_id=recipe.id, tag_id=tag.id)
+            for recipe in recipes
+            for tag in tag_objs
+        ])
+        Recipe.ingredients.through.objects.bulk_create([
+            Recipe.ingredients.through(
+                recipe_id=recipe.id,
+                ingredient_id=ingredient.id,
+            )
+            for recipe in recipes
+            for ingredient in ingredient_objs
+        ])
+
+
+@contextmanager
+def timer(label, count=None):
+    """Print the wall time of the block, and its rate if ``count`` is set."""
+    start = time.perf_counter()
+    yield
+    elapsed = time.perf_counter() - start
+    if count:
+        print(f"{label}: {elapsed:.3f}s ({count / elapsed:,.0f}/s)")
+    else:
+        print(f"{label}: {elapsed * 1000:.2f}ms")
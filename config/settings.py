@@ -10,9 +10,12 @@ For the full list of settings and their values, see
 https://docs.djangoproject.com/en/4.2/ref/settings/
 """
 
+from importlib.util import find_spec
 from pathlib import Path
 import os
 
+from django.core.exceptions import ImproperlyConfigured
+
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
 BASE_DIR = Path(__file__).resolve().parent.parent
 
@@ -90,22 +93,109 @@ WSGI_APPLICATION = 'config.wsgi.application'
 # Database
 # https://docs.djangoproject.com/en/4.2/ref/settings/#databases
 
-DATABASES = {
-    'default': {
-        'ENGINE': 'django.db.backends.sqlite3',
-        'NAME': BASE_DIR / 'db.sqlite3',
+# Postgres when DB_HOST is set, else SQLite. Connections are closed after
+# each request unless DB_CONN_MAX_AGE keeps them open for that many seconds
+# ("none" for good), or DB_POOL_SIZE pools up to that many per process, 10
+# by default for Postgres.
+if os.environ.get('DB_HOST'):
+    DATABASES = {
+        'default': {
+            'ENGINE': 'core.db.backends.postgresql',
+            'HOST': os.environ['DB_HOST'],
+            'PORT': os.environ.get('DB_PORT', ''),
+            'NAME': os.environ.get('DB_NAME', 'recipe-api-app'),
+            'USER': os.environ.get('DB_USER', 'postgres'),
+            'PASSWORD': os.environ.get('DB_PASS', ''),
+        }
+    }
+else:
+    DATABASES = {
+        'default': {
+            'ENGINE': 'core.db.backends.sqlite3',
+            'NAME': os.environ.get('DB_NAME', BASE_DIR / 'db.sqlite3'),
+            'OPTIONS': {},
+        }
+    }
+    # Unless DB_SQLITE_TUNING is 0, SQLite logs writes ahead so reads don't
+    # wait for them, syncs to disk at checkpoints only, maps and caches more
+    # of the file, and transactions take the write lock when they begin, so
+    # concurrent writers queue within the timeout instead of failing with
+    # "database is locked".
+    if os.environ.get('DB_SQLITE_TUNING', '1') == '1':
+        DATABASES['default']['OPTIONS'].update({
+            'init_command': (
+                'PRAGMA journal_mode = WAL;'
+                'PRAGMA synchronous = NORMAL;'
+                'PRAGMA mmap_size = 268435456;'
+                'PRAGMA cache_size = -65536;'
+            ),
+            'transaction_mode': 'IMMEDIATE',
+            'timeout': 20,
+        })
+
+DB_CONN_MAX_AGE = os.environ.get('DB_CONN_MAX_AGE', '0')
+DB_POOL_SIZE = int(
+    os.environ.get('DB_POOL_SIZE', '10' if os.environ.get('DB_HOST') else '0')
+)
+DATABASES['default'].update({
+    'CONN_MAX_AGE': (
+        None if DB_CONN_MAX_AGE.lower() == 'none' else int(DB_CONN_MAX_AGE)
+    ),
+    # Check persistent connections still work before reusing them.
+    'CONN_HEALTH_CHECKS': os.environ.get('DB_CONN_HEALTH_CHECKS', '1') == '1',
+})
+if DB_POOL_SIZE:
+    DATABASES['default'].setdefault('OPTIONS', {})['pool'] = {
+        'max_size': DB_POOL_SIZE,
+        'timeout': float(os.environ.get('DB_POOL_TIMEOUT', '30')),
     }
-}
 
-# DATABASES = {
-#     'default': {
-#         "ENGINE": 'django.db.backends.postgresql',
-#         "HOST": 'localhost',
-#         "NAME": "recipe-api-app",
-#         "USER": "postgres",
-#         "PASSWORD": "20062007"
-#     }
-# }
+# Read replicas of the default database for the recipe API's reads, as
+# comma-separated hosts for Postgres or files for SQLite. Users read from
+# the primary for DB_REPLICA_PIN_SECONDS after they write, which takes the
+# shared cache set up below.
+for number, replica in enumerate(
+    filter(None, os.environ.get('DB_REPLICAS', '').split(',')), 1,
+):
+    DATABASES[f'replica{number}'] = {
+        **DATABASES['default'],
+        ('HOST' if os.environ.get('DB_HOST') else 'NAME'): replica,
+        'TEST': {'MIRROR': 'default'},
+    }
+
+DATABASE_REPLICAS = [alias for alias in DATABASES if alias != 'default']
+DATABASE_REPLICA_PIN_SECONDS = int(
+    os.environ.get('DB_REPLICA_PIN_SECONDS', '5')
+)
+DATABASE_ROUTERS = ['core.routers.PrimaryReplicaRouter']
+
+# Password hashing: Argon2 when argon2-cffi is installed, else scrypt. Hashes
+# made with a hasher further down or with a different cost are upgraded when
+# their user logs in.
+PASSWORD_HASHERS = [
+    *(["core.hashers.Argon2PasswordHasher"] if find_spec("argon2") else []),
+    "core.hashers.ScryptPasswordHasher",
+    "django.contrib.auth.hashers.PBKDF2PasswordHasher",
+    "django.contrib.auth.hashers.PBKDF2SHA1PasswordHasher",
+]
+PASSWORD_ARGON2_TIME_COST = 2
+PASSWORD_ARGON2_MEMORY_COST = 100 * 2**10
+PASSWORD_ARGON2_PARALLELISM = 8
+PASSWORD_SCRYPT_WORK_FACTOR = 2**14
+PASSWORD_SCRYPT_BLOCK_SIZE = 8
+PASSWORD_SCRYPT_PARALLELISM = 1
+
+# Logins hash passwords in a pool of PASSWORD_HASH_WORKERS threads per
+# process; past PASSWORD_HASH_MAX_PENDING waiting logins they get a 503.
+AUTHENTICATION_BACKENDS = ["core.backends.PooledModelBackend"]
+PASSWORD_HASH_WORKERS = 2
+PASSWORD_HASH_MAX_PENDING = 32
+
+# Token buckets for /api/user/token/, per client address and per account.
+LOGIN_THROTTLE_RATES = {
+    "ip": "30/min",
+    "account": "10/min",
+}
 
 # Password validation
 # https://docs.djangoproject.com/en/4.2/ref/settings/#auth-password-validators
@@ -148,6 +238,16 @@ STATICFILES_DIRS = [str(BASE_DIR.joinpath('static'))]
 MEDIA_URL = "/media/"
 MEDIA_ROOT = os.path.join(BASE_DIR, "media")
 
+# Header handing media files to the front end server: "X-Sendfile" (Apache,
+# lighttpd) or "X-Accel-Redirect" (nginx, which maps
+# MEDIA_ACCEL_REDIRECT_PREFIX to MEDIA_ROOT in an internal location). None
+# streams them from Django.
+MEDIA_SENDFILE_HEADER = None
+MEDIA_ACCEL_REDIRECT_PREFIX = "/protected-media/"
+
+# Seconds media not stored by content may be cached before revalidating.
+MEDIA_MAX_AGE = 60 * 60
+
 # Default primary key field type
 # https://docs.djangoproject.com/en/4.2/ref/settings/#default-auto-field
 
@@ -160,7 +260,94 @@ AUTH_USER_MODEL = 'core.User'
 
 REST_FRAMEWORK = {
     "DEFAULT_SCHEMA_CLASS": "drf_spectacular.openapi.AutoSchema",
+    "DEFAULT_RENDERER_CLASSES": [
+        "core.renderers.JSONRenderer",
+        "rest_framework.renderers.BrowsableAPIRenderer",
+    ],
+    "DEFAULT_PARSER_CLASSES": [
+        "core.parsers.JSONParser",
+        "rest_framework.parsers.FormParser",
+        "rest_framework.parsers.MultiPartParser",
+    ],
+}
+
+# Serve the recipe, tag, ingredient and user APIs with async views, which
+# list, retrieve and create in the event loop. config/asgi.py turns them on;
+# under WSGI every async view would run through a new event loop instead.
+# Under ASGI, Django 4.2 reads a sync streaming response in full before
+# sending it, so the async views stream the recipe export and bulk import
+# results from a worker thread instead; other streaming views are buffered.
+API_ASYNC_VIEWS = os.environ.get("DJANGO_API_ASYNC_VIEWS") == "1"
+
+# Page sizes for the cursor paginated recipe, tag and ingredient lists.
+RECIPE_API_PAGE_SIZE = 50
+RECIPE_API_MAX_PAGE_SIZE = 500
+
+CACHES = {
+    "default": {
+        "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+    },
 }
+
+# A cache every process shares, in Redis at CACHE_REDIS_URL. Replicas need
+# it for their pins: a pin only its own process sees would send the user's
+# next request, served by another process, to a replica without the write.
+if os.environ.get('CACHE_REDIS_URL'):
+    CACHES["shared"] = {
+        "BACKEND": "django.core.cache.backends.redis.RedisCache",
+        "LOCATION": os.environ['CACHE_REDIS_URL'],
+    }
+elif DATABASE_REPLICAS:
+    raise ImproperlyConfigured(
+        "DB_REPLICAS needs CACHE_REDIS_URL, a cache shared by every process "
+        "for pinning users to the primary after they write."
+    )
+DATABASE_REPLICA_PIN_CACHE_ALIAS = (
+    "shared" if "shared" in CACHES else "default"
+)
+
+# Tokens issued by /api/user/token/: "db" for stored DRF tokens, "signed"
+# for signed access tokens with rotating refresh tokens. Both kinds are
+# accepted either way. Access tokens are signed with SECRET_KEY and still
+# verified with keys moved to SECRET_KEY_FALLBACKS.
+AUTH_TOKEN_TYPE = "db"
+AUTH_ACCESS_TOKEN_TTL = 5 * 60
+AUTH_REFRESH_TOKEN_TTL = 14 * 24 * 60 * 60
+
+# Token lookups cached per process: at most AUTH_TOKEN_CACHE_SIZE tokens, each
+# for AUTH_TOKEN_CACHE_TTL seconds, which bounds how long another process may
+# accept a deleted token. Set AUTH_TOKEN_CACHE_ALIAS to share them as well.
+AUTH_TOKEN_CACHE_SIZE = 10000
+AUTH_TOKEN_CACHE_TTL = 60
+AUTH_TOKEN_CACHE_ALIAS = None
+
+# Cache alias and timeout, in seconds, for cached recipe API responses. Hits
+# are checked against the user's data version, so a per-process cache stays
+# correct and a shared one also shares the cached responses.
+RECIPE_API_CACHE_ALIAS = "default"
+RECIPE_API_CACHE_TIMEOUT = 300
+
+# Worker processes rendering recipe image renditions; 0 renders inline.
+RECIPE_IMAGE_WORKERS = 2
+
+# Largest recipe image upload, in bytes and in pixels on either side.
+RECIPE_IMAGE_MAX_BYTES = 10 * 2**20
+RECIPE_IMAGE_MAX_DIMENSION = 8000
+
+# Seconds a stored image is kept after it was last written or reused, even
+# with no recipe using it, so uploads still in flight don't lose their file.
+RECIPE_IMAGE_GRACE_SECONDS = 10 * 60
+
+# Seconds sync tokens trail the clock. Rows saved before a sync but
+# committed after it, or saved by a server whose clock is behind, are then
+# sent by the next delta as well; it must exceed the longest write
+# transaction plus the clock skew between servers.
+SYNC_TOKEN_LAG_SECONDS = 60
+
+# Days deletions are kept for delta sync by prune_tombstones. Older tokens
+# are refused, so their clients sync from scratch.
+SYNC_TOMBSTONE_RETENTION_DAYS = 30
+
 SPECTACULAR_SETTINGS = {
     "COMPONENT_SPLIT_REQUEST": True,
 }
\ No newline at end of file
@@ -0,0 +1,234 @@
+"""
+Async dispatch for the API views served under ASGI.
+"""
+from inspect import isawaitable
+from itertools import islice
+
+from asgiref.sync import (
+    iscoroutinefunction,
+    markcoroutinefunction,
+    sync_to_async,
+)
+from django.core.cache.backends.locmem import LocMemCache
+from django.core.exceptions import ValidationError
+from django.core.handlers.asgi import ASGIRequest
+from django.http import (
+    Http404,
+    StreamingHttpResponse,
+)
+
+from rest_framework import (
+    exceptions,
+    status,
+)
+from rest_framework.response import Response
+
+
+async def _resolve(value):
+    return await value if isawaitable(value) else value
+
+# Items read from a sync streaming response per trip to a worker thread.
+STREAM_BATCH_SIZE = 100
+
+
+async def aiterate(iterable, batch_size=STREAM_BATCH_SIZE):
+    """Yield the items of a sync ``iterable``, read in a worker thread.
+
+    Django 4.2 reads a sync streaming response in full before sending it
+    under ASGI; iterating it this way sends it while it's still read.
+    """
+    iterator = iter(iterable)
+    read = sync_to_async(lambda: list(islice(iterator, batch_size)))
+    while batch := await read():
+        for item in batch:
+            yield item
+
+
+async def call_cache(cache, method, *args, **kwargs):
+    """Call ``cache.<method>`` from async code.
+
+    Django's cache backends only offer their async methods through a worker
+    thread; the local memory cache doesn't block, so it's called in the
+    event loop instead.
+    """
+    if isinstance(cache, LocMemCache):
+        return getattr(cache, method)(*args, **kwargs)
+
+    return await getattr(cache, f"a{method}")(*args, **kwargs)
+
+
+class AsyncAPIViewMixin:
+    """Dispatch a DRF view in the event loop instead of a worker thread.
+
+    Handlers that are coroutine functions run in the loop and the others
+    in a worker thread, as Django runs sync views under ASGI; streaming
+    responses they return to ASGI requests are iterated through
+    ``aiterate``. Authenticators
+    are awaited through ``aauthenticate`` when they have one. Permissions
+    and throttles are checked in the loop and may return awaitables, so
+    those needing the database must be async.
+    """
+    view_is_async = True
+
+    @classmethod
+    def as_view(cls, *args, **initkwargs):
+        return markcoroutinefunction(super().as_view(*args, **initkwargs))
+
+    async def dispatch(self, request, *args, **kwargs):
+        self.args = args
+        self.kwargs = kwargs
+        request = self.initialize_request(request, *args, **kwargs)
+        self.request = request
+        self.headers = self.default_response_headers
+
+        try:
+            await self.ainitial(request, *args, **kwargs)
+            if request.method.lower() in self.http_method_names:
+                handler = getattr(
+                    self, request.method.lower(), self.http_method_not_allowed,
+                )
+            else:
+                handler = self.http_method_not_allowed
+            if not iscoroutinefunction(handler):
+                handler = sync_to_async(handler)
+            response = await handler(request, *args, **kwargs)
+            if (
+                isinstance(response, StreamingHttpResponse)
+                and not response.is_async
+                and isinstance(request._request, ASGIRequest)
+            ):
+                response.streaming_content = aiterate(
+                    response.streaming_content,
+                )
+        except Exception as exc:
+            response = self.handle_exception(exc)
+
+        self.response = self.finalize_response(
+            request, response, *args, **kwargs,
+        )
+        return self.response
+
+    async def ainitial(self, request, *args, **kwargs):
+        """``initial`` for async views."""
+        self.format_kwarg = self.get_format_suffix(**kwargs)
+        neg = self.perform_content_negotiation(request)
+        request.accepted_renderer, request.accepted_media_type = neg
+        version, scheme = self.determine_version(request, *args, **kwargs)
+        request.version, request.versioning_scheme = version, scheme
+
+        await self.aperform_authentication(request)
+        await self.acheck_permissions(request)
+        await self.acheck_throttles(request)
+
+    async def aperform_authentication(self, request):
+        """Authenticate the request before ``request.user`` is read."""
+        for authenticator in request.authenticators:
+            authenticate = getattr(authenticator, "aauthenticate", None)
+            if authenticate is None:
+                authenticate = sync_to_async(authenticator.authenticate)
+            try:
+                user_auth_tuple = await authenticate(request)
+            except exceptions.APIException:
+                request._not_authenticated()
+                raise
+
+            if user_auth_tuple is not None:
+                request._authenticator = authenticator
+                request.user, request.auth = user_auth_tuple
+                return
+
+        request._not_authenticated()
+
+    async def acheck_permissions(self, request):
+        for permission in self.get_permissions():
+            if not await _resolve(permission.has_permission(request, self)):
+                self.permission_denied(
+                    request,
+                    message=getattr(permission, "message", None),
+                    code=getattr(permission, "code", None),
+                )
+
+    async def acheck_object_permissions(self, request, obj):
+        for permission in self.get_permissions():
+            if not await _resolve(
+                permission.has_object_permission(request, self, obj)
+            ):
+                self.permission_denied(
+                    request,
+                    message=getattr(permission, "message", None),
+                    code=getattr(permission, "code", None),
+                )
+
+    async def acheck_throttles(self, request):
+        durations = []
+        for throttle in self.get_throttles():
+            if not await _resolve(throttle.allow_request(request, self)):
+                durations.append(throttle.wait())
+
+        if durations:
+            durations = [d for d in durations if d is not None]
+            self.throttled(request, max(durations, default=None))
+
+    async def aget_object(self):
+        """``get_object`` reading the object with ``aget``."""
+        queryset = self.filter_queryset(self.get_queryset())
+        lookup_url_kwarg = self.lookup_url_kwarg or self.lookup_field
+        filter_kwargs = {self.lookup_field: self.kwargs[lookup_url_kwarg]}
+        try:
+            obj = await queryset.aget(**filter_kwargs)
+        except (
+            queryset.model.DoesNotExist,
+            TypeError,
+            ValueError,
+            ValidationError,
+        ):
+            raise Http404
+
+        await self.acheck_object_permissions(self.request, obj)
+        return obj
+
+    async def apaginate_queryset(self, queryset):
+        """Return a page of ``queryset``, or ``None`` if not paginated.
+
+        Paginators are sync, so the page is read in one worker thread, as
+        Django's own async queryset methods read their rows.
+        """
+        if self.paginator is None:
+            return None
+
+        return await sync_to_async(self.paginate_queryset)(queryset)
+
+    async def alist(self, request, *args, **kwargs):
+        """``ListModelMixin.list`` reading the objects with ``aiterator``."""
+        queryset = self.filter_queryset(self.get_queryset())
+        page = await self.apaginate_queryset(queryset)
+        if page is not None:
+            serializer = self.get_serializer(page, many=True)
+            return self.get_paginated_response(serializer.data)
+
+        objs = [obj async for obj in queryset.aiterator()]
+        return Response(self.get_serializer(objs, many=True).data)
+
+    async def aretrieve(self, request, *args, **kwargs):
+        """``RetrieveModelMixin.retrieve`` reading the object with ``aget``."""
+        instance = await self.aget_object()
+
+        return Response(self.get_serializer(instance).data)
+
+    async def acreate(self, request, *args, **kwargs):
+        """``CreateModelMixin.create`` validating in the event loop.
+
+        ``perform_create`` and serializing the new object run together in a
+        worker thread, so the save stays in one transaction.
+        """
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        data = await sync_to_async(self._create)(serializer)
+        headers = self.get_success_headers(data)
+
+        return Response(data, status=status.HTTP_201_CREATED, headers=headers)
+
+    def _create(self, serializer):
+        self.perform_create(serializer)
+
+        return serializer.data
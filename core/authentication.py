@@ -0,0 +1,278 @@
+"""
+Token authentication with cached token lookups.
+"""
+import copy
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import caches
+from django.db import DEFAULT_DB_ALIAS
+from django.utils.translation import gettext_lazy as _
+
+from rest_framework import exceptions
+from rest_framework.authentication import (
+    TokenAuthentication,
+    get_authorization_header,
+)
+from rest_framework.authtoken.models import Token
+
+from core import tokens
+from core.asyncviews import call_cache
+
+KEY_PREFIX = "auth-token"
+
+
+class TokenCache:
+    """Bounded LRU of authenticated tokens, each kept for a TTL.
+
+    Entries live in this process and, with ``AUTH_TOKEN_CACHE_ALIAS`` set,
+    in that shared cache too. Invalidating drops both, but the entries of
+    other processes only expire, so ``AUTH_TOKEN_CACHE_TTL`` bounds how long
+    they may still accept a token deleted or a user deactivated elsewhere.
+    """
+
+    def __init__(self):
+        self._entries = OrderedDict()
+        self._user_keys = {}
+        self._lock = threading.Lock()
+
+    def _shared(self):
+        alias = settings.AUTH_TOKEN_CACHE_ALIAS
+        return caches[alias] if alias else None
+
+    def _shared_key(self, key):
+        return f"{KEY_PREFIX}:{hashlib.sha256(key.encode()).hexdigest()}"
+
+    def _get_local(self, key):
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                if entry[1] > now:
+                    self._entries.move_to_end(key)
+                    return entry[0]
+                self._pop(key)
+
+        return None
+
+    def get(self, key):
+        """Return the cached token for ``key``, or ``None``."""
+        token = self._get_local(key)
+        shared = self._shared()
+        if token is None and shared:
+            token = shared.get(self._shared_key(key))
+            if token is not None:
+                self._store(key, token)
+
+        return token
+
+    async def aget(self, key):
+        """``get`` for async views."""
+        token = self._get_local(key)
+        shared = self._shared()
+        if token is None and shared:
+            token = await call_cache(shared, "get", self._shared_key(key))
+            if token is not None:
+                self._store(key, token)
+
+        return token
+
+    def set(self, key, token):
+        """Cache the authenticated ``token``, with its user."""
+        self._store(key, token)
+        shared = self._shared()
+        if shared:
+            shared.set(
+                self._shared_key(key), token, settings.AUTH_TOKEN_CACHE_TTL,
+            )
+
+    async def aset(self, key, token):
+        """``set`` for async views."""
+        self._store(key, token)
+        shared = self._shared()
+        if shared:
+            await call_cache(
+                shared,
+                "set",
+                self._shared_key(key),
+                token,
+                settings.AUTH_TOKEN_CACHE_TTL,
+            )
+
+    def _store(self, key, token):
+        expires = time.monotonic() + settings.AUTH_TOKEN_CACHE_TTL
+        with self._lock:
+            self._pop(key)
+            self._entries[key] = (token, expires)
+            self._user_keys.setdefault(token.user_id, set()).add(key)
+            while len(self._entries) > settings.AUTH_TOKEN_CACHE_SIZE:
+                self._pop(next(iter(self._entries)))
+
+    def _pop(self, key):
+        entry = self._entries.pop(key, None)
+        if entry is not None:
+            user_id = entry[0].user_id
+            keys = self._user_keys.get(user_id, set())
+            keys.discard(key)
+            if not keys:
+                self._user_keys.pop(user_id, None)
+
+    def invalidate(self, *keys):
+        """Forget the tokens ``keys``."""
+        with self._lock:
+            for key in keys:
+                self._pop(key)
+        shared = self._shared()
+        if shared and keys:
+            shared.delete_many([self._shared_key(key) for key in keys])
+
+    def invalidate_user(self, user_id):
+        """Forget the tokens of a user."""
+        with self._lock:
+            keys = set(self._user_keys.get(user_id, ()))
+        if self._shared():
+            keys.update(
+                Token.objects.filter(user_id=user_id)
+                .values_list("key", flat=True)
+            )
+        self.invalidate(*keys)
+
+    def clear(self):
+        """Forget every token in this process."""
+        with self._lock:
+            self._entries.clear()
+            self._user_keys.clear()
+
+
+token_cache = TokenCache()
+
+
+class AsyncTokenAuthentication(TokenAuthentication):
+    """``TokenAuthentication`` with ``aauthenticate`` for async views.
+
+    The header is parsed as ``authenticate`` does and the key checked by
+    ``aauthenticate_credentials``.
+    """
+
+    def get_key(self, request):
+        """Return the key of the ``Authorization`` header, or ``None``."""
+        auth = get_authorization_header(request).split()
+        if not auth or auth[0].lower() != self.keyword.lower().encode():
+            return None
+        if len(auth) == 1:
+            raise exceptions.AuthenticationFailed(
+                _("Invalid token header. No credentials provided.")
+            )
+        if len(auth) > 2:
+            raise exceptions.AuthenticationFailed(
+                _("Invalid token header. Token string should not contain "
+                  "spaces.")
+            )
+        try:
+            return auth[1].decode()
+        except UnicodeError:
+            raise exceptions.AuthenticationFailed(
+                _("Invalid token header. Token string should not contain "
+                  "invalid characters.")
+            )
+
+    async def aauthenticate(self, request):
+        key = self.get_key(request)
+        if key is None:
+            return None
+
+        return await self.aauthenticate_credentials(key)
+
+    async def aauthenticate_credentials(self, key):
+        return await sync_to_async(self.authenticate_credentials)(key)
+
+
+class CachedTokenAuthentication(AsyncTokenAuthentication):
+    """``TokenAuthentication`` skipping the token and user query when cached.
+
+    Every request gets its own copy of the cached token and user, so views
+    changing ``request.user`` can't affect other requests. Users are loaded
+    with ``user_fields`` only, so no password hash is cached; the copies
+    may be stale, so views writing the user load it again.
+    """
+    user_fields = ("id", "email", "name", "is_active", "is_staff",
+                   "is_superuser")
+
+    def _tokens(self):
+        return self.get_model().objects.select_related("user").only(
+            "key", "created", "user",
+            *(f"user__{field}" for field in self.user_fields),
+        )
+
+    def _checked(self, token):
+        if not token.user.is_active:
+            raise exceptions.AuthenticationFailed(
+                _("User inactive or deleted.")
+            )
+
+        return token
+
+    def _copies(self, token):
+        token = copy.copy(token)
+        token.user = copy.copy(token.user)
+
+        return token.user, token
+
+    def authenticate_credentials(self, key):
+        token = token_cache.get(key)
+        if token is None:
+            model = self.get_model()
+            try:
+                token = self._tokens().get(key=key)
+            except model.DoesNotExist:
+                raise exceptions.AuthenticationFailed(_("Invalid token."))
+            token_cache.set(key, self._checked(token))
+
+        return self._copies(token)
+
+    async def aauthenticate_credentials(self, key):
+        token = await token_cache.aget(key)
+        if token is None:
+            model = self.get_model()
+            try:
+                token = await self._tokens().aget(key=key)
+            except model.DoesNotExist:
+                raise exceptions.AuthenticationFailed(_("Invalid token."))
+            await token_cache.aset(key, self._checked(token))
+
+        return self._copies(token)
+
+
+class SignedTokenAuthentication(AsyncTokenAuthentication):
+    """Authenticate ``Bearer`` access tokens without the database.
+
+    ``request.user`` is built from the user id and permission flags the
+    token carries, so changes to them apply once the token expires; other
+    fields load on first access. ``request.auth`` is the access token.
+    """
+    keyword = "Bearer"
+
+    def authenticate_credentials(self, key):
+        claims = tokens.verify_access_token(key)
+        if not claims["is_active"]:
+            raise exceptions.AuthenticationFailed(
+                _("User inactive or deleted.")
+            )
+
+        model = get_user_model()
+        names = [
+            field.attname for field in model._meta.concrete_fields
+            if field.attname in claims
+        ]
+        user = model.from_db(
+            DEFAULT_DB_ALIAS, names, [claims[name] for name in names],
+        )
+        return user, key
+
+    async def aauthenticate_credentials(self, key):
+        return self.authenticate_credentials(key)
@@ -0,0 +1,102 @@
+"""
+Authentication backend hashing passwords in a bounded worker pool.
+"""
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.contrib.auth.backends import ModelBackend
+from django.contrib.auth.hashers import (
+    check_password,
+    make_password,
+)
+from django.utils.translation import gettext_lazy as _
+
+from rest_framework import status
+from rest_framework.exceptions import APIException
+
+_executor = None
+_lock = threading.Lock()
+_pending = 0
+
+
+class LoginBusy(APIException):
+    """More logins waiting for the hashing pool than it may queue."""
+    status_code = status.HTTP_503_SERVICE_UNAVAILABLE
+    default_detail = _("Too many logins in progress, try again shortly.")
+    default_code = "login_busy"
+    wait = 1
+
+
+def get_executor():
+    """Return the pool passwords are hashed in."""
+    global _executor
+    if _executor is None:
+        _executor = ThreadPoolExecutor(
+            settings.PASSWORD_HASH_WORKERS, thread_name_prefix="hash",
+        )
+
+    return _executor
+
+
+def run_hasher(fn, *args):
+    """Run ``fn`` in the hashing pool and return its result.
+
+    Hashing releases the GIL, so at most ``PASSWORD_HASH_WORKERS`` CPUs
+    are spent on it however many logins arrive. Past
+    ``PASSWORD_HASH_MAX_PENDING`` waiting logins, ``LoginBusy`` is raised
+    straight away. With no workers ``fn`` runs in the calling thread.
+    """
+    global _pending
+    if not settings.PASSWORD_HASH_WORKERS:
+        return fn(*args)
+    with _lock:
+        if _pending >= settings.PASSWORD_HASH_MAX_PENDING:
+            raise LoginBusy()
+        _pending += 1
+    try:
+        return get_executor().submit(fn, *args).result()
+    finally:
+        with _lock:
+            _pending -= 1
+
+
+def _check(password, encoded):
+    """Check a password; return whether it matched and any upgraded hash."""
+    upgraded = []
+    valid = check_password(
+        password, encoded, lambda raw: upgraded.append(make_password(raw)),
+    )
+
+    return valid, upgraded[0] if upgraded else None
+
+
+class PooledModelBackend(ModelBackend):
+    """``ModelBackend`` hashing in the pool of ``run_hasher``.
+
+    The user is read and saved in the request thread. A hash made with an
+    older hasher or cost is replaced on a successful login.
+    """
+
+    def authenticate(self, request, username=None, password=None, **kwargs):
+        UserModel = get_user_model()
+        if username is None:
+            username = kwargs.get(UserModel.USERNAME_FIELD)
+        if username is None or password is None:
+            return None
+        try:
+            user = UserModel._default_manager.get_by_natural_key(username)
+        except UserModel.DoesNotExist:
+            # Hash anyway, so missing users take as long as wrong passwords.
+            run_hasher(make_password, password)
+            return None
+
+        valid, upgraded = run_hasher(_check, password, user.password)
+        if upgraded:
+            user.password = upgraded
+            user.save(update_fields=["password"])
+        if valid and self.user_can_authenticate(user):
+            return user
+
+        return None
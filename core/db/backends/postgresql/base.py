@@ -0,0 +1,20 @@
+"""
+Django's PostgreSQL backend with pooled connections.
+"""
+from django.db.backends.postgresql import (
+    base,
+    creation,
+)
+
+from core.db.pool import PooledDatabaseWrapperMixin
+
+
+class DatabaseCreation(creation.DatabaseCreation):
+    def _destroy_test_db(self, test_database_name, verbosity):
+        # Postgres won't drop a database pooled connections are open to.
+        self.connection.close_pool()
+        super()._destroy_test_db(test_database_name, verbosity)
+
+
+class DatabaseWrapper(PooledDatabaseWrapperMixin, base.DatabaseWrapper):
+    creation_class = DatabaseCreation
@@ -0,0 +1,52 @@
+"""
+Django's SQLite backend with pooled connections.
+
+It also takes two options Django 5.1 added: ``OPTIONS["init_command"]``,
+SQL run on every new connection, such as PRAGMAs, and
+``OPTIONS["transaction_mode"]``, how ``atomic`` begins transactions.
+"""
+from django.core.exceptions import ImproperlyConfigured
+from django.db.backends.sqlite3 import base
+
+from core.db.pool import PooledDatabaseWrapperMixin
+
+TRANSACTION_MODES = ("DEFERRED", "IMMEDIATE", "EXCLUSIVE")
+
+
+class _DatabaseWrapper(base.DatabaseWrapper):
+
+    @property
+    def transaction_mode(self):
+        mode = self.settings_dict["OPTIONS"].get("transaction_mode")
+        if mode is not None and mode.upper() not in TRANSACTION_MODES:
+            raise ImproperlyConfigured(
+                f"settings.DATABASES[{self.alias!r}]['OPTIONS']"
+                f"['transaction_mode'] must be one of "
+                f"{', '.join(TRANSACTION_MODES)}, not {mode!r}."
+            )
+        return mode
+
+    def get_connection_params(self):
+        conn_params = super().get_connection_params()
+        conn_params.pop("init_command", None)
+        conn_params.pop("transaction_mode", None)
+        return conn_params
+
+    def get_new_connection(self, conn_params):
+        conn = super().get_new_connection(conn_params)
+        init_command = self.settings_dict["OPTIONS"].get("init_command", "")
+        for statement in init_command.split(";"):
+            if statement.strip():
+                conn.execute(statement)
+        return conn
+
+    def _start_transaction_under_autocommit(self):
+        # IMMEDIATE takes the write lock up front, waiting for other writers
+        # within the busy timeout, instead of failing with "database is
+        # locked" when a transaction that has read tries to write.
+        mode = self.transaction_mode
+        self.cursor().execute(f"BEGIN {mode}" if mode else "BEGIN")
+
+
+class DatabaseWrapper(PooledDatabaseWrapperMixin, _DatabaseWrapper):
+    pass
@@ -0,0 +1,183 @@
+"""
+An in-process pool of database connections for Django's backends.
+
+Django 4.2 opens a connection for each request, or keeps one open per
+thread with ``CONN_MAX_AGE``, which doesn't suit ASGI's short-lived worker
+threads. A pool keeps a few connections open for the whole process
+instead: closing a connection at the end of a request hands it back, and
+the next request on any thread takes it. It's enabled with
+``OPTIONS["pool"]``, the option Django 5.1 added for psycopg 3's pool::
+
+    "OPTIONS": {"pool": {"max_size": 10, "timeout": 30}}
+"""
+import threading
+import time
+from contextlib import suppress
+from functools import partial
+
+from django.core.exceptions import ImproperlyConfigured
+from django.db.utils import OperationalError
+
+
+class ConnectionPool:
+    """A bounded pool of DB-API connections shared by a process's threads.
+
+    At most ``max_size`` connections are open at once. ``acquire`` waits
+    up to ``timeout`` seconds for one to be released when they all are in
+    use.
+    """
+
+    def __init__(self, max_size=10, timeout=30):
+        self.max_size = max_size
+        self.timeout = timeout
+        self._idle = []
+        self._size = 0
+        self._available = threading.Condition()
+
+    def acquire(self, connect, check=None):
+        """Return an idle connection, or one opened with ``connect()``.
+
+        Idle connections for which ``check(connection)`` is false are closed
+        and the next one is taken instead.
+        """
+        deadline = time.monotonic() + self.timeout
+        while True:
+            with self._available:
+                while not self._idle and self._size >= self.max_size:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0 or not self._available.wait(remaining):
+                        raise OperationalError(
+                            f"No database connection was released within "
+                            f"{self.timeout} seconds; all {self.max_size} of "
+                            f"the pool's connections are in use."
+                        )
+                if not self._idle:
+                    self._size += 1
+                    break
+                connection = self._idle.pop()
+
+            if check is None or check(connection):
+                return connection
+            with suppress(Exception):
+                self.release(connection, discard=True)
+
+        try:
+            return connect()
+        except BaseException:
+            self._discarded()
+            raise
+
+    def release(self, connection, discard=False):
+        """Return ``connection`` to the pool, or close it if ``discard``."""
+        if discard:
+            try:
+                connection.close()
+            finally:
+                self._discarded()
+            return
+
+        with self._available:
+            self._idle.append(connection)
+            self._available.notify()
+
+    def close(self):
+        """Close the idle connections."""
+        with self._available:
+            idle, self._idle = self._idle, []
+            self._size -= len(idle)
+            self._available.notify(len(idle))
+        for connection in idle:
+            connection.close()
+
+    def _discarded(self):
+        with self._available:
+            self._size -= 1
+            self._available.notify()
+
+
+_pools = {}
+_pools_lock = threading.Lock()
+
+
+def get_pool(alias, conn_params, options):
+    """Return the pool of connections made with ``conn_params``."""
+    key = (alias, repr(conn_params))
+    with _pools_lock:
+        if key not in _pools:
+            _pools[key] = ConnectionPool(**options)
+        return _pools[key]
+
+
+def close_pools(alias):
+    """Close the idle connections of every pool of the database ``alias``."""
+    with _pools_lock:
+        pools = [pool for key, pool in _pools.items() if key[0] == alias]
+    for pool in pools:
+        pool.close()
+
+
+class PooledDatabaseWrapperMixin:
+    """Take connections from a ``ConnectionPool`` and give them back.
+
+    Connections closed inside a transaction, or that errored and no longer
+    work, are closed instead of returned. With ``CONN_HEALTH_CHECKS``, idle
+    connections are checked before they are handed out, and dropped if
+    they no longer work.
+    """
+    _pool = None
+
+    @property
+    def pool_options(self):
+        options = self.settings_dict["OPTIONS"].get("pool")
+        if options and self.settings_dict["CONN_MAX_AGE"] != 0:
+            raise ImproperlyConfigured(
+                "Pooled connections can't be persistent. Set CONN_MAX_AGE "
+                "to 0 for databases with OPTIONS['pool']."
+            )
+        return options
+
+    def get_connection_params(self):
+        conn_params = super().get_connection_params()
+        conn_params.pop("pool", None)
+        return conn_params
+
+    def get_new_connection(self, conn_params):
+        options = self.pool_options
+        if not options:
+            return super().get_new_connection(conn_params)
+
+        pool = get_pool(self.alias, conn_params, options)
+        connection = pool.acquire(
+            partial(super().get_new_connection, conn_params),
+            check=(
+                self._is_usable_connection
+                if self.settings_dict["CONN_HEALTH_CHECKS"] else None
+            ),
+        )
+        self._pool = pool
+        return connection
+
+    def _is_usable_connection(self, connection):
+        """Return ``is_usable()`` for a pooled ``connection``."""
+        self.connection = connection
+        try:
+            return self.is_usable()
+        finally:
+            self.connection = None
+
+    def _close(self):
+        pool, self._pool = self._pool, None
+        if pool is None:
+            return super()._close()
+
+        discard = (
+            self.in_atomic_block
+            or not self.get_autocommit()
+            or (self.errors_occurred and not self.is_usable())
+        )
+        with self.wrap_database_errors:
+            pool.release(self.connection, discard=discard)
+
+    def close_pool(self):
+        """Close the idle connections pooled for this database."""
+        close_pools(self.alias)
@@ -0,0 +1,43 @@
+"""
+Password hashers with their cost taken from settings.
+
+Raising a cost setting makes the stored hashes out of date; each is
+rehashed with the new cost the next time its user logs in.
+"""
+from django.conf import settings
+from django.contrib.auth import hashers
+
+
+class ScryptPasswordHasher(hashers.ScryptPasswordHasher):
+    """scrypt with ``PASSWORD_SCRYPT_*`` parameters."""
+    # scrypt needs 128 * n * r * p bytes; OpenSSL caps it at 32 MiB unless
+    # told otherwise, which a work factor over 2**14 would exceed.
+    maxmem = 256 * 2**20
+
+    @property
+    def work_factor(self):
+        return settings.PASSWORD_SCRYPT_WORK_FACTOR
+
+    @property
+    def block_size(self):
+        return settings.PASSWORD_SCRYPT_BLOCK_SIZE
+
+    @property
+    def parallelism(self):
+        return settings.PASSWORD_SCRYPT_PARALLELISM
+
+
+class Argon2PasswordHasher(hashers.Argon2PasswordHasher):
+    """Argon2id with ``PASSWORD_ARGON2_*`` parameters."""
+
+    @property
+    def time_cost(self):
+        return settings.PASSWORD_ARGON2_TIME_COST
+
+    @property
+    def memory_cost(self):
+        return settings.PASSWORD_ARGON2_MEMORY_COST
+
+    @property
+    def parallelism(self):
+        return settings.PASSWORD_ARGON2_PARALLELISM
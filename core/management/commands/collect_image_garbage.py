@@ -0,0 +1,68 @@
+"""
+Django command to delete recipe images no recipe uses.
+"""
+import os
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from core import storage
+from core.models import Recipe
+
+
+class Command(BaseCommand):
+    """Django command to delete unreferenced recipe images."""
+    help = (
+        "Delete stored recipe images and renditions that no recipe uses "
+        "and that weren't written or reused within the grace period."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--grace",
+            type=int,
+            default=settings.RECIPE_IMAGE_GRACE_SECONDS,
+            help="Seconds to keep unreferenced files after their last use.",
+        )
+        parser.add_argument(
+            "--dry-run",
+            action="store_true",
+            help="Report the files to delete without deleting them.",
+        )
+
+    def handle(self, *args, **options):
+        """Entrypoint for command."""
+        image_storage = storage.image_storage
+        names, stems = set(), set()
+        recipes = (
+            Recipe.objects.exclude(image="").exclude(image=None)
+            .values_list("image", "renditions")
+        )
+        for name, renditions in recipes.iterator():
+            names.add(name)
+            names.update(renditions.values())
+            stems.add(os.path.splitext(name)[0])
+
+        deleted = size = 0
+        root = image_storage.path(storage.IMAGE_DIR)
+        for directory, subdirectories, files in os.walk(root):
+            for filename in files:
+                path = os.path.join(directory, filename)
+                name = os.path.relpath(path, image_storage.location)
+                name = name.replace(os.sep, "/")
+                # Renditions of a used image may not be recorded yet.
+                if name in names or name.rsplit("-", 1)[0] in stems:
+                    continue
+                if image_storage.modified_within(name, options["grace"]):
+                    continue
+                deleted += 1
+                size += os.path.getsize(path)
+                if options["dry_run"]:
+                    self.stdout.write(name)
+                else:
+                    image_storage.delete(name)
+
+        self.stdout.write(self.style.SUCCESS(
+            f"{deleted} unused files ({size} bytes) "
+            f"{'to delete' if options['dry_run'] else 'deleted'}."
+        ))
@@ -0,0 +1,88 @@
+"""
+Django command to move recipe images into content-addressed storage.
+"""
+import os
+import shutil
+
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from core import storage
+from core.models import Recipe
+from recipe import cache
+
+
+class Command(BaseCommand):
+    """Django command to store existing recipe images by content."""
+    help = (
+        "Copy recipe images stored under their upload names to their "
+        "content-addressed names. The old files are left for "
+        "collect_image_garbage."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--dry-run",
+            action="store_true",
+            help="Report the images to migrate without copying them.",
+        )
+
+    def handle(self, *args, **options):
+        """Entrypoint for command."""
+        recipes = (
+            Recipe.objects.exclude(image="").exclude(image=None)
+            .values_list("id", "user_id", "image", "renditions")
+        )
+        migrated, users = 0, set()
+        for recipe_id, user_id, name, renditions in recipes.iterator():
+            if storage.CONTENT_NAME.search(name):
+                continue
+            if not storage.image_storage.exists(name):
+                self.stderr.write(f"Recipe {recipe_id}: {name} is missing.")
+                continue
+            migrated += 1
+            if options["dry_run"]:
+                self.stdout.write(f"Recipe {recipe_id}: {name}")
+                continue
+
+            new_name, new_renditions = self._store(name, renditions)
+            updated = Recipe.objects.filter(id=recipe_id, image=name).update(
+                image=new_name,
+                renditions=new_renditions,
+                updated_at=timezone.now(),
+            )
+            if updated:
+                users.add(user_id)
+
+        for user_id in users:
+            cache.record_write(user_id)
+
+        self.stdout.write(self.style.SUCCESS(
+            f"{migrated} recipe images migrated."
+        ))
+
+    def _store(self, name, renditions):
+        """Store an image by content and carry its renditions over."""
+        image_storage = storage.image_storage
+        with image_storage.open(name) as content:
+            new_name = image_storage.save(name, content)
+
+        old_base, new_base = (
+            os.path.splitext(path)[0] for path in (name, new_name)
+        )
+        new_renditions = {}
+        for rendition, path in renditions.items():
+            if not path.startswith(old_base):
+                continue
+            new_path = new_base + path[len(old_base):]
+            if not image_storage.exists(new_path):
+                try:
+                    shutil.copyfile(
+                        image_storage.path(path),
+                        image_storage.path(new_path),
+                    )
+                except FileNotFoundError:
+                    continue
+            new_renditions[rendition] = new_path
+
+        return new_name, new_renditions
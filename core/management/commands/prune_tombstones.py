@@ -0,0 +1,22 @@
+"""
+Django command to delete the delta sync tombstones past retention.
+"""
+from django.core.management.base import BaseCommand
+
+from recipe import sync
+
+
+class Command(BaseCommand):
+    """Django command to prune old tombstones."""
+    help = (
+        "Delete the records of deletions older than "
+        "SYNC_TOMBSTONE_RETENTION_DAYS. Older sync tokens are refused."
+    )
+
+    def handle(self, *args, **options):
+        """Entrypoint for command."""
+        deleted = sync.prune_tombstones()
+
+        self.stdout.write(self.style.SUCCESS(
+            f"{deleted} tombstones deleted."
+        ))
@@ -0,0 +1,31 @@
+"""
+Django command to rebuild the recipe statistics.
+"""
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from core import stats
+
+
+class Command(BaseCommand):
+    """Django command to recount every user's recipe stats."""
+    help = (
+        "Recount the per-user recipe stats and the tag and ingredient "
+        "usage counts."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=stats.BATCH_SIZE,
+            help="Number of users to recount per batch.",
+        )
+
+    def handle(self, *args, **options):
+        """Entrypoint for command."""
+        self.stdout.write("Rebuilding recipe stats...")
+        with transaction.atomic():
+            stats.rebuild(batch_size=options["batch_size"])
+
+        self.stdout.write(self.style.SUCCESS("Recipe stats rebuilt!"))
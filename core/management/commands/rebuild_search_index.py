@@ -0,0 +1,28 @@
+"""
+Django command to rebuild the recipe search index.
+"""
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from core import search
+
+
+class Command(BaseCommand):
+    """Django command to reindex every recipe."""
+    help = "Rebuild the full-text search index for all recipes."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=search.BATCH_SIZE,
+            help="Number of recipes to index per batch.",
+        )
+
+    def handle(self, *args, **options):
+        """Entrypoint for command."""
+        self.stdout.write("Rebuilding search index...")
+        with transaction.atomic():
+            search.get_backend().rebuild(batch_size=options["batch_size"])
+
+        self.stdout.write(self.style.SUCCESS("Search index rebuilt!"))
@@ -1,28 +1,65 @@
 """
-# Django command to wait for the database to be available.
-# """
-# import time
+Django command to wait for the database to be available.
+"""
+import time
+
+from django.core.management.base import (
+    BaseCommand,
+    CommandError,
+)
+from django.db.utils import OperationalError
 
-# from psycopg2 import OperationalError as Psycopg2OpError
+try:
+    from psycopg2 import OperationalError as Psycopg2OpError
+except ImportError:
+    Psycopg2OpError = OperationalError
 
-# from django.db import connections
-# from django.db.utils import OperationalError
-# from django.core.management.base import BaseCommand
 
+class Command(BaseCommand):
+    """Django command to wait for database."""
+    help = (
+        "Wait for the database to accept connections, retrying with "
+        "exponential backoff."
+    )
 
-# class Command(BaseCommand):
-#     """Django command to wait for database."""
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--database",
+            default="default",
+            help="Alias of the database to wait for.",
+        )
+        parser.add_argument(
+            "--timeout",
+            type=float,
+            default=60,
+            help="Seconds to wait in total before giving up.",
+        )
+        parser.add_argument(
+            "--max-delay",
+            type=float,
+            default=5,
+            help="Longest wait between two attempts, in seconds.",
+        )
 
-#     def handle(self, *args, **options):
-#         pass
-#         """Entrypoint for command."""
-#         self.stdout.write('Waiting for database...')
-#         db_conn = None
-#         while not db_conn:
-#             try:
-#                 db_conn = connections['default']
-#             except (OperationalError, Psycopg2OpError):
-#                 self.stdout.write('Database unavailable, waiting 1 second...')
-#                 time.sleep(1)
+    def handle(self, *args, **options):
+        """Entrypoint for command."""
+        self.stdout.write("Waiting for database...")
+        delay, waited = 0.1, 0
+        while True:
+            try:
+                self.check(databases=[options["database"]])
+                break
+            except (Psycopg2OpError, OperationalError):
+                if waited >= options["timeout"]:
+                    raise CommandError(
+                        f"Database unavailable after {waited:g} seconds."
+                    )
+                delay = min(delay, options["max_delay"])
+                self.stdout.write(
+                    f"Database unavailable, waiting {delay:g} seconds..."
+                )
+                time.sleep(delay)
+                waited += delay
+                delay *= 2
 
-#         self.stdout.write(self.style.SUCCESS('Database available!'))
\ No newline at end of file
+        self.stdout.write(self.style.SUCCESS("Database available!"))
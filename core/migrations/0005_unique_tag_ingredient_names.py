@@ -0,0 +1,52 @@
+# Generated by Django 4.2.2 on 2026-10-18 02:02
+
+from django.db import migrations, models
+
+
+def merge_duplicates(apps, schema_editor):
+    """Fold duplicate tag/ingredient names into the oldest row per user."""
+    Recipe = apps.get_model('core', 'Recipe')
+    for model_name, relation in (('Tag', 'tags'), ('Ingredient', 'ingredients')):
+        model = apps.get_model('core', model_name)
+        through = Recipe._meta.get_field(relation).remote_field.through
+        column = f'{model_name.lower()}_id'
+        keep = {}
+        duplicates = {}
+        for obj_id, user_id, name in model.objects.order_by('id').values_list(
+            'id', 'user_id', 'name'
+        ):
+            kept = keep.setdefault((user_id, name), obj_id)
+            if kept != obj_id:
+                duplicates[obj_id] = kept
+
+        if not duplicates:
+            continue
+
+        links = set(through.objects.values_list('recipe_id', column))
+        for duplicate, kept in duplicates.items():
+            for recipe_id in through.objects.filter(
+                **{column: duplicate}
+            ).values_list('recipe_id', flat=True):
+                if (recipe_id, kept) not in links:
+                    through.objects.create(recipe_id=recipe_id, **{column: kept})
+                    links.add((recipe_id, kept))
+        model.objects.filter(id__in=duplicates).delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0004_recipe_image'),
+    ]
+
+    operations = [
+        migrations.RunPython(merge_duplicates, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name='ingredient',
+            constraint=models.UniqueConstraint(fields=('user', 'name'), name='unique_ingredient_name_per_user'),
+        ),
+        migrations.AddConstraint(
+            model_name='tag',
+            constraint=models.UniqueConstraint(fields=('user', 'name'), name='unique_tag_name_per_user'),
+        ),
+    ]
@@ -0,0 +1,39 @@
+from django.db import migrations
+
+TABLE = 'core_recipe_search'
+
+CREATE = {
+    'sqlite': [
+        f"CREATE VIRTUAL TABLE {TABLE} USING fts5("
+        "title, description, tags, ingredients, "
+        "tokenize='unicode61 remove_diacritics 2')",
+    ],
+    'postgresql': [
+        f"CREATE TABLE {TABLE} ("
+        "recipe_id integer PRIMARY KEY "
+        "REFERENCES core_recipe (id) ON DELETE CASCADE DEFERRABLE INITIALLY DEFERRED, "
+        "document tsvector NOT NULL)",
+        f"CREATE INDEX {TABLE}_document_idx ON {TABLE} USING GIN (document)",
+    ],
+}
+
+
+def create_index(apps, schema_editor):
+    for statement in CREATE.get(schema_editor.connection.vendor, []):
+        schema_editor.execute(statement)
+
+
+def drop_index(apps, schema_editor):
+    if schema_editor.connection.vendor in CREATE:
+        schema_editor.execute(f'DROP TABLE {TABLE}')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0007_recipe_link_target_indexes'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_index, drop_index),
+    ]
@@ -0,0 +1,85 @@
+# Generated by Django 4.2.2 on 2026-10-18 04:33
+
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import Count, OuterRef, Subquery, Sum
+from django.db.models.functions import Coalesce
+import django.db.models.deletion
+
+
+def per_user(queryset, aggregate):
+    return Coalesce(Subquery(queryset.filter(
+        user_id=OuterRef('pk'),
+    ).order_by().values('user_id').annotate(
+        value=aggregate,
+    ).values('value')), 0)
+
+
+def count_stats(apps, schema_editor):
+    """Count the usage of existing tags and ingredients and user stats."""
+    Recipe = apps.get_model('core', 'Recipe')
+    for model_name, relation in (('Tag', 'tags'), ('Ingredient', 'ingredients')):
+        through = Recipe._meta.get_field(relation).remote_field.through
+        column = f'{model_name.lower()}_id'
+        apps.get_model('core', model_name).objects.update(
+            recipe_count=Coalesce(Subquery(through.objects.filter(
+                **{column: OuterRef('pk')}
+            ).order_by().values(column).annotate(
+                value=Count('id'),
+            ).values('value')), 0),
+        )
+
+    User = apps.get_model(settings.AUTH_USER_MODEL)
+    RecipeStats = apps.get_model('core', 'RecipeStats')
+    users = User.objects.annotate(
+        n_recipes=per_user(Recipe.objects.all(), Count('id')),
+        n_tags=per_user(apps.get_model('core', 'Tag').objects.all(), Count('id')),
+        n_ingredients=per_user(
+            apps.get_model('core', 'Ingredient').objects.all(), Count('id'),
+        ),
+        time_minutes=per_user(Recipe.objects.all(), Sum('time_minutes')),
+    ).values_list('pk', 'n_recipes', 'n_tags', 'n_ingredients', 'time_minutes')
+    RecipeStats.objects.bulk_create(
+        [
+            RecipeStats(
+                user_id=pk,
+                recipe_count=recipes,
+                tag_count=tags,
+                ingredient_count=ingredients,
+                total_time_minutes=time_minutes,
+            )
+            for pk, recipes, tags, ingredients, time_minutes in users
+        ],
+        batch_size=1000,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0013_refresh_token'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='RecipeStats',
+            fields=[
+                ('user', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='recipe_stats', serialize=False, to=settings.AUTH_USER_MODEL)),
+                ('recipe_count', models.IntegerField(default=0)),
+                ('tag_count', models.IntegerField(default=0)),
+                ('ingredient_count', models.IntegerField(default=0)),
+                ('total_time_minutes', models.BigIntegerField(default=0)),
+            ],
+        ),
+        migrations.AddField(
+            model_name='ingredient',
+            name='recipe_count',
+            field=models.IntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='tag',
+            name='recipe_count',
+            field=models.IntegerField(default=0),
+        ),
+        migrations.RunPython(count_stats, migrations.RunPython.noop),
+    ]
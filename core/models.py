@@ -2,6 +2,8 @@ import uuid
 import os
 
 from django.db import models
+from django.db.models import F
+from django.utils import timezone
 from django.contrib.auth.models import (
     AbstractBaseUser,
     BaseUserManager,
@@ -9,6 +11,8 @@ from django.contrib.auth.models import (
 )
 from django.conf import settings
 
+from core.storage import get_image_storage
+
 def recipe_image_file_path(instance, filename):
     """Generate file path for new recipe image."""
     ext = os.path.splitext(filename)[1]
@@ -16,6 +20,33 @@ def recipe_image_file_path(instance, filename):
 
     return os.path.join(f'uploads/recipe/{filename}')
 
+class KeptFieldsMixin:
+    """Leave ``kept_fields`` to their ``F()`` updates when saving a loaded row.
+
+    A full save would write back the values as loaded, undoing the updates
+    made since. Deferred fields are left out too, as Django does.
+    """
+    kept_fields = ()
+
+    def save(self, *args, **kwargs):
+        if (
+            not self._state.adding
+            and kwargs.get("update_fields") is None
+            and kwargs.get("using") in (None, self._state.db)
+        ):
+            deferred = self.get_deferred_fields()
+            kwargs["update_fields"] = [
+                field.name for field in self._meta.concrete_fields
+                if not field.primary_key
+                and field.attname not in deferred
+                and field.name not in self.kept_fields
+            ]
+        super().save(*args, **kwargs)
+
+class RecipeCountMixin(KeptFieldsMixin):
+    """Leave ``recipe_count`` to ``core.stats`` when saving a loaded row."""
+    kept_fields = ("recipe_count",)
+
 class UserManager(BaseUserManager):
     """Manager for users."""
     def create_user(self, email, password=None, **extra_field):
@@ -37,12 +68,26 @@ class UserManager(BaseUserManager):
         user.save(using=self._db)
         return user
 
-class User(AbstractBaseUser, PermissionsMixin):
+    def touch_data(self, user_id):
+        """Bump the data version of a user after a write to their data."""
+        return self.filter(pk=user_id).update(
+            data_version=F("data_version") + 1,
+            data_updated_at=timezone.now(),
+        )
+
+class User(KeptFieldsMixin, AbstractBaseUser, PermissionsMixin):
     id = models.AutoField(primary_key=True)
     email = models.EmailField(max_length=254, unique=True)
     name = models.CharField(max_length=254)
     is_active = models.BooleanField(default=True)
     is_staff = models.BooleanField(default=False)
+    # Watermark of the user's recipes, tags and ingredients, bumped by
+    # ``UserManager.touch_data`` on every write through the API.
+    data_version = models.PositiveBigIntegerField(default=0)
+    data_updated_at = models.DateTimeField(default=timezone.now)
+
+    # Saving a loaded user must not move the watermark back.
+    kept_fields = ("data_version", "data_updated_at")
 
     objects = UserManager()
 
@@ -62,12 +107,43 @@ class Recipe(models.Model):
     link = models.CharField(max_length=255, blank=True)
     tags = models.ManyToManyField('Tag')
     ingredients = models.ManyToManyField("Ingredient")
-    image = models.ImageField(null=True, upload_to=recipe_image_file_path)
+    image = models.ImageField(
+        null=True,
+        upload_to=recipe_image_file_path,
+        storage=get_image_storage,
+    )
+    # Storage names of the resized copies of ``image`` by rendition name,
+    # filled in by the background image worker.
+    renditions = models.JSONField(default=dict, blank=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["user", "id"], name="recipe_user_id_idx"),
+            models.Index(
+                fields=["user", "updated_at"],
+                name="recipe_user_updated_idx",
+            ),
+            # Counts the references to a stored image.
+            models.Index(fields=["image"], name="recipe_image_idx"),
+        ]
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        recipe = super().from_db(db, field_names, values)
+        # The stored cook time, for ``core.stats`` to apply changes to it.
+        recipe._stored_time_minutes = recipe.__dict__.get("time_minutes")
+        return recipe
+
+    def refresh_from_db(self, using=None, fields=None):
+        super().refresh_from_db(using=using, fields=fields)
+        if fields is None or "time_minutes" in fields:
+            self._stored_time_minutes = self.__dict__.get("time_minutes")
 
     def __str__(self):
         return self.title
 
-class Tag(models.Model):
+class Tag(RecipeCountMixin, models.Model):
     """Model for filtering existing recipes."""
     id = models.AutoField(primary_key=True)
     name = models.CharField(max_length=254)
@@ -75,17 +151,128 @@ class Tag(models.Model):
         settings.AUTH_USER_MODEL,
         on_delete=models.CASCADE,
         )
+    updated_at = models.DateTimeField(auto_now=True)
+    # Number of recipes using the tag, kept by ``core.stats``.
+    recipe_count = models.IntegerField(default=0)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=["user", "name"],
+                name="unique_tag_name_per_user",
+            ),
+        ]
+        indexes = [
+            models.Index(
+                fields=["user", "updated_at"],
+                name="tag_user_updated_idx",
+            ),
+        ]
 
     def __str__(self):
         return self.name
     
-class Ingredient(models.Model):
+class Ingredient(RecipeCountMixin, models.Model):
     id = models.AutoField(primary_key=True)
     name = models.CharField(max_length=254)
     user = models.ForeignKey(
         settings.AUTH_USER_MODEL,
         on_delete=models.CASCADE,
     )
-    
+    updated_at = models.DateTimeField(auto_now=True)
+    # Number of recipes using the ingredient, kept by ``core.stats``.
+    recipe_count = models.IntegerField(default=0)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=["user", "name"],
+                name="unique_ingredient_name_per_user",
+            ),
+        ]
+        indexes = [
+            models.Index(
+                fields=["user", "updated_at"],
+                name="ingredient_user_updated_idx",
+            ),
+        ]
+
+    def __str__(self):
+        return self.name
+
+class RecipeStats(models.Model):
+    """Counts of a user's recipes, tags and ingredients.
+
+    Kept up to date on every write by ``core.stats``, and recounted by the
+    ``rebuild_recipe_stats`` command.
+    """
+    user = models.OneToOneField(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name="recipe_stats",
+    )
+    recipe_count = models.IntegerField(default=0)
+    tag_count = models.IntegerField(default=0)
+    ingredient_count = models.IntegerField(default=0)
+    total_time_minutes = models.BigIntegerField(default=0)
+
+    @property
+    def avg_time_minutes(self):
+        """Mean cook time of the recipes, or ``None`` without recipes."""
+        if not self.recipe_count:
+            return None
+        return self.total_time_minutes / self.recipe_count
+
+    def __str__(self):
+        return f"Recipe stats of {self.user_id}"
+
+class Tombstone(models.Model):
+    """Record of a deleted recipe, tag or ingredient for delta sync."""
+    RECIPE = "recipe"
+    TAG = "tag"
+    INGREDIENT = "ingredient"
+    KIND_CHOICES = [
+        (RECIPE, "Recipe"),
+        (TAG, "Tag"),
+        (INGREDIENT, "Ingredient"),
+    ]
+
+    user = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+    )
+    kind = models.CharField(max_length=16, choices=KIND_CHOICES)
+    object_id = models.IntegerField()
+    deleted_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        indexes = [
+            models.Index(
+                fields=["user", "deleted_at"],
+                name="tombstone_user_deleted_idx",
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.kind} {self.object_id}"
+
+
+class RefreshToken(models.Model):
+    """Server-side refresh token for signed access tokens.
+
+    Only a hash of the token is stored. Tokens rotated from one another
+    share a family; a token is revoked once rotated or logged out.
+    """
+    user = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+    )
+    token_hash = models.CharField(max_length=64, unique=True)
+    family = models.UUIDField(db_index=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    expires_at = models.DateTimeField()
+    revoked_at = models.DateTimeField(null=True, blank=True)
+
     def __str__(self):
-        return self.name
\ No newline at end of file
+        return f"{self.user_id} {self.family}"
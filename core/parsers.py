@@ -0,0 +1,37 @@
+"""
+JSON parser backed by orjson, when it is installed.
+"""
+from django.conf import settings
+
+from rest_framework import parsers
+from rest_framework.exceptions import ParseError
+
+from core.renderers import (
+    JSONRenderer,
+    orjson,
+)
+
+
+class JSONParser(parsers.JSONParser):
+    """Parse UTF-8 JSON with orjson, falling back to DRF's stdlib parser.
+
+    orjson always rejects NaN and Infinity, so it is only used in strict
+    mode.
+    """
+    renderer_class = JSONRenderer
+
+    def parse(self, stream, media_type=None, parser_context=None):
+        encoding = (parser_context or {}).get(
+            "encoding", settings.DEFAULT_CHARSET,
+        )
+        if (
+            orjson is None
+            or not self.strict
+            or encoding.lower().replace("-", "") != "utf8"
+        ):
+            return super().parse(stream, media_type, parser_context)
+
+        try:
+            return orjson.loads(stream.read())
+        except orjson.JSONDecodeError as exc:
+            raise ParseError(f"JSON parse error - {exc}")
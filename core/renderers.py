@@ -0,0 +1,55 @@
+"""
+JSON renderer backed by orjson, when it is installed.
+"""
+from decimal import Decimal
+
+from django.utils.functional import Promise
+
+from rest_framework import renderers
+from rest_framework.utils.encoders import JSONEncoder
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover
+    orjson = None
+
+if orjson is not None:
+    # Datetimes go through DRF's encoder to keep its ISO 8601 format.
+    ORJSON_OPTIONS = orjson.OPT_NON_STR_KEYS | orjson.OPT_PASSTHROUGH_DATETIME
+
+_encoder = JSONEncoder()
+
+
+def _default(obj):
+    """Encode the types orjson doesn't, like DRF's ``JSONEncoder``."""
+    if isinstance(obj, Decimal):
+        return float(obj)
+    if isinstance(obj, Promise):
+        return str(obj)
+    return _encoder.default(obj)
+
+
+class JSONRenderer(renderers.JSONRenderer):
+    """Render compact JSON with orjson, straight to bytes.
+
+    Output matches DRF's renderer, including the escaped U+2028 and U+2029.
+    Indented output, non-compact settings and missing orjson fall back to
+    DRF's stdlib implementation.
+    """
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if (
+            orjson is None
+            or data is None
+            or not self.compact
+            or self.ensure_ascii
+            or self.get_indent(accepted_media_type, renderer_context or {})
+        ):
+            return super().render(data, accepted_media_type, renderer_context)
+
+        ret = orjson.dumps(data, default=_default, option=ORJSON_OPTIONS)
+        if b"\xe2\x80\xa8" in ret or b"\xe2\x80\xa9" in ret:
+            ret = ret.replace(b"\xe2\x80\xa8", b"\\u2028").replace(
+                b"\xe2\x80\xa9", b"\\u2029",
+            )
+        return ret
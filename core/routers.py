@@ -0,0 +1,121 @@
+"""
+Database router sending the recipe API's reads to read replicas.
+
+Views using ``ReplicaReadMixin`` read from a replica, picked once per
+request, while serving safe methods. Everything else, and every write,
+uses the primary. A user's reads stay on the primary for
+``DATABASE_REPLICA_PIN_SECONDS`` after ``pin_to_primary``, so they see
+their own writes before the replicas catch up. Pins are kept in the
+``DATABASE_REPLICA_PIN_CACHE_ALIAS`` cache, which every process shares.
+"""
+import random
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db import DEFAULT_DB_ALIAS
+
+from rest_framework.permissions import SAFE_METHODS
+
+# The request whose reads may go to a replica.
+_replica_request = ContextVar("replica_request", default=None)
+
+
+def _pin_cache():
+    return caches[settings.DATABASE_REPLICA_PIN_CACHE_ALIAS]
+
+
+def _pin_key(user_id):
+    return f"replica-pin:{user_id}"
+
+
+def pin_to_primary(user_id):
+    """Read the user's data from the primary until replicas catch up."""
+    if settings.DATABASE_REPLICAS:
+        _pin_cache().set(
+            _pin_key(user_id), True, settings.DATABASE_REPLICA_PIN_SECONDS,
+        )
+
+
+def _read_database(request):
+    """Return the database to read from for the rest of ``request``.
+
+    Requests read from the primary until they are authenticated, so new
+    tokens and users are found before they reach the replicas.
+    """
+    alias = vars(request).get("_read_database")
+    if alias is not None:
+        return alias
+    if "_user" not in vars(request):
+        return DEFAULT_DB_ALIAS
+
+    user_id = request.user.pk
+    if user_id is None or _pin_cache().get(_pin_key(user_id)):
+        alias = DEFAULT_DB_ALIAS
+    else:
+        alias = random.choice(settings.DATABASE_REPLICAS)
+    request._read_database = alias
+    return alias
+
+
+class PrimaryReplicaRouter:
+    """Route reads of replica reading requests to a replica."""
+
+    def db_for_read(self, model, **hints):
+        request = _replica_request.get()
+        if request is None or not settings.DATABASE_REPLICAS:
+            return None
+
+        return _read_database(request)
+
+    def db_for_write(self, model, **hints):
+        # Objects read from a replica are saved to the primary too.
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        databases = {DEFAULT_DB_ALIAS, *settings.DATABASE_REPLICAS}
+        if obj1._state.db in databases and obj2._state.db in databases:
+            return True
+        return None
+
+    def allow_migrate(self, db, app_label, **hints):
+        # Replicas get their schema from the primary.
+        if db in settings.DATABASE_REPLICAS:
+            return False
+        return None
+
+
+class ReplicaReadMixin:
+    """Read from a replica while serving safe methods.
+
+    Responses streamed after the view returns read from the primary. The
+    replica is released however the request ends, including exceptions
+    ``handle_exception`` raises again, so a thread's next request isn't
+    routed by this one.
+    """
+
+    def initialize_request(self, request, *args, **kwargs):
+        request = super().initialize_request(request, *args, **kwargs)
+        if request.method in SAFE_METHODS:
+            self._replica_token = _replica_request.set(request)
+        return request
+
+    def _end_replica_reads(self):
+        token = vars(self).pop("_replica_token", None)
+        if token is not None:
+            _replica_request.reset(token)
+
+    def handle_exception(self, exc):
+        try:
+            return super().handle_exception(exc)
+        except BaseException:
+            self._end_replica_reads()
+            raise
+
+    def finalize_response(self, request, response, *args, **kwargs):
+        try:
+            return super().finalize_response(
+                request, response, *args, **kwargs,
+            )
+        finally:
+            self._end_replica_reads()
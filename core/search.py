@@ -0,0 +1,218 @@
+"""
+Full-text search index for recipes.
+
+Each recipe is indexed as four fields: title, description and the names of
+its tags and ingredients. The index lives in a side table maintained by the
+signal handlers in ``core.signals``; ``get_backend()`` picks the
+implementation for the database vendor.
+"""
+from django.db import connection
+from django.db.models import (
+    Exists,
+    FloatField,
+    OuterRef,
+    Prefetch,
+    Q,
+    Value,
+)
+from django.db.models.expressions import RawSQL
+
+from core.models import (
+    Recipe,
+    Tag,
+    Ingredient,
+)
+
+INDEX_TABLE = "core_recipe_search"
+
+BATCH_SIZE = 1000
+
+
+def _documents(recipe_ids):
+    """Yield ``(id, title, description, tags, ingredients)`` per recipe."""
+    recipes = Recipe.objects.filter(id__in=recipe_ids).only(
+        "id", "title", "description",
+    ).prefetch_related(
+        Prefetch("tags", queryset=Tag.objects.only("id", "name")),
+        Prefetch("ingredients", queryset=Ingredient.objects.only("id", "name")),
+    )
+    for recipe in recipes:
+        yield (
+            recipe.id,
+            recipe.title,
+            recipe.description,
+            " ".join(tag.name for tag in recipe.tags.all()),
+            " ".join(ing.name for ing in recipe.ingredients.all()),
+        )
+
+
+class SearchBackend:
+    """Search by ``icontains``, for databases without a full-text index."""
+
+    def search(self, queryset, query):
+        """Filter ``queryset`` by ``query`` and select a ``search_rank``.
+
+        A higher ``search_rank`` is a better match. The full-text backends
+        filter on the ids the index matches, so the database drives the
+        query from the index, and only look up the rank of those matches.
+        """
+        for term in query.split():
+            queryset = queryset.filter(
+                Q(title__icontains=term)
+                | Q(description__icontains=term)
+                | Exists(Tag.objects.filter(
+                    recipe=OuterRef("pk"), name__icontains=term,
+                ))
+                | Exists(Ingredient.objects.filter(
+                    recipe=OuterRef("pk"), name__icontains=term,
+                ))
+            )
+
+        return queryset.annotate(
+            search_rank=Value(0.0, output_field=FloatField()),
+        )
+
+    def index(self, recipe_ids):
+        """Add or refresh the index entries of ``recipe_ids``."""
+
+    def remove(self, recipe_ids):
+        """Drop the index entries of ``recipe_ids``."""
+
+    def rebuild(self, batch_size=BATCH_SIZE):
+        """Reindex every recipe, ``batch_size`` at a time."""
+        self.clear()
+        ids = Recipe.objects.order_by("id").values_list("id", flat=True)
+        batch = []
+        for recipe_id in ids.iterator(chunk_size=batch_size):
+            batch.append(recipe_id)
+            if len(batch) == batch_size:
+                self.index(batch)
+                batch = []
+        if batch:
+            self.index(batch)
+
+    def clear(self):
+        """Drop every index entry."""
+
+
+class SQLiteSearchBackend(SearchBackend):
+    """Search an FTS5 table whose rowid is the recipe id, ranked by BM25."""
+
+    # BM25 weights for title, description, tags and ingredients.
+    weights = (10.0, 1.0, 5.0, 5.0)
+
+    def _match(self, query):
+        """Quote every term so user input can't use FTS5 query syntax."""
+        return " ".join(
+            '"{}"'.format(term.replace('"', '""')) for term in query.split()
+        )
+
+    def search(self, queryset, query):
+        weights = ", ".join(str(weight) for weight in self.weights)
+        match = self._match(query)
+        return queryset.filter(id__in=RawSQL(
+            f"SELECT rowid FROM {INDEX_TABLE} WHERE {INDEX_TABLE} MATCH %s",
+            [match],
+        )).annotate(search_rank=RawSQL(
+            f"SELECT -bm25({INDEX_TABLE}, {weights}) FROM {INDEX_TABLE} "
+            f"WHERE {INDEX_TABLE} MATCH %s "
+            f"AND {INDEX_TABLE}.rowid = {Recipe._meta.db_table}.id",
+            [match],
+            output_field=FloatField(),
+        ))
+
+    def index(self, recipe_ids):
+        recipe_ids = list(recipe_ids)
+        if not recipe_ids:
+            return
+        self.remove(recipe_ids)
+        with connection.cursor() as cursor:
+            cursor.executemany(
+                f"INSERT INTO {INDEX_TABLE} "
+                "(rowid, title, description, tags, ingredients) "
+                "VALUES (%s, %s, %s, %s, %s)",
+                list(_documents(recipe_ids)),
+            )
+
+    def remove(self, recipe_ids):
+        recipe_ids = list(recipe_ids)
+        if not recipe_ids:
+            return
+        placeholders = ", ".join(["%s"] * len(recipe_ids))
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f"DELETE FROM {INDEX_TABLE} WHERE rowid IN ({placeholders})",
+                recipe_ids,
+            )
+
+    def clear(self):
+        with connection.cursor() as cursor:
+            cursor.execute(f"DELETE FROM {INDEX_TABLE}")
+
+
+class PostgresSearchBackend(SearchBackend):
+    """Search a weighted ``tsvector`` column backed by a GIN index."""
+
+    config = "english"
+
+    def search(self, queryset, query):
+        tsquery = f"websearch_to_tsquery('{self.config}', %s)"
+        return queryset.filter(id__in=RawSQL(
+            f"SELECT recipe_id FROM {INDEX_TABLE} "
+            f"WHERE document @@ {tsquery}",
+            [query],
+        )).annotate(search_rank=RawSQL(
+            f"SELECT ts_rank(document, {tsquery}) FROM {INDEX_TABLE} "
+            f"WHERE {INDEX_TABLE}.recipe_id = {Recipe._meta.db_table}.id",
+            [query],
+            output_field=FloatField(),
+        ))
+
+    def index(self, recipe_ids):
+        documents = list(_documents(recipe_ids))
+        if not documents:
+            return
+        vector = " || ".join(
+            f"setweight(to_tsvector('{self.config}', %s), '{weight}')"
+            for weight in ("A", "C", "B", "B")
+        )
+        with connection.cursor() as cursor:
+            cursor.executemany(
+                f"INSERT INTO {INDEX_TABLE} (recipe_id, document) "
+                f"VALUES (%s, {vector}) "
+                "ON CONFLICT (recipe_id) DO UPDATE "
+                "SET document = EXCLUDED.document",
+                documents,
+            )
+
+    def remove(self, recipe_ids):
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f"DELETE FROM {INDEX_TABLE} WHERE recipe_id = ANY(%s)",
+                [list(recipe_ids)],
+            )
+
+    def clear(self):
+        with connection.cursor() as cursor:
+            cursor.execute(f"TRUNCATE {INDEX_TABLE}")
+
+
+BACKENDS = {
+    "sqlite": SQLiteSearchBackend,
+    "postgresql": PostgresSearchBackend,
+}
+
+
+def get_backend():
+    """Return the search backend for the default database."""
+    return BACKENDS.get(connection.vendor, SearchBackend)()
+
+
+def index_recipes(recipe_ids):
+    """Add or refresh the index entries of ``recipe_ids``."""
+    get_backend().index(recipe_ids)
+
+
+def remove_recipes(recipe_ids):
+    """Drop the index entries of ``recipe_ids``."""
+    get_backend().remove(recipe_ids)
@@ -0,0 +1,266 @@
+"""
+Signal handlers keeping derived recipe data in sync.
+"""
+from functools import partial
+
+from django.contrib.auth import get_user_model
+from django.db import transaction
+from django.db.models.signals import (
+    m2m_changed,
+    post_delete,
+    post_save,
+    pre_delete,
+)
+from django.dispatch import receiver
+from django.utils import timezone
+
+from rest_framework.authtoken.models import Token
+
+from core import (
+    search,
+    stats,
+    storage,
+    tokens,
+)
+from core.authentication import token_cache
+from core.models import (
+    Recipe,
+    Tag,
+    Ingredient,
+    RecipeStats,
+    Tombstone,
+)
+
+TOMBSTONE_KINDS = {
+    Recipe: Tombstone.RECIPE,
+    Tag: Tombstone.TAG,
+    Ingredient: Tombstone.INGREDIENT,
+}
+
+
+def _linked_recipe_ids(instance):
+    """Return the ids of recipes linked to a tag or ingredient."""
+    return list(instance.recipe_set.values_list("id", flat=True))
+
+
+def _deleted_with_user(origin):
+    """Return whether a deletion started from deleting users."""
+    origin_model = getattr(origin, "model", type(origin))
+    return issubclass(origin_model, get_user_model())
+
+
+def _linked_ids(links, instance, reverse, model, pk_set=None):
+    """Return the ids linked to ``instance`` through the ``links`` model.
+
+    With ``pk_set``, only those of its ids that are linked are returned.
+    """
+    if reverse:
+        source, target = f"{instance._meta.model_name}_id", "recipe_id"
+    else:
+        source, target = "recipe_id", f"{model._meta.model_name}_id"
+    rows = links.objects.filter(**{source: instance.pk})
+    if pk_set is not None:
+        rows = rows.filter(**{f"{target}__in": pk_set})
+    return list(rows.values_list(target, flat=True))
+
+
+def _recipes_changed(recipe_ids):
+    """Reindex recipes and bump their ``updated_at`` for delta sync."""
+    recipe_ids = list(recipe_ids)
+    if not recipe_ids:
+        return
+    search.index_recipes(recipe_ids)
+    Recipe.objects.filter(id__in=recipe_ids).update(updated_at=timezone.now())
+
+
+@receiver(post_save, sender=Recipe)
+def index_saved_recipe(sender, instance, **kwargs):
+    """Index a recipe whenever it is saved."""
+    search.index_recipes([instance.id])
+
+
+@receiver(post_delete, sender=Recipe)
+def unindex_deleted_recipe(sender, instance, **kwargs):
+    """Drop a deleted recipe from the index."""
+    search.remove_recipes([instance.id])
+
+
+@receiver(post_delete, sender=Recipe)
+def release_deleted_image(sender, instance, **kwargs):
+    """Delete a deleted recipe's image once nothing else uses it."""
+    if instance.image:
+        transaction.on_commit(partial(
+            storage.release_image,
+            instance.image.name,
+            list(instance.renditions.values()),
+        ))
+
+
+@receiver(post_delete, sender=Recipe)
+@receiver(post_delete, sender=Tag)
+@receiver(post_delete, sender=Ingredient)
+def record_tombstone(sender, instance, origin=None, **kwargs):
+    """Record a deletion for delta sync, unless its user is going too."""
+    if _deleted_with_user(origin):
+        return
+    Tombstone.objects.create(
+        user_id=instance.user_id,
+        kind=TOMBSTONE_KINDS[sender],
+        object_id=instance.id,
+    )
+
+
+@receiver(m2m_changed, sender=Recipe.tags.through)
+@receiver(m2m_changed, sender=Recipe.ingredients.through)
+def index_relinked_recipes(sender, instance, action, reverse, pk_set, **kwargs):
+    """Reindex recipes whose tags or ingredients changed."""
+    if not reverse:
+        if action in ("post_add", "post_remove", "post_clear"):
+            _recipes_changed([instance.id])
+    elif action == "pre_clear":
+        instance._search_recipe_ids = _linked_recipe_ids(instance)
+    elif action == "post_clear":
+        _recipes_changed(instance.__dict__.pop("_search_recipe_ids", []))
+    elif action in ("post_add", "post_remove"):
+        _recipes_changed(pk_set)
+
+
+@receiver(post_save, sender=Tag)
+@receiver(post_save, sender=Ingredient)
+def index_renamed_attr(sender, instance, created, **kwargs):
+    """Reindex the recipes of a renamed tag or ingredient."""
+    if not created:
+        _recipes_changed(_linked_recipe_ids(instance))
+
+
+@receiver(pre_delete, sender=Tag)
+@receiver(pre_delete, sender=Ingredient)
+def remember_attr_recipes(sender, instance, **kwargs):
+    """Note the recipes of a tag or ingredient before its links go."""
+    instance._search_recipe_ids = _linked_recipe_ids(instance)
+
+
+@receiver(post_delete, sender=Tag)
+@receiver(post_delete, sender=Ingredient)
+def index_detached_recipes(sender, instance, **kwargs):
+    """Reindex the recipes a deleted tag or ingredient was linked to."""
+    _recipes_changed(instance.__dict__.pop("_search_recipe_ids", []))
+
+
+@receiver(post_save, sender=Recipe)
+def count_saved_recipe(sender, instance, created, update_fields, **kwargs):
+    """Count a new recipe, or the change to a saved one's cook time."""
+    time_minutes = instance.__dict__.get("time_minutes")
+    if created:
+        stats.add(
+            instance.user_id, recipe_count=1, total_time_minutes=time_minutes,
+        )
+    elif update_fields is not None and "time_minutes" not in update_fields:
+        return
+    elif getattr(instance, "_stored_time_minutes", None) is None:
+        stats.rebuild_stats([instance.user_id])
+    else:
+        stats.add(
+            instance.user_id,
+            total_time_minutes=time_minutes - instance._stored_time_minutes,
+        )
+    instance._stored_time_minutes = time_minutes
+
+
+@receiver(pre_delete, sender=Recipe)
+def remember_recipe_attrs(sender, instance, origin=None, **kwargs):
+    """Note a recipe's tags and ingredients before its links go."""
+    if _deleted_with_user(origin):
+        return
+    instance._stats_attr_ids = {
+        model: _linked_ids(
+            Recipe._meta.get_field(relation).remote_field.through,
+            instance, False, model,
+        )
+        for model, relation in stats.ATTR_RELATIONS.items()
+    }
+
+
+@receiver(post_delete, sender=Recipe)
+def uncount_deleted_recipe(sender, instance, origin=None, **kwargs):
+    """Uncount a deleted recipe and its uses of tags and ingredients."""
+    if _deleted_with_user(origin):
+        return
+    stored = getattr(instance, "_stored_time_minutes", None)
+    if stored is None:
+        stats.rebuild_stats([instance.user_id])
+    else:
+        stats.add(
+            instance.user_id, recipe_count=-1, total_time_minutes=-stored,
+        )
+    for model, ids in instance.__dict__.pop("_stats_attr_ids", {}).items():
+        stats.add_uses(model, ids, -1)
+
+
+@receiver(post_save, sender=Tag)
+@receiver(post_save, sender=Ingredient)
+def count_created_attr(sender, instance, created, **kwargs):
+    """Count a new tag or ingredient."""
+    if created:
+        stats.add(instance.user_id, **{stats.COUNT_FIELDS[sender]: 1})
+
+
+@receiver(post_delete, sender=Tag)
+@receiver(post_delete, sender=Ingredient)
+def uncount_deleted_attr(sender, instance, origin=None, **kwargs):
+    """Uncount a deleted tag or ingredient."""
+    if not _deleted_with_user(origin):
+        stats.add(instance.user_id, **{stats.COUNT_FIELDS[sender]: -1})
+
+
+@receiver(m2m_changed, sender=Recipe.tags.through)
+@receiver(m2m_changed, sender=Recipe.ingredients.through)
+def count_attr_uses(sender, instance, action, reverse, model, pk_set,
+                    **kwargs):
+    """Count the recipes using tags and ingredients as links change.
+
+    Removals may name ids that aren't linked, so the linked ones are looked
+    up first.
+    """
+    key = f"_stats_{sender._meta.model_name}_ids"
+    if action == "pre_remove":
+        instance.__dict__[key] = _linked_ids(
+            sender, instance, reverse, model, pk_set,
+        )
+        return
+    if action == "pre_clear":
+        instance.__dict__[key] = _linked_ids(sender, instance, reverse, model)
+        return
+    if action == "post_add":
+        ids, delta = pk_set, 1
+    elif action in ("post_remove", "post_clear"):
+        ids, delta = instance.__dict__.pop(key, []), -1
+    else:
+        return
+
+    if reverse:
+        stats.add_uses(type(instance), [instance.pk], delta * len(ids))
+    else:
+        stats.add_uses(model, ids, delta)
+
+
+@receiver(post_save, sender=get_user_model())
+def create_recipe_stats(sender, instance, created, **kwargs):
+    """Start a new user's stats at zero."""
+    if created:
+        RecipeStats.objects.get_or_create(user_id=instance.pk)
+
+
+@receiver(post_save, sender=get_user_model())
+def forget_user_tokens(sender, instance, created, **kwargs):
+    """Drop the cached tokens of a changed user; revoke a deactivated one's."""
+    if not created:
+        token_cache.invalidate_user(instance.id)
+        if not instance.is_active:
+            tokens.revoke_user(instance.id)
+
+
+@receiver(post_delete, sender=Token)
+def forget_deleted_token(sender, instance, **kwargs):
+    """Drop a deleted token from the token cache."""
+    token_cache.invalidate(instance.key)
@@ -0,0 +1,165 @@
+"""
+Per-user recipe statistics and tag and ingredient usage counts.
+
+``RecipeStats`` rows and the ``recipe_count`` of tags and ingredients are
+adjusted on every write: by the signal handlers in ``core.signals`` for
+single saves, deletes and relation changes, and by the bulk write paths,
+which send no signals, through ``add`` and ``add_uses``. Concurrent edits of
+the same recipe or tag name can leave them slightly off; ``rebuild``,
+run by the ``rebuild_recipe_stats`` command, recounts them from scratch.
+"""
+from collections import (
+    Counter,
+    defaultdict,
+)
+
+from django.contrib.auth import get_user_model
+from django.db import DEFAULT_DB_ALIAS
+from django.db.models import (
+    Count,
+    F,
+    OuterRef,
+    Subquery,
+    Sum,
+)
+from django.db.models.functions import Coalesce
+
+from core.models import (
+    Recipe,
+    RecipeStats,
+    Tag,
+    Ingredient,
+)
+
+BATCH_SIZE = 1000
+
+# The ``RecipeStats`` field counting each model's rows.
+COUNT_FIELDS = {
+    Recipe: "recipe_count",
+    Tag: "tag_count",
+    Ingredient: "ingredient_count",
+}
+
+STATS_FIELDS = [*COUNT_FIELDS.values(), "total_time_minutes"]
+
+ATTR_RELATIONS = {Tag: "tags", Ingredient: "ingredients"}
+
+
+def get(user_id):
+    """Return the user's ``RecipeStats``, counting them if missing."""
+    stats = RecipeStats.objects.filter(user_id=user_id).first()
+    if stats is None:
+        rebuild_stats([user_id])
+        stats = RecipeStats.objects.using(DEFAULT_DB_ALIAS).get(
+            user_id=user_id,
+        )
+
+    return stats
+
+
+def add(user_id, **deltas):
+    """Add ``deltas`` to the user's stats, e.g. ``recipe_count=1``.
+
+    Call it after the write it accounts for: users without a stats row yet
+    get theirs counted from scratch instead.
+    """
+    deltas = {field: delta for field, delta in deltas.items() if delta}
+    if not deltas:
+        return
+
+    updated = RecipeStats.objects.filter(user_id=user_id).update(**{
+        field: F(field) + delta for field, delta in deltas.items()
+    })
+    if not updated:
+        rebuild_stats([user_id])
+
+
+def add_uses(model, ids, delta=1):
+    """Add ``delta`` to the ``recipe_count`` of tags or ingredients.
+
+    Ids listed more than once get ``delta`` once per listing, in one
+    ``UPDATE`` per distinct total.
+    """
+    groups = defaultdict(list)
+    for pk, times in Counter(ids).items():
+        groups[delta * times].append(pk)
+
+    for total, pks in groups.items():
+        if total:
+            model.objects.filter(id__in=sorted(pks)).update(
+                recipe_count=F("recipe_count") + total,
+            )
+
+
+def _per_user(queryset, aggregate):
+    """Return ``aggregate`` over the outer user's rows of ``queryset``."""
+    return Coalesce(Subquery(queryset.filter(
+        user_id=OuterRef("pk"),
+    ).order_by().values("user_id").annotate(
+        value=aggregate,
+    ).values("value")), 0)
+
+
+def rebuild_stats(user_ids=None, batch_size=BATCH_SIZE):
+    """Recount the ``RecipeStats`` of ``user_ids``, or of every user.
+
+    The counts are read from the primary, which they are written to, even
+    while a view reads from a replica.
+    """
+    users = get_user_model().objects.using(DEFAULT_DB_ALIAS).order_by("pk")
+    if user_ids is not None:
+        users = users.filter(pk__in=user_ids)
+
+    last = None
+    while True:
+        batch = users if last is None else users.filter(pk__gt=last)
+        batch = list(batch.annotate(
+            n_recipes=_per_user(Recipe.objects.all(), Count("id")),
+            n_tags=_per_user(Tag.objects.all(), Count("id")),
+            n_ingredients=_per_user(Ingredient.objects.all(), Count("id")),
+            time_minutes=_per_user(Recipe.objects.all(), Sum("time_minutes")),
+        ).values_list(
+            "pk", "n_recipes", "n_tags", "n_ingredients", "time_minutes",
+        )[:batch_size])
+        if not batch:
+            return
+
+        RecipeStats.objects.bulk_create(
+            [
+                RecipeStats(
+                    user_id=pk,
+                    recipe_count=recipes,
+                    tag_count=tags,
+                    ingredient_count=ingredients,
+                    total_time_minutes=time_minutes,
+                )
+                for pk, recipes, tags, ingredients, time_minutes in batch
+            ],
+            update_conflicts=True,
+            unique_fields=["user"],
+            update_fields=STATS_FIELDS,
+        )
+        last = batch[-1][0]
+
+
+def rebuild_uses(user_ids=None):
+    """Recount the ``recipe_count`` of tags and ingredients.
+
+    Only the tags and ingredients of ``user_ids`` are counted when given,
+    in one ``UPDATE`` per model.
+    """
+    for model, relation in ATTR_RELATIONS.items():
+        through = Recipe._meta.get_field(relation).remote_field.through
+        column = f"{model._meta.model_name}_id"
+        uses = through.objects.filter(**{column: OuterRef("pk")}).order_by(
+        ).values(column).annotate(value=Count("id")).values("value")
+        queryset = model.objects.all()
+        if user_ids is not None:
+            queryset = queryset.filter(user_id__in=user_ids)
+        queryset.update(recipe_count=Coalesce(Subquery(uses), 0))
+
+
+def rebuild(user_ids=None, batch_size=BATCH_SIZE):
+    """Recount every stat and usage count of ``user_ids``, or of everyone."""
+    rebuild_uses(user_ids)
+    rebuild_stats(user_ids, batch_size=batch_size)
@@ -0,0 +1,114 @@
+"""
+Content-addressed storage for recipe images.
+
+Files are named by the SHA-256 of their content, so an image uploaded to
+many recipes is stored once. Nothing counts references separately: a stored
+image is referenced by the recipes whose ``image`` names it, which an index
+makes cheap to ask. An image left without references is deleted along with
+its renditions, unless it was written or reused within
+``RECIPE_IMAGE_GRACE_SECONDS`` and so may belong to an upload that hasn't
+committed yet; ``collect_image_garbage`` sweeps those up later.
+"""
+import hashlib
+import os
+import re
+import time
+
+from django.apps import apps
+from django.conf import settings
+from django.core.files.storage import FileSystemStorage
+from django.core.files.utils import validate_file_name
+
+# Directory recipe images are stored in.
+IMAGE_DIR = "uploads/recipe"
+
+# Name of a stored image or rendition: the image's digest, sharded by its
+# first two bytes.
+CONTENT_NAME = re.compile(
+    r"(?:^|/)([0-9a-f]{2})/([0-9a-f]{2})/\1\2[0-9a-f]{60}(?:-[a-z]+)?\.\w+$"
+)
+
+
+class AlreadyStored(Exception):
+    """The content being saved is stored under its name already."""
+
+
+class ContentAddressedStorage(FileSystemStorage):
+    """Store files under the SHA-256 of their content.
+
+    Only the directory and extension of the proposed name are kept; the
+    file lands in ``<dir>/<ab>/<cd>/<abcd...><ext>``, so no directory holds
+    more than a few hundred entries. Saving content that is stored already
+    writes nothing and returns the existing name.
+    """
+
+    def content_name(self, name, content):
+        """Return the content-addressed name for ``content``."""
+        digest = getattr(content, "content_hash", None)
+        if digest is None:
+            hasher = hashlib.sha256()
+            for chunk in content.chunks():
+                hasher.update(chunk)
+            content.seek(0)
+            digest = hasher.hexdigest()
+        directory, filename = os.path.split(name)
+        ext = os.path.splitext(filename)[1].lower()
+
+        return os.path.join(directory, digest[:2], digest[2:4], digest + ext)
+
+    def get_available_name(self, name, max_length=None):
+        # Same name, same content: never pick an alternative name. This is
+        # also reached when a concurrent save wins the race to create it.
+        validate_file_name(name, allow_relative_path=True)
+        if self.exists(name):
+            raise AlreadyStored(name)
+
+        return name
+
+    def save(self, name, content, max_length=None):
+        if name is None:
+            name = content.name
+        name = self.content_name(name, content)
+        try:
+            return super().save(name, content, max_length)
+        except AlreadyStored:
+            # Mark the file as in use, so that releasing its last other
+            # reference right now leaves it alone.
+            os.utime(self.path(name))
+            return name
+
+    def modified_within(self, name, seconds):
+        """Return whether ``name`` was written or reused in ``seconds``."""
+        try:
+            return time.time() - os.path.getmtime(self.path(name)) < seconds
+        except FileNotFoundError:
+            return False
+
+
+image_storage = ContentAddressedStorage()
+
+
+def get_image_storage():
+    """Return the storage of recipe images."""
+    return image_storage
+
+
+def is_referenced(name):
+    """Return whether any recipe uses the stored image ``name``."""
+    Recipe = apps.get_model("core", "Recipe")
+    return Recipe.objects.filter(image=name).exists()
+
+
+def release_image(name, renditions=()):
+    """Delete an image and its renditions if no recipe uses it any more.
+
+    Call once the transaction dropping the reference has committed.
+    Returns whether the files were deleted.
+    """
+    grace = settings.RECIPE_IMAGE_GRACE_SECONDS
+    if is_referenced(name) or image_storage.modified_within(name, grace):
+        return False
+    for stored in (*renditions, name):
+        image_storage.delete(stored)
+
+    return True
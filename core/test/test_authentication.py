@@ -0,0 +1,159 @@
+"""
+Tests for cached token authentication.
+"""
+from unittest.mock import patch
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import (
+    TestCase,
+    override_settings,
+)
+from django.urls import reverse
+
+from rest_framework import status
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APIClient
+
+from core.authentication import (
+    CachedTokenAuthentication,
+    token_cache,
+)
+
+ME_URL = reverse("user:me")
+
+
+@override_settings(AUTH_TOKEN_CACHE_ALIAS=None)
+class CachedTokenAuthenticationTests(TestCase):
+    """Test token lookups are cached and invalidated."""
+
+    def setUp(self):
+        token_cache.clear()
+        self.addCleanup(token_cache.clear)
+        self.user = get_user_model().objects.create_user(
+            email="test@test.com",
+            password="test1234",
+            name="Test Testov",
+        )
+        self.token = Token.objects.create(user=self.user)
+        self.client = APIClient()
+        self.client.credentials(HTTP_AUTHORIZATION=f"Token {self.token.key}")
+
+    def test_lookup_cached(self):
+        """Test an authenticated token is not looked up again."""
+        self.client.get(ME_URL)
+
+        with self.assertNumQueries(0):
+            response = self.client.get(ME_URL)
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data["email"], self.user.email)
+
+    def test_invalid_token(self):
+        """Test an unknown token is rejected."""
+        self.client.credentials(HTTP_AUTHORIZATION="Token invalid")
+
+        response = self.client.get(ME_URL)
+
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_deleted_token_rejected(self):
+        """Test a deleted token stops working at once."""
+        self.client.get(ME_URL)
+
+        self.token.delete()
+        response = self.client.get(ME_URL)
+
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_deactivated_user_rejected(self):
+        """Test a deactivated user's token stops working at once."""
+        self.client.get(ME_URL)
+
+        self.user.is_active = False
+        self.user.save()
+        response = self.client.get(ME_URL)
+
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_password_change_invalidates(self):
+        """Test changing the password drops the cached token."""
+        self.client.get(ME_URL)
+
+        self.client.patch(ME_URL, {"password": "newpass123"})
+
+        self.assertIsNone(token_cache.get(self.token.key))
+
+    def test_requests_get_own_user(self):
+        """Test changing request.user doesn't change the cached user."""
+        authentication = CachedTokenAuthentication()
+        user, _token = authentication.authenticate_credentials(self.token.key)
+        user.name = "Changed"
+
+        user, _token = authentication.authenticate_credentials(self.token.key)
+
+        self.assertEqual(user.name, "Test Testov")
+
+    def test_password_hash_not_cached(self):
+        """Test cached users are kept without their password hash."""
+        self.client.get(ME_URL)
+
+        user = token_cache.get(self.token.key).user
+
+        self.assertIn("password", user.get_deferred_fields())
+
+    def test_update_loads_stored_user(self):
+        """Test updating the profile doesn't save the cached user over it."""
+        self.client.get(ME_URL)
+        # As another process would, without invalidating the cached token.
+        get_user_model().objects.filter(id=self.user.id).update(
+            email="moved@test.com",
+        )
+
+        response = self.client.patch(ME_URL, {"name": "Renamed"})
+
+        self.user.refresh_from_db()
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            (self.user.email, self.user.name), ("moved@test.com", "Renamed"),
+        )
+
+    @override_settings(AUTH_TOKEN_CACHE_TTL=60)
+    def test_entries_expire(self):
+        """Test tokens are looked up again after the TTL."""
+        with patch("core.authentication.time.monotonic", return_value=0):
+            self.client.get(ME_URL)
+        with patch("core.authentication.time.monotonic", return_value=61):
+            self.assertIsNone(token_cache.get(self.token.key))
+
+    @override_settings(AUTH_TOKEN_CACHE_SIZE=1)
+    def test_least_recently_used_evicted(self):
+        """Test the cache holds at most AUTH_TOKEN_CACHE_SIZE tokens."""
+        other = get_user_model().objects.create_user(
+            email="other@test.com",
+            password="test1234",
+        )
+        other_token = Token.objects.create(user=other)
+        self.client.get(ME_URL)
+
+        self.client.credentials(HTTP_AUTHORIZATION=f"Token {other_token.key}")
+        self.client.get(ME_URL)
+
+        self.assertIsNone(token_cache.get(self.token.key))
+        self.assertIsNotNone(token_cache.get(other_token.key))
+
+    @override_settings(AUTH_TOKEN_CACHE_ALIAS="default")
+    def test_shared_cache(self):
+        """Test tokens cached by another process are used and invalidated."""
+        self.addCleanup(cache.clear)
+        self.client.get(ME_URL)
+        token_cache.clear()
+
+        with self.assertNumQueries(0):
+            self.client.get(ME_URL)
+
+        token_cache.clear()
+        self.token.delete()
+        response = self.client.get(ME_URL)
+
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
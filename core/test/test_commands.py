@@ -1,34 +1,58 @@
-# """
-# Test custom Django management commands.
-# """
-# from unittest.mock import patch
-
-# from psycopg2 import OperationalError as Psycopg2OpError
-
-# from django.core.management import call_command
-# from django.db.utils import OperationalError
-# from django.test import SimpleTestCase
-
-
-# @patch('core.management.commands.wait_for_db.Command.check')
-# class CommandTests(SimpleTestCase):
-#     """Test commands."""
-
-#     def test_wait_for_db_ready(self, patched_check):
-#         """Test waiting for database if database ready."""
-#         patched_check.return_value = True
-
-#         call_command('wait_for_db')
-
-#         patched_check.assert_called_once_with(databases=['default'])
-
-#     @patch('time.sleep')
-#     def test_wait_for_db_delay(self, patched_sleep, patched_check):
-#         """Test waiting for database when getting OperationalError."""
-#         patched_check.side_effect = [Psycopg2OpError] * 2 + \
-#             [OperationalError] * 3 + [True]
-
-#         call_command('wait_for_db')
-
-#         self.assertEqual(patched_check.call_count, 6)
-#         patched_check.assert_called_with(databases=['default'])
\ No newline at end of file
+"""
+Test custom Django management commands.
+"""
+from io import StringIO
+from unittest.mock import (
+    call,
+    patch,
+)
+
+from django.core.management import (
+    CommandError,
+    call_command,
+)
+from django.db.utils import OperationalError
+from django.test import SimpleTestCase
+
+
+@patch('core.management.commands.wait_for_db.Command.check')
+class CommandTests(SimpleTestCase):
+    """Test commands."""
+
+    def test_wait_for_db_ready(self, patched_check):
+        """Test waiting for database if database ready."""
+        patched_check.return_value = True
+
+        call_command('wait_for_db', stdout=StringIO())
+
+        patched_check.assert_called_once_with(databases=['default'])
+
+    @patch('time.sleep')
+    def test_wait_for_db_delay(self, patched_sleep, patched_check):
+        """Test waiting for database with backoff on OperationalError."""
+        patched_check.side_effect = [OperationalError] * 7 + [True]
+
+        call_command('wait_for_db', '--max-delay=1', stdout=StringIO())
+
+        self.assertEqual(patched_check.call_count, 8)
+        patched_check.assert_called_with(databases=['default'])
+        self.assertEqual(patched_sleep.call_args_list, [
+            call(0.1), call(0.2), call(0.4), call(0.8), call(1), call(1),
+            call(1),
+        ])
+
+    @patch('time.sleep')
+    def test_wait_for_db_timeout(self, patched_sleep, patched_check):
+        """Test giving up once the timeout has been waited."""
+        patched_check.side_effect = OperationalError
+
+        with self.assertRaises(CommandError):
+            call_command(
+                'wait_for_db', '--timeout=1', '--database=other',
+                stdout=StringIO(),
+            )
+
+        patched_check.assert_called_with(databases=['other'])
+        self.assertGreaterEqual(
+            sum(args[0] for args, _ in patched_sleep.call_args_list), 1,
+        )
@@ -0,0 +1,221 @@
+"""
+Test the pooled database connections.
+"""
+import tempfile
+from pathlib import Path
+from unittest.mock import (
+    Mock,
+    patch,
+)
+
+from django.core.exceptions import ImproperlyConfigured
+from django.db import connection
+from django.db.utils import OperationalError
+from django.test import SimpleTestCase
+
+from core.db.backends.sqlite3.base import DatabaseWrapper
+from core.db.pool import (
+    ConnectionPool,
+    close_pools,
+)
+
+
+class ConnectionPoolTests(SimpleTestCase):
+    """Test the connection pool."""
+
+    def test_reuses_released(self):
+        """Test released connections are handed out again."""
+        pool = ConnectionPool(max_size=2)
+        connect = Mock(side_effect=lambda: Mock())
+
+        first = pool.acquire(connect)
+        pool.release(first)
+        second = pool.acquire(connect)
+
+        self.assertIs(second, first)
+        connect.assert_called_once()
+
+    def test_bounded(self):
+        """Test no more than max_size connections are opened."""
+        pool = ConnectionPool(max_size=1, timeout=0.01)
+        pool.acquire(Mock)
+
+        with self.assertRaises(OperationalError):
+            pool.acquire(Mock)
+
+    def test_discard(self):
+        """Test discarded connections are closed and free their slot."""
+        pool = ConnectionPool(max_size=1, timeout=0.01)
+        first = pool.acquire(Mock)
+
+        pool.release(first, discard=True)
+        second = pool.acquire(Mock)
+
+        first.close.assert_called_once()
+        self.assertIsNot(second, first)
+
+    def test_check_drops_dead(self):
+        """Test idle connections failing the check are closed and replaced."""
+        pool = ConnectionPool(max_size=1, timeout=0.01)
+        dead = pool.acquire(Mock)
+        pool.release(dead)
+
+        live = pool.acquire(Mock, check=lambda connection: False)
+
+        dead.close.assert_called_once()
+        self.assertIsNot(live, dead)
+
+    def test_failed_connect(self):
+        """Test a failed connect frees its slot."""
+        pool = ConnectionPool(max_size=1, timeout=0.01)
+
+        with self.assertRaises(OperationalError):
+            pool.acquire(Mock(side_effect=OperationalError))
+
+        self.assertIsNotNone(pool.acquire(Mock))
+
+    def test_close(self):
+        """Test closing the pool closes its idle connections."""
+        pool = ConnectionPool(max_size=1, timeout=0.01)
+        idle = pool.acquire(Mock)
+        pool.release(idle)
+
+        pool.close()
+
+        idle.close.assert_called_once()
+        self.assertIsNot(pool.acquire(Mock), idle)
+
+
+class PooledDatabaseWrapperTests(SimpleTestCase):
+    """Test the backends' pooled connections."""
+
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.addCleanup(close_pools, "pooled")
+        self.settings_dict = {
+            **connection.settings_dict,
+            "NAME": str(Path(directory.name) / "pooled.sqlite3"),
+            "OPTIONS": {"pool": {"max_size": 2}},
+            "CONN_MAX_AGE": 0,
+        }
+
+    def wrapper(self):
+        wrapper = DatabaseWrapper(self.settings_dict, alias="pooled")
+        self.addCleanup(wrapper.close)
+        return wrapper
+
+    def test_reuses_connection(self):
+        """Test closing hands the connection to the next wrapper."""
+        first, second = self.wrapper(), self.wrapper()
+        first.ensure_connection()
+        raw = first.connection
+
+        first.close()
+        second.ensure_connection()
+
+        self.assertIsNone(first.connection)
+        self.assertIs(second.connection, raw)
+        self.assertTrue(second.get_autocommit())
+
+    def test_discards_in_transaction(self):
+        """Test a connection closed in a transaction isn't reused."""
+        first, second = self.wrapper(), self.wrapper()
+        first.set_autocommit(False)
+        raw = first.connection
+
+        first.close()
+        second.ensure_connection()
+
+        self.assertIsNot(second.connection, raw)
+
+    def test_health_checked(self):
+        """Test idle connections that no longer work aren't reused."""
+        self.settings_dict["CONN_HEALTH_CHECKS"] = True
+        first, second = self.wrapper(), self.wrapper()
+        first.ensure_connection()
+        raw = first.connection
+        first.close()
+
+        with patch.object(DatabaseWrapper, "is_usable", return_value=False):
+            second.ensure_connection()
+
+        self.assertIsNot(second.connection, raw)
+        with second.cursor() as cursor:
+            cursor.execute("SELECT 1")
+
+    def test_persistent_rejected(self):
+        """Test pooled connections can't also be persistent."""
+        self.settings_dict["CONN_MAX_AGE"] = None
+
+        with self.assertRaises(ImproperlyConfigured):
+            self.wrapper().ensure_connection()
+
+
+class SQLiteOptionsTests(SimpleTestCase):
+    """Test the SQLite backend's connection and transaction options."""
+
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.settings_dict = {
+            **connection.settings_dict,
+            "NAME": str(Path(directory.name) / "options.sqlite3"),
+            "OPTIONS": {"timeout": 0},
+        }
+
+    def wrapper(self, **options):
+        wrapper = DatabaseWrapper(
+            {
+                **self.settings_dict,
+                "OPTIONS": {**self.settings_dict["OPTIONS"], **options},
+            },
+            alias="options",
+        )
+        self.addCleanup(wrapper.close)
+        return wrapper
+
+    def test_init_command(self):
+        """Test new connections run the init command."""
+        wrapper = self.wrapper(
+            init_command="PRAGMA journal_mode = WAL; PRAGMA synchronous = 1;",
+        )
+
+        with wrapper.cursor() as cursor:
+            cursor.execute("PRAGMA journal_mode")
+            journal_mode = cursor.fetchone()[0]
+            cursor.execute("PRAGMA synchronous")
+            synchronous = cursor.fetchone()[0]
+
+        self.assertEqual(journal_mode, "wal")
+        self.assertEqual(synchronous, 1)
+
+    def _begin_then_write(self, first):
+        """Begin a transaction on ``first`` and write from another wrapper."""
+        with first.cursor() as cursor:
+            cursor.execute("CREATE TABLE item (id INTEGER PRIMARY KEY)")
+        first.set_autocommit(
+            False, force_begin_transaction_with_broken_autocommit=True,
+        )
+        self.addCleanup(first.rollback)
+
+        with self.wrapper().cursor() as cursor:
+            cursor.execute("INSERT INTO item DEFAULT VALUES")
+
+    def test_deferred_transaction(self):
+        """Test deferred transactions take no lock before writing."""
+        self._begin_then_write(self.wrapper())
+
+    def test_immediate_transaction(self):
+        """Test immediate transactions take the write lock when begun."""
+        with self.assertRaisesMessage(OperationalError, "database is locked"):
+            self._begin_then_write(self.wrapper(transaction_mode="IMMEDIATE"))
+
+    def test_invalid_transaction_mode(self):
+        """Test unknown transaction modes are rejected."""
+        wrapper = self.wrapper(transaction_mode="LATER")
+
+        with self.assertRaises(ImproperlyConfigured):
+            wrapper.set_autocommit(
+                False, force_begin_transaction_with_broken_autocommit=True,
+            )
@@ -0,0 +1,175 @@
+"""
+Tests for password hashing and login throttling.
+"""
+from unittest.mock import patch
+
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import make_password
+from django.test import (
+    SimpleTestCase,
+    TestCase,
+    override_settings,
+)
+from django.urls import reverse
+
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from core import throttling
+from core.throttling import TokenBucket
+
+TOKEN_URL = reverse("user:token")
+PAYLOAD = {"email": "test@test.com", "password": "test1234"}
+
+
+class PasswordHashingTests(TestCase):
+    """Test hashing passwords at the configured cost."""
+
+    def setUp(self):
+        throttling.reset()
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user(**PAYLOAD)
+
+    def _login(self, **payload):
+        return self.client.post(TOKEN_URL, {**PAYLOAD, **payload})
+
+    @override_settings(PASSWORD_HASHERS=["core.hashers.ScryptPasswordHasher"])
+    def test_scrypt_cost_from_settings(self):
+        """Test new hashes use the scrypt parameters from settings."""
+        with override_settings(PASSWORD_SCRYPT_WORK_FACTOR=2**10):
+            self.user.set_password("test1234")
+
+        self.assertTrue(self.user.password.startswith("scrypt$1024$"))
+
+    def test_old_hasher_upgraded_on_login(self):
+        """Test a PBKDF2 hash is replaced by the preferred one on login."""
+        self.user.password = make_password("test1234", hasher="pbkdf2_sha256")
+        self.user.save()
+
+        response = self._login()
+
+        self.user.refresh_from_db()
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertTrue(self.user.password.startswith("scrypt$"))
+
+    @override_settings(PASSWORD_HASHERS=["core.hashers.ScryptPasswordHasher"])
+    def test_raised_cost_upgraded_on_login(self):
+        """Test raising the cost rehashes a password on login."""
+        with override_settings(PASSWORD_SCRYPT_WORK_FACTOR=2**10):
+            self.user.set_password("test1234")
+            self.user.save()
+
+        self._login()
+
+        self.user.refresh_from_db()
+        self.assertTrue(self.user.password.startswith("scrypt$16384$"))
+
+    def test_wrong_password_not_upgraded(self):
+        """Test a failed login leaves the stored hash alone."""
+        self.user.password = make_password("test1234", hasher="pbkdf2_sha256")
+        self.user.save()
+        encoded = self.user.password
+
+        response = self._login(password="wrong")
+
+        self.user.refresh_from_db()
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(self.user.password, encoded)
+
+    @override_settings(PASSWORD_HASH_WORKERS=0)
+    def test_inline_hashing(self):
+        """Test logins hash in the request thread without workers."""
+        with patch("core.backends.get_executor") as get_executor:
+            response = self._login()
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        get_executor.assert_not_called()
+
+    @override_settings(PASSWORD_HASH_MAX_PENDING=0)
+    def test_busy_pool_refuses_login(self):
+        """Test logins are refused while the hashing pool is full."""
+        response = self._login()
+
+        self.assertEqual(
+            response.status_code, status.HTTP_503_SERVICE_UNAVAILABLE,
+        )
+        self.assertEqual(response["Retry-After"], "1")
+
+
+@override_settings(LOGIN_THROTTLE_RATES={"ip": "5/min", "account": "2/min"})
+class LoginThrottleTests(TestCase):
+    """Test login rate limits."""
+
+    def setUp(self):
+        throttling.reset()
+        self.addCleanup(throttling.reset)
+        self.client = APIClient()
+
+    def test_account_throttled(self):
+        """Test an account is throttled whatever the address."""
+        for address in ("10.0.0.1", "10.0.0.2"):
+            self.client.post(TOKEN_URL, PAYLOAD, REMOTE_ADDR=address)
+
+        response = self.client.post(
+            TOKEN_URL, {**PAYLOAD, "email": "TEST@test.com"},
+            REMOTE_ADDR="10.0.0.3",
+        )
+        other = self.client.post(
+            TOKEN_URL, {**PAYLOAD, "email": "other@test.com"},
+            REMOTE_ADDR="10.0.0.3",
+        )
+
+        self.assertEqual(
+            response.status_code, status.HTTP_429_TOO_MANY_REQUESTS,
+        )
+        self.assertEqual(response["Retry-After"], "30")
+        self.assertEqual(other.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_address_throttled(self):
+        """Test an address is throttled whatever the accounts."""
+        for i in range(5):
+            self.client.post(TOKEN_URL, {**PAYLOAD, "email": f"{i}@test.com"})
+
+        response = self.client.post(TOKEN_URL, PAYLOAD)
+
+        self.assertEqual(
+            response.status_code, status.HTTP_429_TOO_MANY_REQUESTS,
+        )
+
+    def test_non_object_body(self):
+        """Test a JSON body that isn't an object is rejected, not a 500."""
+        for body in ([PAYLOAD], "test@test.com"):
+            response = self.client.post(TOKEN_URL, body, format="json")
+
+            self.assertEqual(
+                response.status_code, status.HTTP_400_BAD_REQUEST, body,
+            )
+
+
+class TokenBucketTests(SimpleTestCase):
+    """Test the token bucket."""
+
+    @patch("core.throttling.time.monotonic")
+    def test_refill(self, monotonic):
+        """Test a bucket refills at its rate up to its capacity."""
+        bucket = TokenBucket()
+        monotonic.return_value = 0
+        self.assertEqual([bucket.take("a", 2, 0.5) for _ in range(3)],
+                         [0, 0, 2])
+
+        monotonic.return_value = 2
+        self.assertEqual(bucket.take("a", 2, 0.5), 0)
+        self.assertEqual(bucket.take("a", 2, 0.5), 2)
+
+        monotonic.return_value = 100
+        self.assertEqual([bucket.take("a", 2, 0.5) for _ in range(3)],
+                         [0, 0, 2])
+
+    @patch("core.throttling.MAX_BUCKETS", 2)
+    def test_bounded(self):
+        """Test the least recently used buckets are dropped."""
+        bucket = TokenBucket()
+        for key in "abc":
+            bucket.take(key, 1, 1)
+
+        self.assertEqual(list(bucket._buckets), ["b", "c"])
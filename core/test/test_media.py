@@ -0,0 +1,227 @@
+"""
+Tests for the media view.
+"""
+import hashlib
+import os
+import shutil
+import tempfile
+
+from django.test import (
+    SimpleTestCase,
+    TestCase,
+    override_settings,
+)
+from django.urls import reverse
+
+from core.views import (
+    FileRange,
+    RangeNotSatisfiable,
+    parse_range,
+)
+
+CONTENT = bytes(range(256)) * 40
+DIGEST = hashlib.sha256(CONTENT).hexdigest()
+CONTENT_NAME = f"uploads/recipe/{DIGEST[:2]}/{DIGEST[2:4]}/{DIGEST}.png"
+LEGACY_NAME = "uploads/recipe/legacy.png"
+
+
+def media_url(name):
+    """Return the URL of media file ``name``."""
+    return reverse("media", args=[name])
+
+
+@override_settings(MEDIA_SENDFILE_HEADER=None, MEDIA_MAX_AGE=600)
+class MediaViewTests(TestCase):
+    """Test serving media files."""
+
+    def setUp(self):
+        self.media_root = tempfile.mkdtemp()
+        settings_override = override_settings(MEDIA_ROOT=self.media_root)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+        self.addCleanup(shutil.rmtree, self.media_root)
+
+        for name in (CONTENT_NAME, LEGACY_NAME):
+            path = os.path.join(self.media_root, name)
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            with open(path, "wb") as file:
+                file.write(CONTENT)
+
+    def test_serve_file(self):
+        """Test a file is served whole with its type and length."""
+        response = self.client.get(media_url(CONTENT_NAME))
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(b"".join(response.streaming_content), CONTENT)
+        self.assertEqual(response["Content-Type"], "image/png")
+        self.assertEqual(response["Content-Length"], str(len(CONTENT)))
+        self.assertEqual(response["Accept-Ranges"], "bytes")
+
+    def test_content_name_immutable(self):
+        """Test content-addressed files are cached as immutable."""
+        response = self.client.get(media_url(CONTENT_NAME))
+
+        self.assertEqual(
+            response["Cache-Control"],
+            "public, max-age=31536000, immutable",
+        )
+        self.assertEqual(response["ETag"], f'"{DIGEST}"')
+
+    def test_other_name_revalidated(self):
+        """Test other files are cached for MEDIA_MAX_AGE."""
+        response = self.client.get(media_url(LEGACY_NAME))
+
+        self.assertEqual(response["Cache-Control"], "public, max-age=600")
+        self.assertIn("Last-Modified", response)
+
+    def test_if_none_match(self):
+        """Test a matching ETag is answered with 304."""
+        etag = self.client.get(media_url(LEGACY_NAME))["ETag"]
+
+        response = self.client.get(
+            media_url(LEGACY_NAME), HTTP_IF_NONE_MATCH=etag,
+        )
+
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response.content, b"")
+        self.assertEqual(response["ETag"], etag)
+
+    def test_if_modified_since(self):
+        """Test an unmodified file is answered with 304."""
+        response = self.client.get(media_url(LEGACY_NAME))
+        last_modified = response["Last-Modified"]
+
+        response = self.client.get(
+            media_url(LEGACY_NAME), HTTP_IF_MODIFIED_SINCE=last_modified,
+        )
+
+        self.assertEqual(response.status_code, 304)
+
+    def test_range(self):
+        """Test a byte range is served with 206."""
+        response = self.client.get(
+            media_url(CONTENT_NAME), HTTP_RANGE="bytes=100-1099",
+        )
+
+        self.assertEqual(response.status_code, 206)
+        self.assertEqual(
+            b"".join(response.streaming_content), CONTENT[100:1100],
+        )
+        self.assertEqual(response["Content-Length"], "1000")
+        self.assertEqual(
+            response["Content-Range"], f"bytes 100-1099/{len(CONTENT)}",
+        )
+
+    def test_suffix_range(self):
+        """Test a range of the last bytes is served."""
+        response = self.client.get(
+            media_url(CONTENT_NAME), HTTP_RANGE="bytes=-10",
+        )
+
+        self.assertEqual(response.status_code, 206)
+        self.assertEqual(b"".join(response.streaming_content), CONTENT[-10:])
+
+    def test_unsatisfiable_range(self):
+        """Test a range past the end is answered with 416."""
+        response = self.client.get(
+            media_url(CONTENT_NAME), HTTP_RANGE=f"bytes={len(CONTENT)}-",
+        )
+
+        self.assertEqual(response.status_code, 416)
+        self.assertEqual(response["Content-Range"], f"bytes */{len(CONTENT)}")
+
+    def test_if_range_mismatch(self):
+        """Test a stale If-Range gets the whole file."""
+        response = self.client.get(
+            media_url(CONTENT_NAME),
+            HTTP_RANGE="bytes=0-9",
+            HTTP_IF_RANGE='"stale"',
+        )
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(b"".join(response.streaming_content), CONTENT)
+
+    def test_head(self):
+        """Test HEAD sends the headers without the file."""
+        response = self.client.head(media_url(CONTENT_NAME))
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.content, b"")
+        self.assertEqual(response["Content-Length"], str(len(CONTENT)))
+
+    def test_post_not_allowed(self):
+        """Test only safe methods are allowed."""
+        response = self.client.post(media_url(CONTENT_NAME))
+
+        self.assertEqual(response.status_code, 405)
+
+    def test_missing_file(self):
+        """Test missing files, directories and traversal are 404."""
+        for name in ("uploads/recipe/none.png", "uploads/recipe", "../etc"):
+            with self.subTest(name=name):
+                response = self.client.get(media_url(name))
+
+                self.assertEqual(response.status_code, 404)
+
+    @override_settings(MEDIA_SENDFILE_HEADER="X-Accel-Redirect")
+    def test_x_accel_redirect(self):
+        """Test nginx is told to send the file itself."""
+        response = self.client.get(media_url(CONTENT_NAME))
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.content, b"")
+        self.assertEqual(
+            response["X-Accel-Redirect"], f"/protected-media/{CONTENT_NAME}",
+        )
+        self.assertEqual(response["Content-Type"], "image/png")
+        self.assertIn("immutable", response["Cache-Control"])
+
+    @override_settings(MEDIA_SENDFILE_HEADER="X-Sendfile")
+    def test_x_sendfile(self):
+        """Test the front end server is given the file path."""
+        response = self.client.get(media_url(CONTENT_NAME))
+
+        self.assertEqual(
+            response["X-Sendfile"],
+            os.path.join(self.media_root, CONTENT_NAME),
+        )
+
+
+class ParseRangeTests(SimpleTestCase):
+    """Test parsing Range headers."""
+
+    def test_ranges(self):
+        """Test the offsets of well-formed ranges."""
+        cases = {
+            "bytes=0-0": (0, 1),
+            "bytes=10-": (10, 100),
+            "bytes=90-200": (90, 100),
+            "bytes=-30": (70, 100),
+            "bytes=-200": (0, 100),
+        }
+        for header, expected in cases.items():
+            with self.subTest(header=header):
+                self.assertEqual(parse_range(header, 100), expected)
+
+    def test_ignored(self):
+        """Test malformed and multiple ranges are ignored."""
+        for header in ("bytes=-", "bytes=5-1", "bytes=0-1,5-6", "lines=0-1"):
+            with self.subTest(header=header):
+                self.assertIsNone(parse_range(header, 100))
+
+    def test_unsatisfiable(self):
+        """Test ranges outside the file are unsatisfiable."""
+        for header in ("bytes=100-", "bytes=-0"):
+            with self.subTest(header=header):
+                with self.assertRaises(RangeNotSatisfiable):
+                    parse_range(header, 100)
+
+    def test_file_range_reads_range(self):
+        """Test a file range stops at its end."""
+        with tempfile.TemporaryFile() as file:
+            file.write(CONTENT)
+            file_range = FileRange(file, 10, 20)
+
+            self.assertEqual(file_range.tell(), 10)
+            self.assertEqual(file_range.read(), CONTENT[10:20])
+            self.assertEqual(file_range.read(), b"")
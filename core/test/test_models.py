@@ -57,6 +57,17 @@ class ModelTests(TestCase):
         self.assertTrue(user.is_staff)
         
     
+    def test_saving_user_keeps_data_version(self):
+        """Test saving a loaded user keeps data versions bumped since."""
+        user = create_user()
+        get_user_model().objects.touch_data(user.id)
+
+        user.name = "Renamed"
+        user.save()
+
+        user.refresh_from_db()
+        self.assertEqual((user.name, user.data_version), ("Renamed", 1))
+
     def test_create_recipe(self):
         """Test creating recipes."""
         user = get_user_model().objects.create_user(
@@ -0,0 +1,103 @@
+"""
+Test the orjson renderer and parser match DRF's stdlib ones.
+"""
+import io
+import uuid
+from collections import OrderedDict
+from datetime import (
+    date,
+    datetime,
+    timezone,
+)
+from decimal import Decimal
+from unittest.mock import patch
+
+from django.test import SimpleTestCase
+from django.utils.translation import gettext_lazy
+
+from rest_framework import renderers
+from rest_framework.exceptions import ParseError
+
+from core.parsers import JSONParser
+from core.renderers import JSONRenderer
+
+SAMPLE = OrderedDict([
+    ("id", 1),
+    ("title", "Crème brûlée\u2028new\u2029line"),
+    ("price", Decimal("4.50")),
+    ("label", gettext_lazy("Recipe")),
+    ("created", datetime(2024, 5, 1, 12, 30, 5, 123456, tzinfo=timezone.utc)),
+    ("day", date(2024, 5, 1)),
+    ("uuid", uuid.UUID("12345678-1234-5678-1234-567812345678")),
+    ("deleted", {1: [2, 3]}),
+    ("tags", [{"id": 1, "name": "Vegan"}, None, True, 1.5]),
+])
+
+
+class JSONRendererTests(SimpleTestCase):
+    """Test rendering JSON with orjson."""
+
+    def test_matches_drf_renderer(self):
+        """Test the output is byte-identical to DRF's renderer."""
+        self.assertEqual(
+            JSONRenderer().render(SAMPLE),
+            renderers.JSONRenderer().render(SAMPLE),
+        )
+
+    def test_none_renders_empty(self):
+        """Test no data renders an empty body."""
+        self.assertEqual(JSONRenderer().render(None), b"")
+
+    def test_indent_falls_back(self):
+        """Test indented output is rendered like DRF's renderer."""
+        media_type = "application/json; indent=4"
+
+        self.assertEqual(
+            JSONRenderer().render(SAMPLE, media_type),
+            renderers.JSONRenderer().render(SAMPLE, media_type),
+        )
+
+    def test_without_orjson(self):
+        """Test rendering falls back to the stdlib without orjson."""
+        with patch("core.renderers.orjson", None):
+            rendered = JSONRenderer().render(SAMPLE)
+
+        self.assertEqual(rendered, renderers.JSONRenderer().render(SAMPLE))
+
+
+class JSONParserTests(SimpleTestCase):
+    """Test parsing JSON with orjson."""
+
+    def test_parse(self):
+        """Test parsing a JSON body."""
+        stream = io.BytesIO('{"title": "Plov", "price": 4.5}'.encode())
+
+        self.assertEqual(
+            JSONParser().parse(stream),
+            {"title": "Plov", "price": 4.5},
+        )
+
+    def test_invalid_json(self):
+        """Test malformed JSON raises a parse error."""
+        with self.assertRaises(ParseError):
+            JSONParser().parse(io.BytesIO(b'{"title": '))
+
+    def test_nan_rejected(self):
+        """Test NaN is rejected as in DRF's strict mode."""
+        with self.assertRaises(ParseError):
+            JSONParser().parse(io.BytesIO(b'{"price": NaN}'))
+
+    def test_other_encoding_falls_back(self):
+        """Test non UTF-8 bodies are decoded by the stdlib parser."""
+        stream = io.BytesIO('{"title": "Crème"}'.encode("utf-16"))
+
+        data = JSONParser().parse(stream, parser_context={"encoding": "utf-16"})
+
+        self.assertEqual(data, {"title": "Crème"})
+
+    def test_without_orjson(self):
+        """Test parsing falls back to the stdlib without orjson."""
+        with patch("core.parsers.orjson", None):
+            data = JSONParser().parse(io.BytesIO(b'{"id": 1}'))
+
+        self.assertEqual(data, {"id": 1})
@@ -0,0 +1,117 @@
+"""
+Tests for the recipe search index.
+"""
+from decimal import Decimal
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.test import TestCase
+
+from core import search
+from core.models import (
+    Recipe,
+    Tag,
+    Ingredient,
+)
+
+
+def create_recipe(user, **params):
+    """Create and return a sample recipe."""
+    defaults = {
+        "title": "Sample recipe",
+        "time_minutes": 10,
+        "price": Decimal("5.00"),
+    }
+    defaults.update(params)
+
+    return Recipe.objects.create(user=user, **defaults)
+
+
+class SearchIndexTests(TestCase):
+    """Test the search index follows recipe changes."""
+
+    def setUp(self):
+        self.user = get_user_model().objects.create_user(
+            email="test@test.com",
+            password="1234test",
+        )
+
+    def _search(self, query):
+        queryset = search.get_backend().search(
+            Recipe.objects.filter(user=self.user), query,
+        )
+        return list(queryset.order_by("-search_rank", "-id"))
+
+    def test_index_title_and_description(self):
+        """Test new recipes are searchable by title and description."""
+        plov = create_recipe(self.user, title="Uzbek plov")
+        soup = create_recipe(self.user, description="Served with plov")
+        create_recipe(self.user, title="Manti")
+
+        self.assertEqual(self._search("plov"), [plov, soup])
+
+    def test_title_ranks_above_description(self):
+        """Test title matches outrank description matches."""
+        soup = create_recipe(self.user, description="Rice soup")
+        rice = create_recipe(self.user, title="Rice")
+
+        self.assertEqual(self._search("rice"), [rice, soup])
+
+    def test_all_terms_must_match(self):
+        """Test every search term has to match."""
+        plov = create_recipe(self.user, title="Wedding plov")
+        create_recipe(self.user, title="Fergana plov")
+
+        self.assertEqual(self._search("plov wedding"), [plov])
+
+    def test_query_syntax_is_escaped(self):
+        """Test search operators in user input are treated as text."""
+        create_recipe(self.user, title="Plov")
+
+        self.assertEqual(self._search('plov" OR "x'), [])
+        self.assertEqual(self._search("NEAR(plov"), [])
+
+    def test_index_follows_tags_and_ingredients(self):
+        """Test linking, renaming and deleting attributes reindexes."""
+        recipe = create_recipe(self.user, title="Plov")
+        tag = Tag.objects.create(user=self.user, name="Wedding")
+        ingredient = Ingredient.objects.create(user=self.user, name="Quince")
+
+        recipe.tags.add(tag)
+        recipe.ingredients.add(ingredient)
+        self.assertEqual(self._search("wedding"), [recipe])
+        self.assertEqual(self._search("quince"), [recipe])
+
+        tag.name = "Festive"
+        tag.save()
+        self.assertEqual(self._search("wedding"), [])
+        self.assertEqual(self._search("festive"), [recipe])
+
+        ingredient.delete()
+        self.assertEqual(self._search("quince"), [])
+
+        tag.recipe_set.clear()
+        self.assertEqual(self._search("festive"), [])
+
+    def test_update_and_delete_recipe(self):
+        """Test updates and deletes reach the index."""
+        recipe = create_recipe(self.user, title="Plov")
+
+        recipe.title = "Lagman"
+        recipe.save()
+        self.assertEqual(self._search("plov"), [])
+        self.assertEqual(self._search("lagman"), [recipe])
+
+        recipe.delete()
+        self.assertEqual(self._search("lagman"), [])
+
+    def test_rebuild_search_index_command(self):
+        """Test the rebuild command reindexes every recipe."""
+        recipes = [create_recipe(self.user, title="Plov") for _ in range(3)]
+        search.get_backend().clear()
+        self.assertEqual(self._search("plov"), [])
+
+        call_command("rebuild_search_index", batch_size=2, stdout=StringIO())
+
+        self.assertEqual(self._search("plov"), recipes[::-1])
@@ -0,0 +1,191 @@
+"""
+Tests for the per-user recipe stats and usage counts.
+"""
+from decimal import Decimal
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.test import TestCase
+
+from core import stats
+from core.models import (
+    Recipe,
+    RecipeStats,
+    Tag,
+    Ingredient,
+)
+
+
+def create_recipe(user, **params):
+    """Create and return a sample recipe."""
+    defaults = {
+        "title": "Sample recipe",
+        "time_minutes": 10,
+        "price": Decimal("5.00"),
+    }
+    defaults.update(params)
+
+    return Recipe.objects.create(user=user, **defaults)
+
+
+class RecipeStatsTests(TestCase):
+    """Test the stats and usage counts follow writes."""
+
+    def setUp(self):
+        self.user = get_user_model().objects.create_user(
+            email="test@test.com",
+            password="1234test",
+        )
+
+    def _counts(self):
+        """Return the user's stats and the usage count of each tag."""
+        row = RecipeStats.objects.filter(user=self.user).values(
+            *stats.STATS_FIELDS,
+        ).first()
+        uses = dict(Tag.objects.values_list("name", "recipe_count"))
+        return row, uses
+
+    def assertCounted(self):
+        """Assert the counts kept on writes match recounting them."""
+        kept = self._counts()
+        stats.rebuild()
+        self.assertEqual(kept, self._counts())
+
+    def test_new_user_stats(self):
+        """Test new users start with empty stats."""
+        row = RecipeStats.objects.get(user=self.user)
+
+        self.assertEqual(row.recipe_count, 0)
+        self.assertEqual(row.total_time_minutes, 0)
+        self.assertIsNone(row.avg_time_minutes)
+
+    def test_recipe_saves_and_deletes(self):
+        """Test recipes and their cook times are counted."""
+        recipe = create_recipe(self.user, time_minutes=10)
+        create_recipe(self.user, time_minutes=30)
+        recipe = Recipe.objects.get(id=recipe.id)
+        recipe.time_minutes = 20
+        recipe.save()
+
+        row = stats.get(self.user.id)
+        self.assertEqual(row.recipe_count, 2)
+        self.assertEqual(row.avg_time_minutes, 25)
+        self.assertCounted()
+
+        recipe.delete()
+        self.assertEqual(stats.get(self.user.id).total_time_minutes, 30)
+        self.assertCounted()
+
+    def test_deferred_time_minutes(self):
+        """Test saving a recipe loaded without its cook time."""
+        recipe = create_recipe(self.user, time_minutes=10)
+
+        recipe = Recipe.objects.only("id", "title").get(id=recipe.id)
+        recipe.title = "Renamed"
+        recipe.save()
+        recipe.time_minutes += 5
+        recipe.save()
+
+        self.assertEqual(stats.get(self.user.id).total_time_minutes, 15)
+        self.assertCounted()
+
+    def test_tag_links(self):
+        """Test tag uses follow links from either side."""
+        dinner = Tag.objects.create(user=self.user, name="Dinner")
+        quick = Tag.objects.create(user=self.user, name="Quick")
+        plov = create_recipe(self.user)
+        soup = create_recipe(self.user)
+
+        plov.tags.add(dinner, quick)
+        plov.tags.add(dinner)
+        quick.recipe_set.add(soup)
+        self.assertEqual(self._counts()[1], {"Dinner": 1, "Quick": 2})
+        self.assertCounted()
+
+        soup.tags.remove(dinner, quick)
+        self.assertEqual(self._counts()[1], {"Dinner": 1, "Quick": 1})
+        dinner.recipe_set.remove(soup)
+        quick.recipe_set.clear()
+        plov.tags.set([quick])
+        self.assertEqual(self._counts()[1], {"Dinner": 0, "Quick": 1})
+        self.assertCounted()
+
+        plov.tags.clear()
+        self.assertCounted()
+
+    def test_deletes_uncount_links(self):
+        """Test deleting recipes and tags updates the counts."""
+        dinner = Tag.objects.create(user=self.user, name="Dinner")
+        salt = Ingredient.objects.create(user=self.user, name="Salt")
+        plov = create_recipe(self.user)
+        plov.tags.add(dinner)
+        plov.ingredients.add(salt)
+        create_recipe(self.user).tags.add(dinner)
+
+        plov.delete()
+        self.assertEqual(Tag.objects.get(id=dinner.id).recipe_count, 1)
+        self.assertEqual(Ingredient.objects.get(id=salt.id).recipe_count, 0)
+        self.assertCounted()
+
+        dinner.delete()
+        self.assertEqual(stats.get(self.user.id).tag_count, 0)
+        self.assertCounted()
+
+    def test_saving_tag_keeps_count(self):
+        """Test saving a loaded tag keeps uses counted since."""
+        tag = Tag.objects.create(user=self.user, name="Dinner")
+        create_recipe(self.user).tags.add(tag)
+
+        tag.name = "Supper"
+        tag.save()
+
+        tag.refresh_from_db()
+        self.assertEqual((tag.name, tag.recipe_count), ("Supper", 1))
+
+    def test_missing_stats_counted(self):
+        """Test users without a stats row get theirs counted."""
+        create_recipe(self.user, time_minutes=40)
+        RecipeStats.objects.all().delete()
+
+        self.assertEqual(stats.get(self.user.id).recipe_count, 1)
+
+        RecipeStats.objects.all().delete()
+        create_recipe(self.user, time_minutes=20)
+        self.assertEqual(stats.get(self.user.id).total_time_minutes, 60)
+
+    def test_delete_user(self):
+        """Test deleting a user drops their stats."""
+        create_recipe(self.user).tags.create(user=self.user, name="Dinner")
+
+        self.user.delete()
+
+        self.assertFalse(RecipeStats.objects.exists())
+
+    def test_rebuild_recipe_stats_command(self):
+        """Test the rebuild command recounts stats and uses."""
+        users = [self.user] + [
+            get_user_model().objects.create_user(
+                email=f"user{i}@test.com", password="1234test",
+            )
+            for i in range(2)
+        ]
+        for user in users:
+            create_recipe(user, time_minutes=10).tags.create(
+                user=user, name=f"Tag {user.id}",
+            )
+        RecipeStats.objects.update(recipe_count=5, total_time_minutes=0)
+        Tag.objects.update(recipe_count=0)
+
+        call_command("rebuild_recipe_stats", batch_size=2, stdout=StringIO())
+
+        self.assertEqual(
+            list(RecipeStats.objects.values_list(
+                "recipe_count", "tag_count", "total_time_minutes",
+            )),
+            [(1, 1, 10)] * 3,
+        )
+        self.assertEqual(
+            list(Tag.objects.values_list("recipe_count", flat=True)),
+            [1] * 3,
+        )
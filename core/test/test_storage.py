@@ -0,0 +1,204 @@
+"""
+Tests for content-addressed recipe image storage.
+"""
+import hashlib
+import os
+import shutil
+import tempfile
+from decimal import Decimal
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.files.base import ContentFile
+from django.core.management import call_command
+from django.test import (
+    TestCase,
+    override_settings,
+)
+
+from core import storage
+from core.models import Recipe
+
+CONTENT = b"recipe image bytes"
+DIGEST = hashlib.sha256(CONTENT).hexdigest()
+CONTENT_NAME = f"uploads/recipe/{DIGEST[:2]}/{DIGEST[2:4]}/{DIGEST}.jpg"
+
+
+@override_settings(RECIPE_IMAGE_GRACE_SECONDS=0)
+class StorageTestCase(TestCase):
+    """Run against an empty media root."""
+
+    def setUp(self):
+        self.media_root = tempfile.mkdtemp()
+        settings_override = override_settings(MEDIA_ROOT=self.media_root)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+        self.addCleanup(shutil.rmtree, self.media_root)
+
+        self.user = get_user_model().objects.create_user(
+            email="test@test.com",
+            password="1234test",
+        )
+
+    def create_recipe(self, image=""):
+        """Create and return a recipe using the stored ``image``."""
+        return Recipe.objects.create(
+            user=self.user,
+            title="Sample recipe",
+            time_minutes=10,
+            price=Decimal("5.00"),
+            image=image,
+        )
+
+    def write(self, name, content=CONTENT, old=False):
+        """Write a file into the media root, modified long ago if ``old``."""
+        path = os.path.join(self.media_root, name)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, "wb") as file:
+            file.write(content)
+        if old:
+            os.utime(path, (0, 0))
+
+        return path
+
+    def exists(self, name):
+        """Return whether ``name`` is in the media root."""
+        return os.path.exists(os.path.join(self.media_root, name))
+
+
+class ContentAddressedStorageTests(StorageTestCase):
+    """Test naming and deduplicating stored files."""
+
+    def test_named_by_content(self):
+        """Test files are named by digest in shard directories."""
+        name = storage.image_storage.save(
+            "uploads/recipe/photo.JPG", ContentFile(CONTENT),
+        )
+
+        self.assertEqual(name, CONTENT_NAME)
+        self.assertTrue(self.exists(CONTENT_NAME))
+
+    def test_content_hash_used(self):
+        """Test a digest computed during the upload isn't recomputed."""
+        content = ContentFile(CONTENT)
+        content.content_hash = "ab" * 32
+
+        name = storage.image_storage.save("uploads/recipe/a.png", content)
+
+        self.assertEqual(name, f"uploads/recipe/ab/ab/{'ab' * 32}.png")
+
+    def test_identical_content_stored_once(self):
+        """Test saving the same content again reuses the stored file."""
+        first = storage.image_storage.save(
+            "uploads/recipe/a.jpg", ContentFile(CONTENT),
+        )
+        os.utime(os.path.join(self.media_root, first), (0, 0))
+
+        second = storage.image_storage.save(
+            "uploads/recipe/b.jpg", ContentFile(CONTENT),
+        )
+
+        self.assertEqual(first, second)
+        self.assertEqual(
+            os.listdir(os.path.dirname(os.path.join(self.media_root, first))),
+            [os.path.basename(first)],
+        )
+        self.assertTrue(storage.image_storage.modified_within(second, 60))
+
+
+class ReleaseImageTests(StorageTestCase):
+    """Test deleting images no recipe uses."""
+
+    def test_deleting_last_reference_deletes_files(self):
+        """Test deleting the only recipe using an image deletes it."""
+        self.write(CONTENT_NAME, old=True)
+        rendition = self.write(CONTENT_NAME.replace(".jpg", "-medium.webp"))
+        recipe = self.create_recipe(CONTENT_NAME)
+        Recipe.objects.filter(id=recipe.id).update(
+            renditions={"medium": os.path.relpath(rendition, self.media_root)},
+        )
+        recipe.refresh_from_db()
+
+        with self.captureOnCommitCallbacks(execute=True):
+            recipe.delete()
+
+        self.assertFalse(self.exists(CONTENT_NAME))
+        self.assertFalse(os.path.exists(rendition))
+
+    def test_shared_image_kept(self):
+        """Test an image another recipe uses is kept."""
+        self.write(CONTENT_NAME, old=True)
+        recipe = self.create_recipe(CONTENT_NAME)
+        self.create_recipe(CONTENT_NAME)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            recipe.delete()
+
+        self.assertTrue(self.exists(CONTENT_NAME))
+
+    @override_settings(RECIPE_IMAGE_GRACE_SECONDS=60)
+    def test_recently_used_image_kept(self):
+        """Test an image reused within the grace period is kept."""
+        self.write(CONTENT_NAME)
+        recipe = self.create_recipe(CONTENT_NAME)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            recipe.delete()
+
+        self.assertTrue(self.exists(CONTENT_NAME))
+
+
+class ImageStorageCommandTests(StorageTestCase):
+    """Test migrating to and collecting garbage from image storage."""
+
+    def test_migrate_image_storage(self):
+        """Test existing images are copied to content-addressed names."""
+        self.write("uploads/recipe/legacy.jpg")
+        self.write("uploads/recipe/legacy-thumbnail.webp", b"thumbnail")
+        recipe = self.create_recipe("uploads/recipe/legacy.jpg")
+        Recipe.objects.filter(id=recipe.id).update(
+            renditions={"thumbnail": "uploads/recipe/legacy-thumbnail.webp"},
+        )
+
+        call_command("migrate_image_storage", stdout=StringIO())
+
+        recipe.refresh_from_db()
+        self.assertEqual(recipe.image.name, CONTENT_NAME)
+        self.assertEqual(
+            recipe.renditions,
+            {"thumbnail": CONTENT_NAME.replace(".jpg", "-thumbnail.webp")},
+        )
+        self.assertTrue(self.exists(recipe.renditions["thumbnail"]))
+        self.assertTrue(self.exists("uploads/recipe/legacy.jpg"))
+
+    def test_migrate_dry_run(self):
+        """Test a dry run changes nothing."""
+        self.write("uploads/recipe/legacy.jpg")
+        recipe = self.create_recipe("uploads/recipe/legacy.jpg")
+
+        call_command("migrate_image_storage", "--dry-run", stdout=StringIO())
+
+        recipe.refresh_from_db()
+        self.assertEqual(recipe.image.name, "uploads/recipe/legacy.jpg")
+        self.assertFalse(self.exists(CONTENT_NAME))
+
+    def test_collect_image_garbage(self):
+        """Test unused files past the grace period are deleted."""
+        self.write(CONTENT_NAME, old=True)
+        self.write(CONTENT_NAME.replace(".jpg", "-medium.webp"), old=True)
+        self.create_recipe(CONTENT_NAME)
+        self.write("uploads/recipe/legacy.jpg", old=True)
+        self.write("uploads/recipe/legacy-medium.webp", old=True)
+        self.write("uploads/recipe/fresh.jpg")
+
+        out = StringIO()
+        call_command("collect_image_garbage", "--grace=60", stdout=out)
+
+        self.assertIn("2 unused files", out.getvalue())
+        self.assertTrue(self.exists(CONTENT_NAME))
+        self.assertTrue(
+            self.exists(CONTENT_NAME.replace(".jpg", "-medium.webp"))
+        )
+        self.assertFalse(self.exists("uploads/recipe/legacy.jpg"))
+        self.assertFalse(self.exists("uploads/recipe/legacy-medium.webp"))
+        self.assertTrue(self.exists("uploads/recipe/fresh.jpg"))
@@ -0,0 +1,106 @@
+"""
+In-memory token bucket throttles for logins.
+"""
+import threading
+import time
+from collections import OrderedDict
+from collections.abc import Mapping
+
+from django.conf import settings
+
+from rest_framework.throttling import BaseThrottle
+
+# Buckets kept per throttle; the least recently used are dropped past it.
+MAX_BUCKETS = 100_000
+
+DURATIONS = {"s": 1, "m": 60, "h": 3600, "d": 86400}
+
+
+def parse_rate(rate):
+    """Return the capacity and refill per second of a ``"<n>/<period>"``."""
+    count, period = rate.split("/")
+
+    return int(count), int(count) / DURATIONS[period[0]]
+
+
+class TokenBucket:
+    """Per-key token buckets, each holding at most ``capacity`` tokens.
+
+    A bucket starts full and gains ``refill`` tokens a second; a request
+    takes a token or is refused. Past ``MAX_BUCKETS`` keys the least
+    recently used bucket, the likeliest to have refilled, is dropped.
+    """
+
+    def __init__(self):
+        self._buckets = OrderedDict()
+        self._lock = threading.Lock()
+
+    def take(self, key, capacity, refill):
+        """Take a token for ``key``; return the seconds to wait if empty."""
+        now = time.monotonic()
+        with self._lock:
+            tokens, updated = self._buckets.pop(key, (capacity, now))
+            tokens = min(capacity, tokens + (now - updated) * refill)
+            wait = 0 if tokens >= 1 else (1 - tokens) / refill
+            if not wait:
+                tokens -= 1
+            self._buckets[key] = (tokens, now)
+            if len(self._buckets) > MAX_BUCKETS:
+                self._buckets.popitem(last=False)
+
+        return wait
+
+    def clear(self):
+        """Refill every bucket."""
+        with self._lock:
+            self._buckets.clear()
+
+
+class LoginRateThrottle(BaseThrottle):
+    """Throttle logins by ``get_key`` at ``LOGIN_THROTTLE_RATES[scope]``."""
+    scope = None
+    buckets = None
+
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+        cls.buckets = TokenBucket()
+
+    def get_key(self, request):
+        raise NotImplementedError
+
+    def allow_request(self, request, view):
+        key = self.get_key(request)
+        if key is None:
+            return True
+        rate = settings.LOGIN_THROTTLE_RATES[self.scope]
+        self.wait_time = self.buckets.take(key, *parse_rate(rate))
+
+        return not self.wait_time
+
+    def wait(self):
+        return self.wait_time
+
+
+class LoginIPThrottle(LoginRateThrottle):
+    """Throttle logins per client address."""
+    scope = "ip"
+
+    def get_key(self, request):
+        return self.get_ident(request)
+
+
+class LoginAccountThrottle(LoginRateThrottle):
+    """Throttle logins per account tried, whatever address they come from."""
+    scope = "account"
+
+    def get_key(self, request):
+        if not isinstance(request.data, Mapping):
+            return None
+        email = request.data.get("email")
+        return email.strip().lower() if isinstance(email, str) else None
+
+
+def reset():
+    """Refill every login bucket."""
+    for throttle in (LoginIPThrottle, LoginAccountThrottle):
+        throttle.buckets.clear()
@@ -0,0 +1,152 @@
+"""
+Signed access tokens and rotating refresh tokens.
+
+Access tokens are signed with Django's ``signing`` module and verified
+without the database; they expire after ``AUTH_ACCESS_TOKEN_TTL`` seconds
+and can't be revoked before that. They are signed with ``SECRET_KEY`` and
+verified against ``SECRET_KEY_FALLBACKS`` as well, so keys are rotated by
+moving the old key to the fallbacks until its tokens have expired.
+
+Refresh tokens are random, stored hashed, and rotate: each use revokes the
+token and issues the next one in its family. Presenting a revoked token
+again means it leaked, so its whole family is revoked.
+"""
+import hashlib
+import secrets
+import uuid
+from datetime import timedelta
+
+from django.conf import settings
+from django.core import signing
+from django.db import transaction
+from django.utils import timezone
+from django.utils.translation import gettext_lazy as _
+
+from rest_framework import exceptions
+
+from core.models import RefreshToken
+
+ACCESS_SALT = "core.tokens.access"
+
+
+def access_token(user):
+    """Return a signed access token for ``user``.
+
+    The token carries the user's permission flags as well as their id, so
+    verifying it needs no query.
+    """
+    return signing.dumps({
+        "u": user.pk,
+        "a": user.is_active,
+        "s": user.is_staff,
+        "su": user.is_superuser,
+    }, salt=ACCESS_SALT)
+
+
+def verify_access_token(token):
+    """Return the user id and permission flags of a valid access token.
+
+    Raises ``AuthenticationFailed`` if the token is invalid or expired.
+    Tokens signed without flags are those of an active user who is neither
+    staff nor superuser.
+    """
+    try:
+        payload = signing.loads(
+            token, salt=ACCESS_SALT, max_age=settings.AUTH_ACCESS_TOKEN_TTL,
+        )
+    except signing.SignatureExpired:
+        raise exceptions.AuthenticationFailed(_("Token expired."))
+    except signing.BadSignature:
+        raise exceptions.AuthenticationFailed(_("Invalid token."))
+
+    return {
+        "id": payload["u"],
+        "is_active": payload.get("a", True),
+        "is_staff": payload.get("s", False),
+        "is_superuser": payload.get("su", False),
+    }
+
+
+def _hash(token):
+    return hashlib.sha256(token.encode()).hexdigest()
+
+
+def _refresh_token(user, family):
+    """Store and return a new refresh token in ``family``."""
+    token = secrets.token_urlsafe(32)
+    RefreshToken.objects.create(
+        user=user,
+        token_hash=_hash(token),
+        family=family,
+        expires_at=timezone.now() + timedelta(
+            seconds=settings.AUTH_REFRESH_TOKEN_TTL
+        ),
+    )
+
+    return token
+
+
+def _pair(user, refresh):
+    return {
+        "access": access_token(user),
+        "refresh": refresh,
+        "expires_in": settings.AUTH_ACCESS_TOKEN_TTL,
+    }
+
+
+def issue_tokens(user):
+    """Return a new access and refresh token pair for ``user``."""
+    return _pair(user, _refresh_token(user, uuid.uuid4()))
+
+
+def rotate(token):
+    """Exchange a refresh token for a new token pair.
+
+    Raises ``AuthenticationFailed`` if the token is unknown, expired,
+    revoked or its user inactive.
+    """
+    now = timezone.now()
+    with transaction.atomic():
+        refresh = (
+            RefreshToken.objects.select_for_update().select_related("user")
+            .filter(token_hash=_hash(token)).first()
+        )
+        if refresh is None:
+            raise exceptions.AuthenticationFailed(_("Invalid token."))
+        if refresh.revoked_at is not None:
+            revoke_family(refresh.family)
+            valid = False
+        else:
+            valid = refresh.expires_at > now and refresh.user.is_active
+            refresh.revoked_at = now
+            refresh.save(update_fields=["revoked_at"])
+        if valid:
+            return _pair(refresh.user, _refresh_token(
+                refresh.user, refresh.family,
+            ))
+
+    raise exceptions.AuthenticationFailed(_("Invalid token."))
+
+
+def revoke_family(family):
+    """Revoke every live refresh token rotated from the same login."""
+    RefreshToken.objects.filter(family=family, revoked_at=None).update(
+        revoked_at=timezone.now(),
+    )
+
+
+def revoke(token):
+    """Revoke a refresh token and the tokens rotated from its login."""
+    family = (
+        RefreshToken.objects.filter(token_hash=_hash(token))
+        .values_list("family", flat=True).first()
+    )
+    if family is not None:
+        revoke_family(family)
+
+
+def revoke_user(user_id):
+    """Revoke all live refresh tokens of a user."""
+    RefreshToken.objects.filter(user_id=user_id, revoked_at=None).update(
+        revoked_at=timezone.now(),
+    )
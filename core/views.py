@@ -1,3 +1,196 @@
-from django.shortcuts import render
+"""
+View serving uploaded media.
 
-# Create your views here.
+Media is served with validators and cache headers: content-addressed names
+never change content, so they are cached for a year as immutable; other
+names are revalidated after ``MEDIA_MAX_AGE``. Single byte ranges are
+honoured. With ``MEDIA_SENDFILE_HEADER`` set, the file is left to the front
+end server through ``X-Sendfile`` or ``X-Accel-Redirect``. Otherwise the
+response streams an open file, which WSGI servers with a
+``wsgi.file_wrapper`` (gunicorn, uWSGI) send with ``os.sendfile``, without
+copying it through Python.
+"""
+import io
+import mimetypes
+import os
+import re
+import stat
+from urllib.parse import quote
+
+from django.conf import settings
+from django.core.exceptions import SuspiciousFileOperation
+from django.http import (
+    FileResponse,
+    Http404,
+    HttpResponse,
+)
+from django.utils._os import safe_join
+from django.utils.cache import (
+    get_conditional_response,
+    patch_cache_control,
+)
+from django.utils.http import http_date
+from django.views.decorators.http import require_safe
+
+from core import storage
+
+# A year, the longest max-age caches are expected to honour.
+IMMUTABLE_MAX_AGE = 365 * 24 * 60 * 60
+
+BYTE_RANGE = re.compile(r"^bytes=(\d*)-(\d*)$")
+
+
+class RangeNotSatisfiable(Exception):
+    """No byte of the requested range is in the file."""
+
+
+def parse_range(header, size):
+    """Return the ``(start, stop)`` offsets of a single byte range.
+
+    Returns ``None`` for anything but one well-formed byte range, which is
+    answered with the whole file.
+    """
+    match = BYTE_RANGE.match(header.strip())
+    if match is None or match.group(1) == match.group(2) == "":
+        return None
+    first, last = match.groups()
+    if not first:
+        # The last ``last`` bytes.
+        if int(last) == 0:
+            raise RangeNotSatisfiable()
+        return max(size - int(last), 0), size
+    start = int(first)
+    if last and int(last) < start:
+        return None
+    if start >= size:
+        raise RangeNotSatisfiable()
+
+    return start, min(int(last) + 1, size) if last else size
+
+
+class FileRange:
+    """File-like view of bytes ``start`` to ``stop`` of an open file.
+
+    Offsets are those of the underlying file, which keeps ``fileno()`` and
+    ``tell()`` meaningful to servers sending it with ``os.sendfile``.
+    """
+
+    def __init__(self, file, start, stop):
+        self.file = file
+        self.stop = stop
+        file.seek(start)
+
+    def fileno(self):
+        return self.file.fileno()
+
+    def tell(self):
+        return self.file.tell()
+
+    def seek(self, offset, whence=io.SEEK_SET):
+        if whence == io.SEEK_END:
+            offset += self.stop
+        elif whence == io.SEEK_CUR:
+            offset += self.file.tell()
+
+        return self.file.seek(offset)
+
+    def read(self, size=-1):
+        remaining = max(self.stop - self.file.tell(), 0)
+        if size < 0 or size > remaining:
+            size = remaining
+
+        return self.file.read(size)
+
+    def close(self):
+        self.file.close()
+
+
+def _etag(name, stat_result, immutable):
+    """Return the ETag of the stored file ``name``."""
+    if immutable:
+        return '"%s"' % os.path.splitext(os.path.basename(name))[0]
+
+    return '"%x-%x"' % (stat_result.st_mtime_ns, stat_result.st_size)
+
+
+def _sendfile_response(path, name):
+    """Return a response leaving the file to the front end server."""
+    response = HttpResponse()
+    header = settings.MEDIA_SENDFILE_HEADER
+    if header.lower() == "x-accel-redirect":
+        response[header] = quote(settings.MEDIA_ACCEL_REDIRECT_PREFIX + name)
+    else:
+        response[header] = path
+
+    return response
+
+
+def _file_response(request, path, etag, last_modified, size):
+    """Return a response streaming the file, or the requested range of it."""
+    byte_range = None
+    if "Range" in request.headers and request.headers.get("If-Range") in (
+        None, etag, http_date(last_modified),
+    ):
+        try:
+            byte_range = parse_range(request.headers["Range"], size)
+        except RangeNotSatisfiable:
+            response = HttpResponse(status=416)
+            response["Content-Range"] = f"bytes */{size}"
+            return response
+
+    start, stop = byte_range or (0, size)
+    if request.method == "HEAD":
+        response = HttpResponse()
+        response["Content-Length"] = stop - start
+    else:
+        response = FileResponse(FileRange(open(path, "rb"), start, stop))
+    if byte_range:
+        response.status_code = 206
+        response["Content-Range"] = f"bytes {start}-{stop - 1}/{size}"
+    response["Accept-Ranges"] = "bytes"
+
+    return response
+
+
+@require_safe
+def serve_media(request, path):
+    """Serve the uploaded file at ``path`` under ``MEDIA_ROOT``."""
+    try:
+        full_path = safe_join(settings.MEDIA_ROOT, path)
+        stat_result = os.stat(full_path)
+    except (SuspiciousFileOperation, OSError, ValueError):
+        raise Http404("File not found.")
+    if not stat.S_ISREG(stat_result.st_mode):
+        raise Http404("File not found.")
+
+    immutable = storage.CONTENT_NAME.search(path) is not None
+    etag = _etag(path, stat_result, immutable)
+    last_modified = int(stat_result.st_mtime)
+    response = get_conditional_response(
+        request, etag=etag, last_modified=last_modified,
+    )
+    if response is None:
+        if settings.MEDIA_SENDFILE_HEADER:
+            response = _sendfile_response(full_path, path)
+        else:
+            response = _file_response(
+                request, full_path, etag, last_modified, stat_result.st_size,
+            )
+        if response.status_code != 416:
+            content_type = mimetypes.guess_type(full_path)[0]
+            response["Content-Type"] = (
+                content_type or "application/octet-stream"
+            )
+
+    response["ETag"] = etag
+    response["Last-Modified"] = http_date(last_modified)
+    if immutable:
+        patch_cache_control(
+            response, public=True, max_age=IMMUTABLE_MAX_AGE, immutable=True,
+        )
+    else:
+        patch_cache_control(
+            response, public=True, max_age=settings.MEDIA_MAX_AGE,
+        )
+
+    return response
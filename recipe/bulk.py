@@ -0,0 +1,185 @@
+"""
+Bulk import and export helpers for the recipe APIs.
+"""
+import csv
+import json
+from itertools import islice
+
+from django.db import (
+    DatabaseError,
+    transaction,
+)
+from django.utils.translation import gettext as _
+
+from rest_framework.utils.encoders import JSONEncoder
+
+from core import (
+    search,
+    stats,
+)
+from core.models import (
+    Recipe,
+    Tag,
+    Ingredient,
+)
+from recipe import cache
+from recipe.serializers import (
+    RecipeDetailSerializer,
+    get_or_create_attrs,
+)
+
+CHUNK_SIZE = 500
+
+EXPORT_CHUNK_SIZE = 2000
+
+NDJSON_CONTENT_TYPE = "application/x-ndjson"
+
+# Image renditions are derived files, not recipe data worth a CSV column.
+CSV_FIELDS = [
+    field for field in RecipeDetailSerializer.Meta.fields
+    if field != "renditions"
+]
+
+
+def iter_records(request):
+    """Yield ``(line, record)`` pairs from an NDJSON or JSON array body.
+
+    NDJSON bodies are read one line at a time so memory stays bounded by the
+    chunk size. A JSON array has to be parsed in full. Lines that fail to
+    parse are yielded with an ``Exception`` in place of the record.
+    """
+    if request.content_type.startswith("application/json"):
+        try:
+            records = json.load(request)
+        except ValueError as exc:
+            yield 1, exc
+            return
+        if not isinstance(records, list):
+            yield 1, ValueError(_("Expected a JSON array of recipes."))
+            return
+        yield from enumerate(records, start=1)
+        return
+
+    for line, raw in enumerate(iter(request.readline, b""), start=1):
+        if not raw.strip():
+            continue
+        try:
+            yield line, json.loads(raw)
+        except ValueError as exc:
+            yield line, exc
+
+
+def _link_attrs(relation, model, recipes, names_per_recipe, resolved):
+    """Insert the through rows for one relation of a chunk of recipes."""
+    through = Recipe._meta.get_field(relation).remote_field.through
+    column = f"{model._meta.model_name}_id"
+    links = through.objects.bulk_create([
+        through(recipe_id=recipe.id, **{column: resolved[name].id})
+        for recipe, names in zip(recipes, names_per_recipe)
+        for name in names
+    ])
+    stats.add_uses(model, [getattr(link, column) for link in links])
+
+
+def _write_chunk(user, rows):
+    """Write one chunk of validated rows and return the created recipes."""
+    names = {"tags": [], "ingredients": []}
+    recipes = []
+    for data in rows:
+        for relation in names:
+            names[relation].append(list(dict.fromkeys(
+                item["name"] for item in data.pop(relation, [])
+            )))
+        data.pop("image", None)
+        recipes.append(Recipe(user=user, **data))
+
+    with transaction.atomic():
+        Recipe.objects.bulk_create(recipes)
+        stats.add(
+            user.id,
+            recipe_count=len(recipes),
+            total_time_minutes=sum(recipe.time_minutes for recipe in recipes),
+        )
+        for relation, model in (("tags", Tag), ("ingredients", Ingredient)):
+            objs = get_or_create_attrs(user, model, (
+                name for group in names[relation] for name in group
+            ))
+            resolved = {obj.name: obj for obj in objs}
+            _link_attrs(relation, model, recipes, names[relation], resolved)
+        search.index_recipes(recipe.id for recipe in recipes)
+    cache.record_write(user.id)
+
+    return recipes
+
+
+def import_recipes(user, records, context, chunk_size=CHUNK_SIZE):
+    """Validate and create recipes in chunks, yielding a result per line."""
+    records = iter(records)
+    while True:
+        chunk = list(islice(records, chunk_size))
+        if not chunk:
+            return
+
+        valid_lines = []
+        valid_rows = []
+        results = {}
+        for line, record in chunk:
+            if isinstance(record, Exception):
+                results[line] = {"line": line, "errors": [str(record)]}
+                continue
+            serializer = RecipeDetailSerializer(data=record, context=context)
+            if serializer.is_valid():
+                valid_lines.append(line)
+                valid_rows.append(serializer.validated_data)
+            else:
+                results[line] = {"line": line, "errors": serializer.errors}
+
+        if valid_rows:
+            try:
+                recipes = _write_chunk(user, valid_rows)
+            except DatabaseError as exc:
+                for line in valid_lines:
+                    results[line] = {"line": line, "errors": [str(exc)]}
+            else:
+                for line, recipe in zip(valid_lines, recipes):
+                    results[line] = {"line": line, "id": recipe.id}
+
+        for line, _record in chunk:
+            yield results[line]
+
+
+def export_recipes(queryset, context, chunk_size=EXPORT_CHUNK_SIZE):
+    """Yield serialized recipes, fetching ``chunk_size`` rows at a time.
+
+    ``iterator()`` uses a server-side cursor where the database supports it
+    and runs the queryset's prefetches once per chunk, so only one chunk of
+    recipes is held in memory at a time.
+    """
+    for recipe in queryset.iterator(chunk_size=chunk_size):
+        yield RecipeDetailSerializer(recipe, context=context).data
+
+
+class _Echo:
+    """File-like object that hands back what is written to it."""
+
+    def write(self, value):
+        return value
+
+
+def render_csv(rows):
+    """Render serialized recipes as CSV with ``|`` separated names."""
+    fields = CSV_FIELDS
+    writer = csv.writer(_Echo())
+    yield writer.writerow(fields)
+    for row in rows:
+        yield writer.writerow([
+            "|".join(item["name"] for item in row[field])
+            if field in ("tags", "ingredients") else row[field]
+            for field in fields
+        ])
+
+
+def render_ndjson(rows):
+    """Render rows as NDJSON lines."""
+    for row in rows:
+        yield json.dumps(row, cls=JSONEncoder) + "\n"
@@ -0,0 +1,275 @@
+"""
+Per-user response cache for the recipe APIs.
+
+Cached responses are keyed by user, view, action, URL kwargs and query
+params, plus a per-user generation counter. Any write by the user bumps the
+counter, which orphans all of their cached responses at once; the stale
+entries simply expire. Hits are served only while the user's data version
+in the database still matches theirs, so a per-process cache never serves
+a response another process's write made stale.
+
+Responses also carry an ETag and Last-Modified header derived from the
+user's data version, so conditional requests are answered with a 304 before
+any recipe is loaded or serialized. Only the ETag decides: Last-Modified has
+whole seconds, so a write in the same second as the response it follows
+would not count as a modification.
+
+The validators are read from the primary. Views reading from a replica
+only cache and tag their responses once the replica has the user's latest
+data version; until then they are served uncached and without validators.
+"""
+import hashlib
+import time
+from collections import Counter
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import caches
+from django.db import (
+    DEFAULT_DB_ALIAS,
+    router,
+)
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date
+
+from rest_framework import status
+from rest_framework.response import Response
+
+from core import routers
+from core.asyncviews import call_cache
+
+KEY_PREFIX = "recipe-api"
+
+# Process-local hit/miss counters, e.g. ``stats["hit"]``.
+stats = Counter()
+
+
+def _cache():
+    return caches[settings.RECIPE_API_CACHE_ALIAS]
+
+
+def _generation_key(user_id):
+    return f"{KEY_PREFIX}:generation:{user_id}"
+
+
+def get_generation(user_id):
+    """Return the user's current cache generation."""
+    key = _generation_key(user_id)
+    generation = _cache().get(key)
+    if generation is None:
+        # Start from the clock so a counter lost to eviction can't restart
+        # at a generation that still has cached responses.
+        _cache().add(key, time.time_ns(), timeout=None)
+        generation = _cache().get(key)
+
+    return generation
+
+
+async def aget_generation(user_id):
+    """``get_generation`` for async views."""
+    key = _generation_key(user_id)
+    generation = await call_cache(_cache(), "get", key)
+    if generation is None:
+        await call_cache(_cache(), "add", key, time.time_ns(), timeout=None)
+        generation = await call_cache(_cache(), "get", key)
+
+    return generation
+
+
+def bump_generation(user_id):
+    """Invalidate every cached response of the user."""
+    try:
+        _cache().incr(_generation_key(user_id))
+    except ValueError:
+        _cache().set(_generation_key(user_id), time.time_ns(), timeout=None)
+
+
+def record_write(user_id):
+    """Note a write to the user's data, invalidating their responses.
+
+    The user's reads also stay on the primary until replicas catch up.
+    """
+    get_user_model().objects.touch_data(user_id)
+    bump_generation(user_id)
+    routers.pin_to_primary(user_id)
+
+
+def _digest(view_name, action, kwargs, query_params):
+    params = sorted(
+        (key, query_params.getlist(key)) for key in query_params
+    )
+
+    return hashlib.md5(
+        repr((view_name, action, sorted(kwargs.items()), params)).encode(),
+        usedforsecurity=False,
+    ).hexdigest()
+
+
+def response_key(user_id, view_name, action, kwargs, query_params):
+    """Return the cache key for a response."""
+    digest = _digest(view_name, action, kwargs, query_params)
+
+    return f"{KEY_PREFIX}:{user_id}:{get_generation(user_id)}:{digest}"
+
+
+async def aresponse_key(user_id, view_name, action, kwargs, query_params):
+    """``response_key`` for async views."""
+    digest = _digest(view_name, action, kwargs, query_params)
+    generation = await aget_generation(user_id)
+
+    return f"{KEY_PREFIX}:{user_id}:{generation}:{digest}"
+
+
+def _fresh(entry, etag):
+    """Return a cached ``entry`` unless it was stored for another ETag.
+
+    The generation counter only reaches the responses cached by processes
+    sharing the cache; comparing the ETag with the database catches the
+    entries of a local cache that a write in another process made stale.
+    """
+    if entry is not None and entry[1] != etag:
+        return None
+    return entry
+
+
+class CachedResponseMixin:
+    """Cache list responses per user and invalidate them on writes.
+
+    Views call ``cached_response`` to wrap other read actions and
+    ``invalidate_cache`` after writes that the mixin doesn't cover.
+    """
+
+    def _validator_rows(self, using=DEFAULT_DB_ALIAS):
+        return get_user_model().objects.using(using).filter(
+            pk=self.request.user.pk,
+        ).values_list("data_version", "data_updated_at")
+
+    def _etag(self, version, updated_at):
+        etag = '"{}-{}-{}"'.format(
+            self.request.user.pk, version, self.request.accepted_renderer.format,
+        )
+
+        return etag, int(updated_at.timestamp())
+
+    def _validators(self):
+        """Return the ETag and Last-Modified timestamp of the user's data."""
+        return self._etag(*self._validator_rows().get())
+
+    async def _avalidators(self):
+        return self._etag(*await self._validator_rows().aget())
+
+    def _read_database(self):
+        return router.db_for_read(get_user_model()) or DEFAULT_DB_ALIAS
+
+    def _caught_up(self, etag):
+        """Return whether the database the view reads from has ``etag``."""
+        using = self._read_database()
+        if using == DEFAULT_DB_ALIAS:
+            return True
+
+        row = self._validator_rows(using).first()
+        return row is not None and self._etag(*row)[0] == etag
+
+    async def _acaught_up(self, etag):
+        using = self._read_database()
+        if using == DEFAULT_DB_ALIAS:
+            return True
+
+        row = await self._validator_rows(using).afirst()
+        return row is not None and self._etag(*row)[0] == etag
+
+    def _cache_key_args(self, request, kwargs):
+        return (
+            request.user.id,
+            self.basename,
+            self.action,
+            kwargs,
+            request.query_params,
+        )
+
+    def _stored_response(self, request, entry, etag):
+        """Return a 304 or the cached response, or ``None`` on a miss."""
+        response = get_conditional_response(request._request, etag=etag)
+        if response is None and entry is not None:
+            stats["hit"] += 1
+            response = Response(entry[0])
+            response["X-Cache"] = "HIT"
+
+        return response
+
+    def _with_validators(self, response, etag, last_modified):
+        if response.status_code in (
+            status.HTTP_200_OK, status.HTTP_304_NOT_MODIFIED,
+        ):
+            response["ETag"] = etag
+            response["Last-Modified"] = http_date(last_modified)
+        return response
+
+    def cached_response(self, handler, request, *args, **kwargs):
+        """Return the cached response for the request, or call ``handler``.
+
+        The validators are read before calling ``handler``, so a write
+        racing the handler leaves an older ETag that later revalidates
+        instead of a stale one. A replica lagging behind them serves the
+        response uncached.
+        """
+        key = response_key(*self._cache_key_args(request, kwargs))
+        etag, last_modified = self._validators()
+        entry = _fresh(_cache().get(key), etag)
+
+        response = self._stored_response(request, entry, etag)
+        if response is None:
+            stats["miss"] += 1
+            current = self._caught_up(etag)
+            response = handler(request, *args, **kwargs)
+            response["X-Cache"] = "MISS"
+            if not current:
+                return response
+            if response.status_code == status.HTTP_200_OK:
+                _cache().set(
+                    key,
+                    (response.data, etag, last_modified),
+                    settings.RECIPE_API_CACHE_TIMEOUT,
+                )
+
+        return self._with_validators(response, etag, last_modified)
+
+    async def acached_response(self, handler, request, *args, **kwargs):
+        """``cached_response`` for async views, awaiting ``handler``."""
+        key = await aresponse_key(*self._cache_key_args(request, kwargs))
+        etag, last_modified = await self._avalidators()
+        entry = _fresh(await call_cache(_cache(), "get", key), etag)
+
+        response = self._stored_response(request, entry, etag)
+        if response is None:
+            stats["miss"] += 1
+            current = await self._acaught_up(etag)
+            response = await handler(request, *args, **kwargs)
+            response["X-Cache"] = "MISS"
+            if not current:
+                return response
+            if response.status_code == status.HTTP_200_OK:
+                await call_cache(
+                    _cache(),
+                    "set",
+                    key,
+                    (response.data, etag, last_modified),
+                    settings.RECIPE_API_CACHE_TIMEOUT,
+                )
+
+        return self._with_validators(response, etag, last_modified)
+
+    def invalidate_cache(self):
+        """Drop every cached response of the requesting user."""
+        record_write(self.request.user.id)
+
+    def list(self, request, *args, **kwargs):
+        return self.cached_response(super().list, request, *args, **kwargs)
+
+    def perform_update(self, serializer):
+        super().perform_update(serializer)
+        self.invalidate_cache()
+
+    def perform_destroy(self, instance):
+        super().perform_destroy(instance)
+        self.invalidate_cache()
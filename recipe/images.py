@@ -0,0 +1,157 @@
+"""
+Background processing of uploaded recipe images.
+
+Uploads are stored as is and a rendition job is queued once the upload
+commits. Jobs run in a process pool, so resizing never holds up a request
+or the GIL; the job writes the renditions next to the original and the
+parent process records their names on the recipe. With
+``RECIPE_IMAGE_WORKERS = 0`` jobs run inline, which is what tests use.
+"""
+import logging
+import multiprocessing
+import os
+from concurrent.futures import (
+    Executor,
+    Future,
+    ProcessPoolExecutor,
+)
+
+import django
+from django.conf import settings
+from django.db import (
+    connection,
+    transaction,
+)
+from django.utils import timezone
+
+from PIL import (
+    features,
+    Image,
+    ImageOps,
+)
+
+from core.models import Recipe
+from recipe import cache
+
+logger = logging.getLogger(__name__)
+
+# Rendition name and the box it is scaled down to fit.
+RENDITIONS = {
+    "thumbnail": (200, 200),
+    "medium": (800, 800),
+}
+
+_executor = None
+
+
+class InlineExecutor(Executor):
+    """Run jobs in the calling thread, for tests and single process setups."""
+
+    def submit(self, fn, /, *args, **kwargs):
+        future = Future()
+        try:
+            future.set_result(fn(*args, **kwargs))
+        except BaseException as exc:
+            future.set_exception(exc)
+
+        return future
+
+
+def get_executor():
+    """Return the executor rendition jobs are submitted to."""
+    global _executor
+    if not settings.RECIPE_IMAGE_WORKERS:
+        return InlineExecutor()
+    if _executor is None:
+        # Workers come from a fork server, as forking a threaded web worker
+        # could copy locks held by its other threads. They start without
+        # this process's modules, so Django is set up to import the job.
+        _executor = ProcessPoolExecutor(
+            settings.RECIPE_IMAGE_WORKERS,
+            mp_context=multiprocessing.get_context("forkserver"),
+            initializer=django.setup,
+        )
+
+    return _executor
+
+
+def render_renditions(media_root, name, renditions=RENDITIONS):
+    """Write the renditions of the image stored at ``name``.
+
+    Runs in a worker process, so it only touches the file system. EXIF
+    orientation is applied and all metadata dropped on re-encoding. Images
+    are stored by content, so renditions already on disk are reused. Returns
+    the storage name of each rendition.
+    """
+    if features.check("webp"):
+        image_format, ext = "WEBP", "webp"
+    else:
+        image_format, ext = "JPEG", "jpg"
+    base = os.path.splitext(name)[0]
+    results = {
+        rendition: f"{base}-{rendition}.{ext}" for rendition in renditions
+    }
+    if all(
+        os.path.exists(os.path.join(media_root, path))
+        for path in results.values()
+    ):
+        # Another recipe has the same image, which is rendered already.
+        return results
+
+    with Image.open(os.path.join(media_root, name)) as original:
+        transparent = (
+            "A" in original.getbands() or "transparency" in original.info
+        )
+        original = ImageOps.exif_transpose(original).convert(
+            "RGBA" if transparent and image_format == "WEBP" else "RGB"
+        )
+        for rendition, size in renditions.items():
+            image = original.copy()
+            image.thumbnail(size)
+            path = os.path.join(media_root, results[rendition])
+            # Write aside and rename, so a file that exists is complete.
+            partial = f"{path}.{os.getpid()}.tmp"
+            image.save(partial, image_format, quality=80)
+            os.replace(partial, path)
+
+    return results
+
+
+def _record(key, name, future, close_connection):
+    """Store the renditions of a finished job, unless the image changed."""
+    recipe_id, user_id = key
+    try:
+        renditions = future.result()
+    except Exception:
+        logger.exception(
+            "Rendering image %s of recipe %s failed", name, recipe_id,
+        )
+        return
+
+    try:
+        updated = Recipe.objects.filter(id=recipe_id, image=name).update(
+            renditions=renditions,
+            updated_at=timezone.now(),
+        )
+        if updated:
+            cache.record_write(user_id)
+    finally:
+        # Pool callbacks run on a thread of their own; don't leak its
+        # connection.
+        if close_connection:
+            connection.close()
+
+
+def process_image(recipe):
+    """Queue rendering the recipe's image once the transaction commits."""
+    key, name = (recipe.id, recipe.user_id), recipe.image.name
+
+    def submit():
+        executor = get_executor()
+        future = executor.submit(render_renditions, settings.MEDIA_ROOT, name)
+        close_connection = not isinstance(executor, InlineExecutor)
+        future.add_done_callback(
+            lambda future: _record(key, name, future, close_connection)
+        )
+
+    transaction.on_commit(submit)
@@ -0,0 +1,158 @@
+"""
+Pagination for the recipe APIs.
+"""
+import json
+
+from django.conf import settings
+from django.db.models import Q
+
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import (
+    CursorPagination,
+    _positive_int,
+    _reverse_ordering,
+)
+
+
+class RecipeCursorPagination(CursorPagination):
+    """Keyset pagination over recipes, newest first.
+
+    Pagination is opt in so existing clients keep getting plain lists: a
+    request is paginated once it passes ``page_size`` or ``cursor``. Page
+    sizes are capped by ``RECIPE_API_MAX_PAGE_SIZE``.
+
+    Pages follow the ordering of the view's queryset, which has to end in
+    a unique field. The cursor position holds every ordering value, not
+    just the first, so rankings where many recipes tie, like
+    ``(-matched, -id)``, continue after the last row instead of skipping
+    the ties by offset.
+    """
+    ordering = "-id"
+    page_size_query_param = "page_size"
+
+    def get_page_size(self, request):
+        """Return the requested page size, or None to skip pagination."""
+        max_page_size = settings.RECIPE_API_MAX_PAGE_SIZE
+        if self.page_size_query_param in request.query_params:
+            try:
+                return _positive_int(
+                    request.query_params[self.page_size_query_param],
+                    strict=True,
+                    cutoff=max_page_size,
+                )
+            except ValueError:
+                pass
+        elif self.cursor_query_param not in request.query_params:
+            return None
+
+        return min(settings.RECIPE_API_PAGE_SIZE, max_page_size)
+
+    def get_ordering(self, request, queryset, view):
+        """Return the queryset's ordering, or ``ordering`` if it has none."""
+        ordering = queryset.query.order_by or self.ordering
+        if isinstance(ordering, str):
+            return (ordering,)
+        return tuple(ordering)
+
+    def _after(self, position, reverse):
+        """Return the filter for rows past ``position`` in the ordering."""
+        condition = None
+        for field, value in reversed(list(zip(self.ordering, position))):
+            name = field.lstrip("-")
+            lookup = "lt" if field.startswith("-") != reverse else "gt"
+            after = Q(**{f"{name}__{lookup}": value})
+            if condition is not None:
+                after |= Q(**{name: value}) & condition
+            condition = after
+
+        return condition
+
+    def _decode_position(self, position):
+        """Return the ordering values of an encoded cursor position."""
+        try:
+            values = json.loads(position)
+        except ValueError:
+            raise NotFound(self.invalid_cursor_message)
+        if not isinstance(values, list) or len(values) != len(self.ordering):
+            raise NotFound(self.invalid_cursor_message)
+
+        return values
+
+    def paginate_queryset(self, queryset, request, view=None):
+        """``CursorPagination.paginate_queryset`` filtering on every field."""
+        self.page_size = self.get_page_size(request)
+        if not self.page_size:
+            return None
+
+        self.base_url = request.build_absolute_uri()
+        self.ordering = self.get_ordering(request, queryset, view)
+
+        self.cursor = self.decode_cursor(request)
+        if self.cursor is None:
+            (offset, reverse, current_position) = (0, False, None)
+        else:
+            (offset, reverse, current_position) = self.cursor
+
+        if reverse:
+            queryset = queryset.order_by(*_reverse_ordering(self.ordering))
+        else:
+            queryset = queryset.order_by(*self.ordering)
+
+        if current_position is not None:
+            queryset = queryset.filter(self._after(
+                self._decode_position(current_position), reverse,
+            ))
+
+        results = list(queryset[offset:offset + self.page_size + 1])
+        self.page = results[:self.page_size]
+
+        if len(results) > len(self.page):
+            has_following_position = True
+            following_position = self._get_position_from_instance(
+                results[-1], self.ordering,
+            )
+        else:
+            has_following_position = False
+            following_position = None
+
+        if reverse:
+            self.page.reverse()
+            self.has_next = (current_position is not None) or (offset > 0)
+            self.has_previous = has_following_position
+            if self.has_next:
+                self.next_position = current_position
+            if self.has_previous:
+                self.previous_position = following_position
+        else:
+            self.has_next = has_following_position
+            self.has_previous = (current_position is not None) or (offset > 0)
+            if self.has_next:
+                self.next_position = following_position
+            if self.has_previous:
+                self.previous_position = current_position
+
+        if (self.has_previous or self.has_next) and self.template is not None:
+            self.display_page_controls = True
+
+        return self.page
+
+    def _get_position_from_instance(self, instance, ordering):
+        """Encode the values of every ordering field of ``instance``."""
+        values = []
+        for field in ordering:
+            name = field.lstrip("-")
+            if isinstance(instance, dict):
+                values.append(instance[name])
+            else:
+                values.append(getattr(instance, name))
+
+        return json.dumps(values)
+
+
+class RecipeAttrCursorPagination(RecipeCursorPagination):
+    """Keyset pagination over tags and ingredients, by name descending.
+
+    ``-id`` only fixes the order of equal names across users, as names are
+    unique per user.
+    """
+    ordering = ("-name", "-id")
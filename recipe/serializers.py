@@ -1,22 +1,102 @@
 """
 Serializers for Recipe APIs
 """
-from rest_framework.serializers import ModelSerializer
+from collections import defaultdict
 
+from asgiref.sync import sync_to_async
+from django.core.files.storage import default_storage
+from django.db import (
+    IntegrityError,
+    transaction,
+)
+from django.utils.translation import gettext as _
+
+from drf_spectacular.utils import extend_schema_field
+from rest_framework.serializers import (
+    CharField,
+    DictField,
+    Field,
+    FloatField,
+    IntegerField,
+    ListField,
+    ListSerializer,
+    ModelSerializer,
+    Serializer,
+    ValidationError,
+)
+from rest_framework.utils.serializer_helpers import ReturnList
+
+from core import stats
 from core.models import (
     Recipe,
+    RecipeStats,
     Tag,
     Ingredient
 )
 
-class IngredientSerializer(ModelSerializer):
+def get_or_create_attrs(user, model, names):
+    """Return the user's tags or ingredients named ``names``, in order.
+
+    Existing rows are looked up in one query and the missing ones are
+    inserted with a single ``bulk_create``, which sends no signals, so they
+    are counted here. If a concurrent request inserted some of the same
+    names first, the unique constraint on ``(user, name)`` rejects the
+    batch; each name is then created on its own with ``get_or_create``,
+    whose ``post_save`` handlers count only the rows it inserted.
+    """
+    names = list(dict.fromkeys(names))
+    if not names:
+        return []
+
+    found = {
+        obj.name: obj
+        for obj in model.objects.filter(user=user, name__in=names)
+    }
+    missing = [name for name in names if name not in found]
+    if missing:
+        try:
+            with transaction.atomic():
+                model.objects.bulk_create(
+                    [model(user=user, name=name) for name in missing],
+                )
+        except IntegrityError:
+            for name in missing:
+                model.objects.get_or_create(user=user, name=name)
+        else:
+            stats.add(user.id, **{stats.COUNT_FIELDS[model]: len(missing)})
+        found.update(
+            (obj.name, obj)
+            for obj in model.objects.filter(user=user, name__in=missing)
+        )
+
+    return [found[name] for name in names]
+
+
+class RecipeAttrSerializer(ModelSerializer):
+    """Base serializer for attributes owned by a user's recipes."""
+
+    def validate_name(self, value):
+        """Reject renaming onto a name the user already has."""
+        if self.instance is not None:
+            exists = type(self.instance).objects.filter(
+                user=self.instance.user,
+                name=value,
+            ).exclude(id=self.instance.id).exists()
+            if exists:
+                raise ValidationError(
+                    _("You already have an item with this name.")
+                )
+
+        return value
+
+class IngredientSerializer(RecipeAttrSerializer):
     """Serializer of ingredient model."""
     class Meta:
         model = Ingredient
         fields = ['id', 'name']
         read_only_fields = ['id']
 
-class TagSerializer(ModelSerializer):
+class TagSerializer(RecipeAttrSerializer):
     """Serializer for tags."""
 
     class Meta:
@@ -35,27 +115,39 @@ class RecipeSerializer(ModelSerializer):
             "id", "title", "time_minutes", "price", "link", "tags", 'ingredients',
                   ]
         read_only_fields = ['id']
+
+    def _get_or_create_attrs(self, model, items):
+        """Resolve named attributes for the requesting user."""
+        return get_or_create_attrs(
+            self.context['request'].user,
+            model,
+            (item['name'] for item in items),
+        )
+
+    def _set_attrs(self, manager, objs, replace=False):
+        """Link ``objs`` to the recipe, unlinking the rest if ``replace``."""
+        if not replace:
+            manager.add(*objs)
+            return
+
+        current = set(manager.values_list('id', flat=True))
+        wanted = {obj.id for obj in objs}
+        if current - wanted:
+            manager.remove(*(current - wanted))
+        if wanted - current:
+            manager.add(*(obj for obj in objs if obj.id not in current))
+
+    def _get_or_create_ingredients(self, ingredients, recipe, replace=False):
+        """Handle getting or creating ingredients as needed."""
+        ingredient_objs = self._get_or_create_attrs(Ingredient, ingredients)
+        self._set_attrs(recipe.ingredients, ingredient_objs, replace)
     
-    def _get_or_create_ingredients(self, ingredients, recipe):
-        auth_user = self.context['request'].user
-        for ingredient in ingredients:
-            ingredient_obj, create = Ingredient.objects.get_or_create(
-                user=auth_user,
-                **ingredient,
-            )
-            recipe.ingredients.add(ingredient_obj)
-    
-    def _get_or_create_tags(self, tags, recipe):
+    def _get_or_create_tags(self, tags, recipe, replace=False):
         """Handle getting pr creating tags as needed."""
-        auth_user = self.context['request'].user
-        for tag in tags:
-            tag_obj, created = Tag.objects.get_or_create(
-                user=auth_user,
-                **tag,
-            )
-            recipe.tags.add(tag_obj)
-        
+        tag_objs = self._get_or_create_attrs(Tag, tags)
+        self._set_attrs(recipe.tags, tag_objs, replace)
 
+    @transaction.atomic
     def create(self, validated_data):
         tags = validated_data.pop('tags', [])
         ingredients = validated_data.pop('ingredients', [])
@@ -66,18 +158,19 @@ class RecipeSerializer(ModelSerializer):
         
         return recipe
     
+    @transaction.atomic
     def update(self, instance, validated_data):
         """Update recipe."""
         tags = validated_data.pop('tags', None)
         ingredients = validated_data.pop('ingredients', None)
 
         if tags is not None:
-            instance.tags.clear()
-            self._get_or_create_tags(tags, instance)
+            self._get_or_create_tags(tags, instance, replace=True)
         
         if ingredients is not None:
-            instance.ingredients.clear()
-            self._get_or_create_ingredients(ingredients, instance)
+            self._get_or_create_ingredients(
+                ingredients, instance, replace=True
+            )
 
         for attr, value in validated_data.items():
             setattr(instance, attr, value)
@@ -85,16 +178,209 @@ class RecipeSerializer(ModelSerializer):
         instance.save()
         return instance
 
+class RecipeRowListSerializer(ListSerializer):
+    """Read-only ``RecipeSerializer`` list rendered from ``values()`` rows.
+
+    Produces the same output as ``RecipeSerializer(many=True)`` without
+    model instances or per-row field lookups. Nested tags and ingredients
+    are fetched with one query each, and the fields are resolved into
+    converters once per child serializer class.
+    """
+
+    # Field types whose ``to_representation`` is a no-op on database values.
+    passthrough_fields = (IntegerField, CharField)
+
+    _plans = {}
+
+    def __init__(self, *args, **kwargs):
+        kwargs.setdefault("child", RecipeSerializer())
+        super().__init__(*args, **kwargs)
+
+    def _converter(self, field):
+        if type(field) in self.passthrough_fields:
+            return None
+        return field.to_representation
+
+    def _plan(self):
+        """Return ``(name, source, converter, nested)`` per readable field.
+
+        ``nested`` is ``(relation, child fields)`` for nested lists and
+        ``None`` for plain fields.
+        """
+        plan = self._plans.get(type(self.child))
+        if plan is None:
+            plan = []
+            model = self.child.Meta.model
+            for name, field in self.child.fields.items():
+                if field.write_only:
+                    continue
+                if isinstance(field, ListSerializer):
+                    relation = model._meta.get_field(field.source)
+                    plan.append((name, field.source, None, (relation, [
+                        (child_name, self._converter(child_field))
+                        for child_name, child_field
+                        in field.child.fields.items()
+                        if not child_field.write_only
+                    ])))
+                else:
+                    plan.append(
+                        (name, field.source, self._converter(field), None)
+                    )
+            self._plans[type(self.child)] = plan
+
+        return plan
+
+    @classmethod
+    def value_fields(cls):
+        """Return the ``values()`` fields the rows must carry."""
+        return [
+            source for _name, source, _converter, nested in cls()._plan()
+            if nested is None
+        ]
+
+    def _related_rows(self, relation, child_fields, ids):
+        """Return the related items of recipes ``ids`` as value tuples.
+
+        The query has the shape of the matching ``prefetch_related`` query,
+        so the items come back in the same order.
+        """
+        query_name = relation.related_query_name()
+        return relation.related_model.objects.filter(**{
+            f"{query_name}__in": ids,
+        }).values_list(query_name, *(name for name, _ in child_fields))
+
+    def _group(self, child_fields, rows):
+        """Map recipe ids to their rendered related items."""
+        items = defaultdict(list)
+        for recipe_id, *values in rows:
+            items[recipe_id].append({
+                name: value if value is None or convert is None
+                else convert(value)
+                for (name, convert), value in zip(child_fields, values)
+            })
+
+        return items
+
+    def _nested(self):
+        return [
+            (name, nested) for name, _source, _converter, nested
+            in self._plan() if nested is not None
+        ]
+
+    def to_representation(self, data):
+        rows = list(data)
+        if not rows:
+            return []
+        ids = self._ids(rows)
+        related = {
+            name: self._group(
+                nested[1], self._related_rows(*nested, ids),
+            )
+            for name, nested in self._nested()
+        }
+
+        return self._render(rows, related)
+
+    async def adata(self):
+        """``data`` for async views."""
+        rows = list(self.instance)
+        related = {}
+        if rows:
+            ids = self._ids(rows)
+            for name, nested in self._nested():
+                # Django 4.2 can't read values_list() rows with aiterator().
+                items = await sync_to_async(list)(
+                    self._related_rows(*nested, ids)
+                )
+                related[name] = self._group(nested[1], items)
+
+        return ReturnList(self._render(rows, related), serializer=self)
+
+    def _ids(self, rows):
+        pk = self.child.Meta.model._meta.pk.attname
+        return [row[pk] for row in rows]
+
+    def _render(self, rows, related):
+        pk = self.child.Meta.model._meta.pk.attname
+        results = []
+        for row in rows:
+            item = {}
+            for name, source, convert, nested in self._plan():
+                if nested is not None:
+                    item[name] = related[name].get(row[pk], [])
+                    continue
+                value = row[source]
+                item[name] = (
+                    value if value is None or convert is None
+                    else convert(value)
+                )
+            results.append(item)
+
+        return results
+
+@extend_schema_field({
+    "type": "object",
+    "additionalProperties": {"type": "string", "format": "uri"},
+    "readOnly": True,
+})
+class RenditionsField(Field):
+    """Read-only URLs of a recipe's image renditions by name."""
+
+    def __init__(self, **kwargs):
+        kwargs["read_only"] = True
+        super().__init__(**kwargs)
+
+    def to_representation(self, value):
+        request = self.context.get("request")
+        urls = {}
+        for name, path in value.items():
+            url = default_storage.url(path)
+            urls[name] = request.build_absolute_uri(url) if request else url
+
+        return urls
+
 class RecipeDetailSerializer(RecipeSerializer):
     """Recipe detail serializers."""
+    renditions = RenditionsField()
+
     class Meta(RecipeSerializer.Meta):
-        fields = RecipeSerializer.Meta.fields + ['description', 'image']
+        fields = RecipeSerializer.Meta.fields + [
+            'description', 'image', 'renditions',
+        ]
 
 class RecipeImageSerializer(ModelSerializer):
     """Serializer for uploading images to recipes."""
+    renditions = RenditionsField()
 
     class Meta:
         model = Recipe
-        fields = ["id", "image"]
+        fields = ["id", "image", "renditions"]
         read_only_fields = ['id']
         extra_kwargs = {"image": {"required": "True"}}
+
+class SyncSerializer(Serializer):
+    """Serializer of the changes since a sync token."""
+    token = CharField(read_only=True)
+    recipes = RecipeDetailSerializer(many=True, read_only=True)
+    tags = TagSerializer(many=True, read_only=True)
+    ingredients = IngredientSerializer(many=True, read_only=True)
+    deleted = DictField(
+        child=ListField(child=IntegerField()),
+        read_only=True,
+    )
+
+
+class RecipeStatsSerializer(ModelSerializer):
+    """Serializer of a user's recipe statistics."""
+    avg_time_minutes = FloatField(read_only=True, allow_null=True)
+
+    class Meta:
+        model = RecipeStats
+        fields = [
+            "recipe_count",
+            "tag_count",
+            "ingredient_count",
+            "total_time_minutes",
+            "avg_time_minutes",
+        ]
+        read_only_fields = fields
@@ -0,0 +1,19 @@
+"""
+Signal handlers for the recipe APIs.
+"""
+from django.contrib.auth import get_user_model
+from django.db.models.signals import post_save
+from django.dispatch import receiver
+
+from recipe import cache
+
+
+@receiver(post_save, sender=get_user_model())
+def reset_response_cache(sender, instance, created, **kwargs):
+    """Start new users on a fresh cache generation.
+
+    Databases may reuse the id of a deleted user, whose cached responses
+    must not be served to the new one.
+    """
+    if created:
+        cache.bump_generation(instance.id)
@@ -0,0 +1,280 @@
+"""
+Test the async recipe and user views served under ASGI.
+"""
+from contextlib import asynccontextmanager
+from decimal import Decimal
+
+from asgiref.sync import (
+    iscoroutinefunction,
+    sync_to_async,
+)
+from django.contrib.auth import get_user_model
+from django.core.cache import cache as django_cache
+from django.test import (
+    TestCase,
+    override_settings,
+)
+from django.urls import (
+    include,
+    path,
+    resolve,
+    reverse,
+)
+
+from rest_framework import status
+from rest_framework.authtoken.models import Token
+from rest_framework.routers import DefaultRouter
+
+from core import tokens
+from core.authentication import token_cache
+from core.models import (
+    Recipe,
+    Tag,
+)
+from recipe.serializers import (
+    RecipeDetailSerializer,
+    RecipeSerializer,
+)
+from recipe.views import (
+    AsyncIngredientViewSet,
+    AsyncRecipeViewSet,
+    AsyncTagViewSet,
+)
+from user.views import AsyncManageUserView
+
+router = DefaultRouter()
+router.register("recipes", AsyncRecipeViewSet)
+router.register("tags", AsyncTagViewSet)
+router.register("ingredients", AsyncIngredientViewSet)
+
+# The URLs config/asgi.py serves, through API_ASYNC_VIEWS.
+urlpatterns = [
+    path("api/recipe/", include((router.urls, "recipe"))),
+    path("api/user/", include(([
+        path("me/", AsyncManageUserView.as_view(), name="me"),
+    ], "user"))),
+]
+
+
+def create_recipe(user, **params):
+    """Create and return a sample recipe."""
+    defaults = {
+        "title": "Sample recipe",
+        "time_minutes": 22,
+        "price": Decimal("5.25"),
+    }
+    defaults.update(params)
+
+    return Recipe.objects.create(user=user, **defaults)
+
+
+@override_settings(ROOT_URLCONF=__name__)
+class AsyncViewTests(TestCase):
+    """Test the async views."""
+
+    def setUp(self):
+        django_cache.clear()
+        token_cache.clear()
+        self.user = get_user_model().objects.create_user(
+            email="test@test.com",
+            password="123test",
+            name="Test Testov",
+        )
+        self.headers = {
+            "Authorization": f"Token {Token.objects.create(user=self.user)}",
+        }
+        self.recipe = create_recipe(self.user)
+        self.recipe.tags.add(Tag.objects.create(user=self.user, name="Vegan"))
+
+    @asynccontextmanager
+    async def aassertNumQueries(self, num):
+        """``assertNumQueries`` for the queries run in worker threads."""
+        context = await sync_to_async(self.assertNumQueries)(num)
+        await sync_to_async(context.__enter__)()
+        yield
+        await sync_to_async(context.__exit__)(None, None, None)
+
+    def test_views_async(self):
+        """Test the views run as coroutines."""
+        for url in (
+            reverse("recipe:recipe-list"),
+            reverse("recipe:tag-list"),
+            reverse("user:me"),
+        ):
+            self.assertTrue(iscoroutinefunction(resolve(url).func), url)
+
+    async def test_list_recipes(self):
+        """Test listing recipes in the event loop."""
+        response = await self.async_client.get(
+            reverse("recipe:recipe-list"), headers=self.headers,
+        )
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.json(), await sync_to_async(
+            lambda: RecipeSerializer([self.recipe], many=True).data
+        )())
+
+    async def test_list_recipes_paginated(self):
+        """Test listing a page of recipes in the event loop."""
+        response = await self.async_client.get(
+            reverse("recipe:recipe-list"), {"page_size": 1},
+            headers=self.headers,
+        )
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            response.json()["results"][0]["tags"], [
+                {"id": (await self.recipe.tags.aget()).id, "name": "Vegan"},
+            ],
+        )
+
+    async def test_list_cached(self):
+        """Test repeated and conditional lists are answered from cache."""
+        url = reverse("recipe:recipe-list")
+
+        first = await self.async_client.get(url, headers=self.headers)
+        second = await self.async_client.get(url, headers=self.headers)
+        revalidated = await self.async_client.get(
+            url, headers={**self.headers, "If-None-Match": first["ETag"]},
+        )
+
+        self.assertEqual(first["X-Cache"], "MISS")
+        self.assertEqual(second["X-Cache"], "HIT")
+        self.assertEqual(second.json(), first.json())
+        self.assertEqual(
+            revalidated.status_code, status.HTTP_304_NOT_MODIFIED,
+        )
+
+    async def test_retrieve_recipe(self):
+        """Test retrieving a recipe in the event loop."""
+        response = await self.async_client.get(
+            reverse("recipe:recipe-detail", args=[self.recipe.id]),
+            headers=self.headers,
+        )
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.json()["tags"][0]["name"], "Vegan")
+
+    async def test_retrieve_other_users_recipe(self):
+        """Test another user's recipe is not found."""
+        other = await get_user_model().objects.acreate(email="o@test.com")
+        recipe = await Recipe.objects.acreate(
+            user=other, title="Other", time_minutes=1, price=Decimal("1"),
+        )
+
+        response = await self.async_client.get(
+            reverse("recipe:recipe-detail", args=[recipe.id]),
+            headers=self.headers,
+        )
+
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+    async def test_create_recipe(self):
+        """Test creating a recipe with new tags in the event loop."""
+        payload = {
+            "title": "Curry",
+            "time_minutes": 30,
+            "price": "7.50",
+            "tags": [{"name": "Vegan"}, {"name": "Spicy"}],
+        }
+
+        response = await self.async_client.post(
+            reverse("recipe:recipe-list"), payload,
+            content_type="application/json", headers=self.headers,
+        )
+
+        recipe = await Recipe.objects.prefetch_related("tags").aget(
+            id=response.json()["id"],
+        )
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(response.json(), await sync_to_async(
+            lambda: RecipeDetailSerializer(recipe).data
+        )())
+        self.assertEqual(
+            {tag.name for tag in recipe.tags.all()}, {"Vegan", "Spicy"},
+        )
+
+    async def test_create_invalid(self):
+        """Test invalid recipes are rejected."""
+        response = await self.async_client.post(
+            reverse("recipe:recipe-list"), {"title": "Curry"},
+            content_type="application/json", headers=self.headers,
+        )
+
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn("time_minutes", response.json())
+
+    async def test_sync_action(self):
+        """Test actions without an async handler still work."""
+        response = await self.async_client.patch(
+            reverse("recipe:recipe-detail", args=[self.recipe.id]),
+            {"title": "Renamed"}, content_type="application/json",
+            headers=self.headers,
+        )
+
+        await self.recipe.arefresh_from_db()
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(self.recipe.title, "Renamed")
+
+    async def test_export_streamed(self):
+        """Test the export is iterated asynchronously."""
+        response = await self.async_client.get(
+            reverse("recipe:recipe-export"), headers=self.headers,
+        )
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertTrue(response.is_async)
+        lines = b"".join([line async for line in response]).splitlines()
+        self.assertEqual(len(lines), 1)
+        self.assertIn(b'"Sample recipe"', lines[0])
+
+    async def test_list_tags(self):
+        """Test listing tags in the event loop."""
+        response = await self.async_client.get(
+            reverse("recipe:tag-list"), headers=self.headers,
+        )
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual([tag["name"] for tag in response.json()], ["Vegan"])
+
+    async def test_auth_required(self):
+        """Test the async views require authentication."""
+        for url in (reverse("recipe:recipe-list"), reverse("user:me")):
+            response = await self.async_client.get(url)
+            self.assertEqual(
+                response.status_code, status.HTTP_401_UNAUTHORIZED, url,
+            )
+
+        response = await self.async_client.get(
+            reverse("recipe:recipe-list"),
+            headers={"Authorization": "Token invalid"},
+        )
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    async def test_retrieve_user_signed_token(self):
+        """Test a signed token needs no token query.
+
+        The user is only read for the profile fields the token lacks.
+        """
+        access = tokens.access_token(self.user)
+
+        async with self.aassertNumQueries(1):
+            response = await self.async_client.get(
+                reverse("user:me"),
+                headers={"Authorization": f"Bearer {access}"},
+            )
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            response.json(), {"email": "test@test.com", "name": "Test Testov"},
+        )
+
+    async def test_cached_token_no_queries(self):
+        """Test a cached token authenticates without queries."""
+        url = reverse("user:me")
+        await self.async_client.get(url, headers=self.headers)
+
+        async with self.aassertNumQueries(0):
+            response = await self.async_client.get(url, headers=self.headers)
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
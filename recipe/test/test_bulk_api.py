@@ -0,0 +1,249 @@
+"""
+Test the bulk recipe import API.
+"""
+import csv
+import io
+import json
+from decimal import Decimal
+
+from django.contrib.auth import get_user_model
+from django.test import TestCase
+from django.urls import reverse
+
+from rest_framework import status
+from rest_framework.request import Request
+from rest_framework.test import (
+    APIClient,
+    APIRequestFactory,
+)
+
+from core.models import (
+    Recipe,
+    Tag,
+    Ingredient,
+)
+from recipe import bulk
+from recipe.serializers import RecipeDetailSerializer
+
+BULK_URL = reverse("recipe:recipe-bulk")
+EXPORT_URL = reverse("recipe:recipe-export")
+
+
+def recipe_payload(title, **params):
+    """Return a sample recipe payload."""
+    payload = {
+        "title": title,
+        "time_minutes": 30,
+        "price": "4.50",
+    }
+    payload.update(params)
+
+    return payload
+
+
+def to_ndjson(records):
+    """Encode records as an NDJSON body."""
+    return "".join(json.dumps(record) + "\n" for record in records)
+
+
+def read_results(response):
+    """Decode a streamed NDJSON response."""
+    body = b"".join(response.streaming_content).decode()
+    return [json.loads(line) for line in body.splitlines()]
+
+
+class PublicBulkApiTests(TestCase):
+    """Test unauthenticated bulk import requests."""
+
+    def test_auth_required(self):
+        """Test auth is required to import recipes."""
+        response = APIClient().post(BULK_URL, [], format="json")
+
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+
+
+class PrivateBulkApiTests(TestCase):
+    """Test authenticated bulk import requests."""
+
+    def setUp(self):
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user(
+            email="test@test.com",
+            password="123test",
+        )
+        self.client.force_authenticate(self.user)
+
+    def test_import_ndjson(self):
+        """Test importing recipes from an NDJSON body."""
+        records = [
+            recipe_payload(
+                "Plov",
+                tags=[{"name": "Dinner"}],
+                ingredients=[{"name": "Rice"}, {"name": "Carrot"}],
+            ),
+            recipe_payload("Lagman", tags=[{"name": "Dinner"}]),
+        ]
+
+        response = self.client.post(
+            BULK_URL,
+            to_ndjson(records),
+            content_type=bulk.NDJSON_CONTENT_TYPE,
+        )
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        results = read_results(response)
+        self.assertEqual([r["line"] for r in results], [1, 2])
+        plov = Recipe.objects.get(id=results[0]["id"])
+        self.assertEqual(plov.user, self.user)
+        self.assertEqual(plov.price, Decimal("4.50"))
+        self.assertEqual(
+            set(plov.ingredients.values_list("name", flat=True)),
+            {"Rice", "Carrot"},
+        )
+        self.assertEqual(Tag.objects.filter(user=self.user).count(), 1)
+        self.assertEqual(Tag.objects.get(user=self.user).recipe_set.count(), 2)
+
+    def test_import_json_array(self):
+        """Test importing recipes from a JSON array."""
+        records = [recipe_payload("Plov"), recipe_payload("Manti")]
+
+        response = self.client.post(BULK_URL, records, format="json")
+
+        results = read_results(response)
+        self.assertEqual(len(results), 2)
+        self.assertEqual(Recipe.objects.filter(user=self.user).count(), 2)
+
+    def test_import_reports_invalid_lines(self):
+        """Test invalid lines are reported without blocking valid ones."""
+        body = (
+            json.dumps(recipe_payload("Plov")) + "\n"
+            + "{not json\n"
+            + json.dumps({"title": "No price"}) + "\n"
+        )
+
+        response = self.client.post(
+            BULK_URL,
+            body,
+            content_type=bulk.NDJSON_CONTENT_TYPE,
+        )
+
+        results = read_results(response)
+        self.assertIn("id", results[0])
+        self.assertIn("errors", results[1])
+        self.assertIn("price", results[2]["errors"])
+        self.assertEqual(Recipe.objects.filter(user=self.user).count(), 1)
+
+    def test_import_reuses_existing_attrs(self):
+        """Test imported recipes link to the user's existing tags."""
+        tag = Tag.objects.create(user=self.user, name="Dinner")
+        other_user = get_user_model().objects.create_user(
+            email="other@test.com",
+            password="123test",
+        )
+        Ingredient.objects.create(user=other_user, name="Rice")
+
+        response = self.client.post(
+            BULK_URL,
+            to_ndjson([recipe_payload(
+                "Plov",
+                tags=[{"name": "Dinner"}],
+                ingredients=[{"name": "Rice"}],
+            )]),
+            content_type=bulk.NDJSON_CONTENT_TYPE,
+        )
+        read_results(response)
+
+        recipe = Recipe.objects.get(user=self.user)
+        self.assertEqual(list(recipe.tags.all()), [tag])
+        self.assertEqual(recipe.ingredients.get().user, self.user)
+
+    def test_import_in_chunks(self):
+        """Test records are written chunk by chunk in order."""
+        records = [(i, recipe_payload(f"Recipe {i}")) for i in range(1, 8)]
+        request = Request(APIRequestFactory().post(BULK_URL))
+        request.user = self.user
+        context = {"request": request}
+
+        results = list(bulk.import_recipes(
+            self.user, records, context, chunk_size=3,
+        ))
+
+        self.assertEqual([r["line"] for r in results], list(range(1, 8)))
+        ids = [r["id"] for r in results]
+        titles = Recipe.objects.in_bulk(ids)
+        self.assertEqual(titles[ids[-1]].title, "Recipe 7")
+
+
+class ExportApiTests(TestCase):
+    """Test the recipe export API."""
+
+    def setUp(self):
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user(
+            email="test@test.com",
+            password="123test",
+        )
+        self.client.force_authenticate(self.user)
+
+    def _create_recipe(self, title, user=None):
+        recipe = Recipe.objects.create(
+            user=user or self.user,
+            title=title,
+            time_minutes=15,
+            price=Decimal("3.10"),
+        )
+        recipe.tags.add(
+            Tag.objects.get_or_create(user=recipe.user, name="Dinner")[0]
+        )
+        return recipe
+
+    def test_export_ndjson(self):
+        """Test exporting the user's recipes as NDJSON."""
+        recipe = self._create_recipe("Plov")
+        other_user = get_user_model().objects.create_user(
+            email="other@test.com",
+            password="123test",
+        )
+        self._create_recipe("Somsa", user=other_user)
+
+        response = self.client.get(EXPORT_URL)
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response["Content-Type"], bulk.NDJSON_CONTENT_TYPE)
+        rows = read_results(response)
+        self.assertEqual(rows, [
+            json.loads(json.dumps(RecipeDetailSerializer(recipe).data))
+        ])
+
+    def test_export_csv(self):
+        """Test exporting recipes as CSV."""
+        self._create_recipe("Plov")
+
+        response = self.client.get(EXPORT_URL, {"export_format": "csv"})
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        body = b"".join(response.streaming_content).decode()
+        header, row = list(csv.reader(io.StringIO(body)))
+        self.assertEqual(header, bulk.CSV_FIELDS)
+        self.assertEqual(dict(zip(header, row))["tags"], "Dinner")
+
+    def test_export_unknown_format(self):
+        """Test an unknown export format is rejected."""
+        response = self.client.get(EXPORT_URL, {"export_format": "xml"})
+
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_export_prefetches_per_chunk(self):
+        """Test relations are prefetched once per chunk, not per recipe."""
+        for i in range(5):
+            self._create_recipe(f"Recipe {i}")
+        queryset = Recipe.objects.filter(user=self.user).prefetch_related(
+            "tags", "ingredients",
+        ).order_by("-id")
+
+        # One cursor over the recipes, then two prefetches for each of the
+        # three chunks.
+        with self.assertNumQueries(7):
+            rows = list(bulk.export_recipes(queryset, {}, chunk_size=2))
+
+        self.assertEqual(len(rows), 5)
@@ -0,0 +1,307 @@
+"""
+Test the per-user response cache of the recipe APIs.
+"""
+from decimal import Decimal
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache as django_cache
+from django.test import TestCase
+from django.urls import reverse
+
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from core.models import (
+    Recipe,
+    Tag,
+)
+from recipe import cache
+from recipe.serializers import RecipeSerializer
+
+RECIPE_URL = reverse("recipe:recipe-list")
+TAGS_URL = reverse("recipe:tag-list")
+
+
+def detail_url(recipe_id):
+    """Create and return a recipe detail URL."""
+    return reverse("recipe:recipe-detail", args=[recipe_id])
+
+
+def create_recipe(user, **params):
+    """Create and return a sample recipe."""
+    defaults = {
+        "title": "Sample recipe",
+        "time_minutes": 22,
+        "price": Decimal("5.25"),
+    }
+    defaults.update(params)
+
+    return Recipe.objects.create(user=user, **defaults)
+
+
+class ResponseCacheTests(TestCase):
+    """Test caching and invalidating recipe API responses."""
+
+    def setUp(self):
+        django_cache.clear()
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user(
+            email="test@test.com",
+            password="123test",
+        )
+        self.client.force_authenticate(self.user)
+        self.recipe = create_recipe(self.user)
+
+    def test_list_cached(self):
+        """Test a repeated list is served from the cache.
+
+        Only the user's data version is read, to check the entry is fresh.
+        """
+        first = self.client.get(RECIPE_URL)
+        with self.assertNumQueries(1):
+            second = self.client.get(RECIPE_URL)
+
+        self.assertEqual(first["X-Cache"], "MISS")
+        self.assertEqual(second["X-Cache"], "HIT")
+        self.assertEqual(second.data, first.data)
+
+    def test_write_elsewhere_not_served(self):
+        """Test entries made stale by another process's write are missed.
+
+        That process bumps the generation in its own cache only, so this
+        one sees nothing but the data version change.
+        """
+        self.client.get(RECIPE_URL)
+        Recipe.objects.filter(id=self.recipe.id).update(title="Renamed")
+        get_user_model().objects.touch_data(self.user.id)
+
+        response = self.client.get(RECIPE_URL)
+
+        self.assertEqual(response["X-Cache"], "MISS")
+        self.assertEqual(response.data[0]["title"], "Renamed")
+
+    def test_retrieve_cached(self):
+        """Test a repeated detail request is served from the cache."""
+        self.client.get(detail_url(self.recipe.id))
+        response = self.client.get(detail_url(self.recipe.id))
+
+        self.assertEqual(response["X-Cache"], "HIT")
+        self.assertEqual(response.data["title"], "Sample recipe")
+
+    def test_query_params_normalized(self):
+        """Test the order of query params doesn't split the cache."""
+        self.client.get(RECIPE_URL, {"match": "any", "page_size": 5})
+        response = self.client.get(f"{RECIPE_URL}?page_size=5&match=any")
+
+        self.assertEqual(response["X-Cache"], "HIT")
+
+    def test_query_params_keyed(self):
+        """Test different query params are cached separately."""
+        self.client.get(RECIPE_URL)
+        response = self.client.get(RECIPE_URL, {"page_size": 5})
+
+        self.assertEqual(response["X-Cache"], "MISS")
+
+    def test_errors_not_cached(self):
+        """Test error responses are not cached."""
+        self.client.get(RECIPE_URL, {"match": "some"})
+        response = self.client.get(RECIPE_URL, {"match": "some"})
+
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertNotEqual(response.get("X-Cache"), "HIT")
+
+    def test_create_invalidates(self):
+        """Test creating a recipe drops the cached list."""
+        self.client.get(RECIPE_URL)
+        self.client.post(RECIPE_URL, {
+            "title": "New recipe",
+            "time_minutes": 5,
+            "price": "1.00",
+        })
+        response = self.client.get(RECIPE_URL)
+
+        self.assertEqual(response["X-Cache"], "MISS")
+        self.assertEqual(len(response.data), 2)
+
+    def test_update_invalidates(self):
+        """Test updating a recipe drops its cached detail."""
+        self.client.get(detail_url(self.recipe.id))
+        self.client.patch(detail_url(self.recipe.id), {"title": "Renamed"})
+        response = self.client.get(detail_url(self.recipe.id))
+
+        self.assertEqual(response["X-Cache"], "MISS")
+        self.assertEqual(response.data["title"], "Renamed")
+
+    def test_delete_invalidates(self):
+        """Test deleting a recipe drops the cached list."""
+        self.client.get(RECIPE_URL)
+        self.client.delete(detail_url(self.recipe.id))
+        response = self.client.get(RECIPE_URL)
+
+        self.assertEqual(response.data, [])
+
+    def test_tag_update_invalidates_recipes(self):
+        """Test renaming a tag drops cached recipes that nest it."""
+        tag = Tag.objects.create(user=self.user, name="Vegan")
+        self.recipe.tags.add(tag)
+        self.client.get(RECIPE_URL)
+        self.client.get(TAGS_URL)
+
+        self.client.patch(
+            reverse("recipe:tag-detail", args=[tag.id]), {"name": "Vegetarian"}
+        )
+        recipes = self.client.get(RECIPE_URL)
+        tags = self.client.get(TAGS_URL)
+
+        self.assertEqual(recipes.data[0]["tags"], [
+            {"id": tag.id, "name": "Vegetarian"},
+        ])
+        self.assertEqual(tags.data[0]["name"], "Vegetarian")
+
+    def test_cache_per_user(self):
+        """Test users never see each other's cached responses."""
+        self.client.get(RECIPE_URL)
+        other_user = get_user_model().objects.create_user(
+            email="other@test.com",
+            password="123test",
+        )
+        self.client.force_authenticate(other_user)
+        response = self.client.get(RECIPE_URL)
+
+        self.assertEqual(response["X-Cache"], "MISS")
+        self.assertEqual(response.data, [])
+
+    def test_write_leaves_other_users_cached(self):
+        """Test a write only invalidates the writer's responses."""
+        other_user = get_user_model().objects.create_user(
+            email="other@test.com",
+            password="123test",
+        )
+        other_client = APIClient()
+        other_client.force_authenticate(other_user)
+        other_client.get(RECIPE_URL)
+
+        self.client.delete(detail_url(self.recipe.id))
+        response = other_client.get(RECIPE_URL)
+
+        self.assertEqual(response["X-Cache"], "HIT")
+
+    def test_stats_counted(self):
+        """Test hits and misses are counted."""
+        hits, misses = cache.stats["hit"], cache.stats["miss"]
+        self.client.get(RECIPE_URL)
+        self.client.get(RECIPE_URL)
+        self.client.get(RECIPE_URL)
+
+        self.assertEqual(cache.stats["hit"] - hits, 2)
+        self.assertEqual(cache.stats["miss"] - misses, 1)
+
+    def test_new_user_gets_fresh_generation(self):
+        """Test a user reusing a deleted user's id starts a new generation."""
+        generation = cache.get_generation(self.user.id)
+        self.user.delete()
+        user = get_user_model().objects.create_user(
+            id=self.user.id,
+            email="new@test.com",
+            password="123test",
+        )
+
+        self.assertNotEqual(cache.get_generation(user.id), generation)
+
+
+class ConditionalRequestTests(TestCase):
+    """Test ETag and Last-Modified handling of the recipe APIs."""
+
+    def setUp(self):
+        django_cache.clear()
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user(
+            email="test@test.com",
+            password="123test",
+        )
+        self.client.force_authenticate(self.user)
+        self.recipe = create_recipe(self.user)
+
+    def test_validators_sent(self):
+        """Test responses carry an ETag and Last-Modified header."""
+        response = self.client.get(RECIPE_URL)
+
+        self.assertTrue(response["ETag"].startswith('"'))
+        self.assertIn("Last-Modified", response)
+
+    def test_if_none_match_not_modified(self):
+        """Test a matching ETag gets a 304 without serializing recipes."""
+        etag = self.client.get(RECIPE_URL)["ETag"]
+        django_cache.clear()
+
+        with mock.patch.object(
+            RecipeSerializer, "to_representation",
+        ) as to_representation, self.assertNumQueries(1):
+            response = self.client.get(RECIPE_URL, HTTP_IF_NONE_MATCH=etag)
+
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+        self.assertEqual(response["ETag"], etag)
+        to_representation.assert_not_called()
+
+    def test_cached_not_modified_reads_version_only(self):
+        """Test a cached response answers conditional requests."""
+        etag = self.client.get(RECIPE_URL)["ETag"]
+
+        with self.assertNumQueries(1):
+            response = self.client.get(RECIPE_URL, HTTP_IF_NONE_MATCH=etag)
+
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+
+    def test_write_changes_etag(self):
+        """Test an old ETag gets the full response after a write."""
+        etag = self.client.get(detail_url(self.recipe.id))["ETag"]
+        self.client.patch(detail_url(self.recipe.id), {"title": "Renamed"})
+
+        response = self.client.get(
+            detail_url(self.recipe.id), HTTP_IF_NONE_MATCH=etag,
+        )
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertNotEqual(response["ETag"], etag)
+        self.assertEqual(response.data["title"], "Renamed")
+
+    def test_delete_changes_etag(self):
+        """Test deletes, which leave no row behind, change the ETag."""
+        etag = self.client.get(RECIPE_URL)["ETag"]
+        self.client.delete(detail_url(self.recipe.id))
+
+        response = self.client.get(RECIPE_URL, HTTP_IF_NONE_MATCH=etag)
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data, [])
+
+    def test_if_modified_since_ignored(self):
+        """Test If-Modified-Since alone never gets a 304.
+
+        Last-Modified has whole seconds, so it can't tell a write in the
+        same second as the response apart.
+        """
+        last_modified = self.client.get(TAGS_URL)["Last-Modified"]
+        Tag.objects.create(user=self.user, name="Dessert")
+        get_user_model().objects.touch_data(self.user.id)
+
+        response = self.client.get(
+            TAGS_URL, HTTP_IF_MODIFIED_SINCE=last_modified,
+        )
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(response.data), 1)
+
+    def test_etag_per_user(self):
+        """Test another user's ETag never matches."""
+        etag = self.client.get(RECIPE_URL)["ETag"]
+        other_user = get_user_model().objects.create_user(
+            email="other@test.com",
+            password="123test",
+        )
+        self.client.force_authenticate(other_user)
+
+        response = self.client.get(RECIPE_URL, HTTP_IF_NONE_MATCH=etag)
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
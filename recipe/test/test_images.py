@@ -0,0 +1,227 @@
+"""
+Test the background image rendition pipeline.
+"""
+import os
+import shutil
+import tempfile
+from concurrent.futures import ProcessPoolExecutor
+from decimal import Decimal
+from unittest.mock import patch
+
+from django.contrib.auth import get_user_model
+from django.test import (
+    TestCase,
+    override_settings,
+)
+from django.urls import reverse
+
+from PIL import Image
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from core.models import Recipe
+from recipe import images
+
+
+def image_upload_url(recipe_id):
+    """Create and return an image upload URL."""
+    return reverse("recipe:recipe-upload-image", args=[recipe_id])
+
+
+def image_file(size=(1200, 600), exif=None, color="red"):
+    """Return a temporary JPEG of ``size`` with optional EXIF data."""
+    image_file = tempfile.NamedTemporaryFile(suffix=".jpg")
+    image = Image.new("RGB", size, color)
+    if exif:
+        image.save(image_file, format="JPEG", exif=exif)
+    else:
+        image.save(image_file, format="JPEG")
+    image_file.seek(0)
+
+    return image_file
+
+
+@override_settings(RECIPE_IMAGE_WORKERS=0)
+class ImageRenditionTests(TestCase):
+    """Test rendering image renditions after an upload."""
+
+    def setUp(self):
+        self.media_root = tempfile.mkdtemp()
+        settings_override = override_settings(MEDIA_ROOT=self.media_root)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+        self.addCleanup(shutil.rmtree, self.media_root)
+
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user(
+            email="test@test.com",
+            password="123test",
+        )
+        self.client.force_authenticate(self.user)
+        self.recipe = Recipe.objects.create(
+            user=self.user,
+            title="Sample recipe",
+            time_minutes=22,
+            price=Decimal("5.25"),
+        )
+
+    def _upload(self, upload):
+        with upload:
+            return self.client.post(
+                image_upload_url(self.recipe.id),
+                {"image": upload},
+                format="multipart",
+            )
+
+    def test_upload_returns_before_rendering(self):
+        """Test the upload response doesn't wait for renditions."""
+        with self.captureOnCommitCallbacks() as callbacks:
+            response = self._upload(image_file())
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data["renditions"], {})
+        self.assertEqual(len(callbacks), 1)
+
+    def test_renditions_recorded(self):
+        """Test renditions are rendered, scaled down and recorded."""
+        with self.captureOnCommitCallbacks(execute=True):
+            self._upload(image_file())
+
+        self.recipe.refresh_from_db()
+        self.assertEqual(set(self.recipe.renditions), set(images.RENDITIONS))
+        for name, box in images.RENDITIONS.items():
+            path = os.path.join(self.media_root, self.recipe.renditions[name])
+            with Image.open(path) as rendition:
+                self.assertEqual(rendition.format, "WEBP")
+                self.assertLessEqual(rendition.width, box[0])
+                self.assertLessEqual(rendition.height, box[1])
+
+    def test_rendition_urls_in_detail(self):
+        """Test the recipe detail lists the rendition URLs."""
+        with self.captureOnCommitCallbacks(execute=True):
+            self._upload(image_file())
+
+        response = self.client.get(
+            reverse("recipe:recipe-detail", args=[self.recipe.id])
+        )
+
+        self.assertTrue(
+            response.data["renditions"]["thumbnail"].endswith("-thumbnail.webp")
+        )
+
+    def test_exif_applied_and_stripped(self):
+        """Test EXIF orientation is applied and the metadata dropped."""
+        exif = Image.Exif()
+        exif[0x0112] = 6  # Orientation: rotate 90 degrees clockwise.
+        exif[0x010F] = "Camera maker"
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self._upload(image_file(size=(400, 200), exif=exif))
+
+        self.recipe.refresh_from_db()
+        path = os.path.join(self.media_root, self.recipe.renditions["medium"])
+        with Image.open(path) as rendition:
+            self.assertEqual(rendition.size, (200, 400))
+            self.assertFalse(rendition.getexif())
+
+    def test_replaced_image_not_recorded(self):
+        """Test a finished job for a replaced image is ignored."""
+        with self.captureOnCommitCallbacks() as first:
+            self._upload(image_file())
+        with self.captureOnCommitCallbacks() as second:
+            self._upload(image_file(color="blue"))
+
+        first[0]()
+        self.recipe.refresh_from_db()
+        self.assertEqual(self.recipe.renditions, {})
+
+        second[0]()
+        self.recipe.refresh_from_db()
+        self.assertTrue(
+            self.recipe.renditions["medium"].startswith(
+                os.path.splitext(self.recipe.image.name)[0]
+            )
+        )
+
+    def test_failed_job_logged(self):
+        """Test a job failing leaves the recipe without renditions."""
+        with self.captureOnCommitCallbacks() as callbacks:
+            self._upload(image_file())
+        self.recipe.refresh_from_db()
+        os.remove(self.recipe.image.path)
+
+        with self.assertLogs("recipe.images", "ERROR"):
+            callbacks[0]()
+
+        self.recipe.refresh_from_db()
+        self.assertEqual(self.recipe.renditions, {})
+
+    @override_settings(RECIPE_IMAGE_WORKERS=1)
+    def test_render_in_process_pool(self):
+        """Test the render job runs in a worker process."""
+        with image_file() as upload:
+            name = os.path.basename(upload.name)
+            shutil.copy(upload.name, os.path.join(self.media_root, name))
+
+        with patch.object(images, "_executor", None):
+            executor = images.get_executor()
+            self.addCleanup(executor.shutdown)
+            self.assertIsInstance(executor, ProcessPoolExecutor)
+            renditions = executor.submit(
+                images.render_renditions, self.media_root, name,
+            ).result()
+
+        for path in renditions.values():
+            self.assertTrue(os.path.exists(os.path.join(self.media_root, path)))
+
+    def test_same_image_rendered_once(self):
+        """Test a recipe reusing a stored image reuses its renditions."""
+        with self.captureOnCommitCallbacks(execute=True):
+            self._upload(image_file())
+        self.recipe.refresh_from_db()
+        other = Recipe.objects.create(
+            user=self.user,
+            title="Other recipe",
+            time_minutes=5,
+            price=Decimal("1.00"),
+        )
+
+        paths = [
+            os.path.join(self.media_root, path)
+            for path in self.recipe.renditions.values()
+        ]
+        for path in paths:
+            os.utime(path, (0, 0))
+
+        with self.captureOnCommitCallbacks(execute=True):
+            with image_file() as upload:
+                self.client.post(
+                    image_upload_url(other.id),
+                    {"image": upload},
+                    format="multipart",
+                )
+
+        other.refresh_from_db()
+        self.assertEqual(other.image.name, self.recipe.image.name)
+        self.assertEqual(other.renditions, self.recipe.renditions)
+        for path in paths:
+            self.assertEqual(os.path.getmtime(path), 0)
+
+    @override_settings(RECIPE_IMAGE_GRACE_SECONDS=0)
+    def test_replaced_image_deleted(self):
+        """Test replacing an image deletes the old one and its renditions."""
+        with self.captureOnCommitCallbacks(execute=True):
+            self._upload(image_file())
+        self.recipe.refresh_from_db()
+        old = [self.recipe.image.path] + [
+            os.path.join(self.media_root, path)
+            for path in self.recipe.renditions.values()
+        ]
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self._upload(image_file(color="blue"))
+
+        self.recipe.refresh_from_db()
+        self.assertTrue(os.path.exists(self.recipe.image.path))
+        for path in old:
+            self.assertFalse(os.path.exists(path))
@@ -0,0 +1,176 @@
+"""
+Test cursor pagination of the recipe APIs.
+"""
+from base64 import b64encode
+from decimal import Decimal
+
+from django.contrib.auth import get_user_model
+from django.test import (
+    TestCase,
+    override_settings,
+)
+from django.urls import reverse
+
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from core import search
+from core.models import (
+    Ingredient,
+    Recipe,
+    Tag,
+)
+
+RECIPE_URL = reverse("recipe:recipe-list")
+TAGS_URL = reverse("recipe:tag-list")
+
+
+class RecipePaginationTests(TestCase):
+    """Test paginating recipes, tags and ingredients."""
+
+    def setUp(self):
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user(
+            email="test@test.com",
+            password="123test",
+        )
+        self.client.force_authenticate(self.user)
+        self.recipes = Recipe.objects.bulk_create([
+            Recipe(
+                user=self.user,
+                title=f"Recipe {i}",
+                time_minutes=10,
+                price=Decimal("1.00"),
+            )
+            for i in range(7)
+        ])
+
+    def _walk(self, url, params):
+        """Follow ``next`` links and return every page's results."""
+        pages = []
+        response = self.client.get(url, params)
+        while True:
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            pages.append(response.data["results"])
+            if not response.data["next"]:
+                return pages
+            response = self.client.get(response.data["next"])
+
+    def test_unpaginated_by_default(self):
+        """Test lists stay plain lists without pagination params."""
+        response = self.client.get(RECIPE_URL)
+
+        self.assertIsInstance(response.data, list)
+        self.assertEqual(len(response.data), 7)
+
+    def test_paginate_recipes(self):
+        """Test walking every page returns each recipe once, newest first."""
+        pages = self._walk(RECIPE_URL, {"page_size": 3})
+
+        self.assertEqual([len(page) for page in pages], [3, 3, 1])
+        ids = [recipe["id"] for page in pages for recipe in page]
+        self.assertEqual(
+            ids,
+            sorted((recipe.id for recipe in self.recipes), reverse=True),
+        )
+
+    def test_cursor_is_opaque(self):
+        """Test the next link carries an encoded cursor, not an offset."""
+        response = self.client.get(RECIPE_URL, {"page_size": 3})
+
+        self.assertIn("cursor=", response.data["next"])
+        self.assertNotIn("offset", response.data["next"])
+
+    @override_settings(RECIPE_API_MAX_PAGE_SIZE=5)
+    def test_page_size_capped(self):
+        """Test requested page sizes are capped."""
+        response = self.client.get(RECIPE_URL, {"page_size": 100})
+
+        self.assertEqual(len(response.data["results"]), 5)
+
+    @override_settings(RECIPE_API_PAGE_SIZE=4)
+    def test_default_page_size_for_invalid_size(self):
+        """Test an invalid page size falls back to the default."""
+        response = self.client.get(RECIPE_URL, {"page_size": "lots"})
+
+        self.assertEqual(len(response.data["results"]), 4)
+
+    def _rank_by_ingredients(self):
+        """Link recipes to 2, 2, 2, 1, 1, 0 and 0 ingredients of two."""
+        rice = Ingredient.objects.create(user=self.user, name="Rice")
+        carrot = Ingredient.objects.create(user=self.user, name="Carrot")
+        for recipe in self.recipes[:3]:
+            recipe.ingredients.add(rice, carrot)
+        for recipe in self.recipes[3:5]:
+            recipe.ingredients.add(rice)
+
+        return {
+            "ingredients": f"{rice.id},{carrot.id}",
+            "match": "ranked",
+            "page_size": 2,
+        }
+
+    def test_paginate_ranked(self):
+        """Test ranked pages continue through recipes with equal ranks."""
+        pages = self._walk(RECIPE_URL, self._rank_by_ingredients())
+
+        self.assertEqual([len(page) for page in pages], [2, 2, 1])
+        ids = [recipe.id for recipe in self.recipes]
+        self.assertEqual(
+            [recipe["id"] for page in pages for recipe in page],
+            [ids[2], ids[1], ids[0], ids[4], ids[3]],
+        )
+
+    def test_previous_page_of_ranked(self):
+        """Test the previous link of a ranked page returns the first page."""
+        first = self.client.get(RECIPE_URL, self._rank_by_ingredients())
+        second = self.client.get(first.data["next"])
+        previous = self.client.get(second.data["previous"])
+
+        self.assertEqual(previous.data["results"], first.data["results"])
+        self.assertIsNone(previous.data["previous"])
+
+    def test_paginate_search(self):
+        """Test search results paginate in rank order."""
+        search.get_backend().index(recipe.id for recipe in self.recipes)
+        self.recipes[2].description = "Recipe of recipes"
+        self.recipes[2].save()
+        expected = [
+            recipe["id"] for recipe in
+            self.client.get(RECIPE_URL, {"search": "recipe"}).data
+        ]
+
+        pages = self._walk(RECIPE_URL, {"search": "recipe", "page_size": 3})
+
+        self.assertEqual([len(page) for page in pages], [3, 3, 1])
+        self.assertEqual(
+            [recipe["id"] for page in pages for recipe in page], expected,
+        )
+
+    def test_invalid_cursor_position(self):
+        """Test a cursor whose position doesn't fit the ordering is rejected."""
+        cursor = b64encode(b"p=%5B1%5D").decode()
+        params = self._rank_by_ingredients()
+
+        response = self.client.get(RECIPE_URL, {**params, "cursor": cursor})
+
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_paginate_tags_by_name(self):
+        """Test tags paginate by name with a stable order."""
+        names = ["Apple", "Banana", "Cherry", "Date", "Elder"]
+        Tag.objects.bulk_create([
+            Tag(user=self.user, name=name) for name in names
+        ])
+        other_user = get_user_model().objects.create_user(
+            email="other@test.com",
+            password="123test",
+        )
+        Tag.objects.create(user=other_user, name="Cherry")
+
+        pages = self._walk(TAGS_URL, {"page_size": 2})
+
+        self.assertEqual(
+            [tag["name"] for page in pages for tag in page],
+            sorted(names, reverse=True),
+        )
@@ -467,6 +467,92 @@ class PrivateRecipeAPITests(TestCase):
         self.assertIn(s2.data, response.data)
         self.assertNotIn(s3.data, response.data)
 
+    def test_filter_match_all_ingredients(self):
+        """Test match=all returns recipes with every listed ingredient."""
+        rice = Ingredient.objects.create(user=self.user, name="Rice")
+        carrot = Ingredient.objects.create(user=self.user, name="Carrot")
+        plov = create_recipe(user=self.user, title="Plov")
+        plov.ingredients.add(rice, carrot)
+        kasha = create_recipe(user=self.user, title="Kasha")
+        kasha.ingredients.add(rice)
+
+        params = {
+            'ingredients': f'{rice.id},{carrot.id}',
+            'match': 'all',
+        }
+        response = self.client.get(RECIPE_URL, params)
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual([r['id'] for r in response.data], [plov.id])
+
+    def test_filter_match_all_tags_and_ingredients(self):
+        """Test match=all applies to tags and ingredients together."""
+        tag = Tag.objects.create(user=self.user, name="Dinner")
+        rice = Ingredient.objects.create(user=self.user, name="Rice")
+        plov = create_recipe(user=self.user, title="Plov")
+        plov.tags.add(tag)
+        plov.ingredients.add(rice)
+        kasha = create_recipe(user=self.user, title="Kasha")
+        kasha.ingredients.add(rice)
+
+        params = {
+            'tags': f'{tag.id}',
+            'ingredients': f'{rice.id}',
+            'match': 'all',
+        }
+        response = self.client.get(RECIPE_URL, params)
+
+        self.assertEqual([r['id'] for r in response.data], [plov.id])
+
+    def test_filter_match_ranked(self):
+        """Test match=ranked orders recipes by matched ingredients."""
+        rice = Ingredient.objects.create(user=self.user, name="Rice")
+        carrot = Ingredient.objects.create(user=self.user, name="Carrot")
+        onion = Ingredient.objects.create(user=self.user, name="Onion")
+        plov = create_recipe(user=self.user, title="Plov")
+        plov.ingredients.add(rice, carrot, onion)
+        kasha = create_recipe(user=self.user, title="Kasha")
+        kasha.ingredients.add(rice)
+        soup = create_recipe(user=self.user, title="Soup")
+        soup.ingredients.add(carrot, onion)
+        create_recipe(user=self.user, title="Salad")
+
+        params = {
+            'ingredients': f'{rice.id},{carrot.id},{onion.id}',
+            'match': 'ranked',
+        }
+        response = self.client.get(RECIPE_URL, params)
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            [r['id'] for r in response.data],
+            [plov.id, soup.id, kasha.id],
+        )
+
+    def test_filter_invalid_match(self):
+        """Test an unknown match mode is rejected."""
+        response = self.client.get(RECIPE_URL, {'match': 'some'})
+
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_search_recipes(self):
+        """Test searching recipes by text, best matches first."""
+        plov = create_recipe(user=self.user, title="Plov")
+        tag = Tag.objects.create(user=self.user, name="Plov")
+        lagman = create_recipe(user=self.user, title="Lagman")
+        lagman.tags.add(tag)
+        create_recipe(user=self.user, title="Manti")
+        other_user = create_user(email="other@test.com", password="test123")
+        create_recipe(user=other_user, title="Plov")
+
+        response = self.client.get(RECIPE_URL, {'search': 'plov'})
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            [r['id'] for r in response.data],
+            [plov.id, lagman.id],
+        )
+
 
 class ImageUploadTests(TestCase):
     """Tests for image upload APIs."""
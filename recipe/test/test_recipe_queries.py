@@ -0,0 +1,292 @@
+"""
+Test the number of queries issued by the recipe APIs.
+"""
+from decimal import Decimal
+from unittest import skipUnless
+
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from rest_framework import status
+from rest_framework.request import Request
+from rest_framework.test import (
+    APIClient,
+    APIRequestFactory,
+)
+
+from core.models import (
+    Recipe,
+    Tag,
+    Ingredient,
+)
+from recipe.views import (
+    RecipeViewSet,
+    TagViewSet,
+)
+
+RECIPE_URL = reverse("recipe:recipe-list")
+
+# One query for the user's data version, one for the recipes plus one
+# prefetch each for tags and ingredients.
+LIST_QUERIES = 4
+
+
+def detail_url(recipe_id):
+    """Create and return a recipe detail URL."""
+    return reverse("recipe:recipe-detail", args=[recipe_id])
+
+
+def create_recipes(user, count):
+    """Create ``count`` recipes, each with a tag and two ingredients."""
+    tag = Tag.objects.create(user=user, name="Dinner")
+    salt = Ingredient.objects.create(user=user, name="Salt")
+    pepper = Ingredient.objects.create(user=user, name="Pepper")
+    recipes = Recipe.objects.bulk_create([
+        Recipe(
+            user=user,
+            title=f"Recipe {i}",
+            time_minutes=10,
+            price=Decimal("5.25"),
+        )
+        for i in range(count)
+    ])
+    Recipe.tags.through.objects.bulk_create([
+        Recipe.tags.through(recipe_id=recipe.id, tag_id=tag.id)
+        for recipe in recipes
+    ])
+    Recipe.ingredients.through.objects.bulk_create([
+        Recipe.ingredients.through(recipe_id=recipe.id, ingredient_id=ing.id)
+        for recipe in recipes
+        for ing in (salt, pepper)
+    ])
+
+    return recipes
+
+
+class RecipeQueryCountTests(TestCase):
+    """Test the recipe endpoints issue a fixed number of queries."""
+
+    def setUp(self):
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user(
+            email="test@test.com",
+            password="123test",
+        )
+        self.client.force_authenticate(self.user)
+
+    def _assert_list_queries(self, count):
+        create_recipes(self.user, count)
+
+        with self.assertNumQueries(LIST_QUERIES):
+            response = self.client.get(RECIPE_URL)
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(response.data), count)
+        self.assertEqual(len(response.data[0]["tags"]), 1)
+        self.assertEqual(len(response.data[0]["ingredients"]), 2)
+
+    def test_list_one_recipe(self):
+        """Test listing a single recipe."""
+        self._assert_list_queries(1)
+
+    def test_list_hundred_recipes(self):
+        """Test listing 100 recipes costs the same as listing one."""
+        self._assert_list_queries(100)
+
+    def test_list_thousand_recipes(self):
+        """Test listing 1000 recipes costs the same as listing one."""
+        self._assert_list_queries(1000)
+
+    def test_list_with_filters(self):
+        """Test filtering by tags and ingredients keeps the query count."""
+        create_recipes(self.user, 10)
+        tag = Tag.objects.get(user=self.user)
+        ingredient = Ingredient.objects.filter(user=self.user).first()
+
+        with self.assertNumQueries(LIST_QUERIES):
+            response = self.client.get(RECIPE_URL, {
+                "tags": f"{tag.id}",
+                "ingredients": f"{ingredient.id}",
+            })
+
+        self.assertEqual(len(response.data), 10)
+
+    def test_list_defers_detail_columns(self):
+        """Test the list query does not load detail-only columns."""
+        create_recipes(self.user, 1)
+
+        with self.assertNumQueries(LIST_QUERIES) as ctx:
+            self.client.get(RECIPE_URL)
+
+        recipe_sql = ctx.captured_queries[1]["sql"]
+        self.assertNotIn('"description"', recipe_sql)
+        self.assertNotIn('"image"', recipe_sql)
+
+    def test_retrieve_recipe(self):
+        """Test retrieving a recipe prefetches its relations."""
+        recipe = create_recipes(self.user, 1)[0]
+
+        with self.assertNumQueries(LIST_QUERIES):
+            response = self.client.get(detail_url(recipe.id))
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertIn("description", response.data)
+
+
+class RecipeWriteQueryCountTests(TestCase):
+    """Test nested writes cost a fixed number of queries."""
+
+    def setUp(self):
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user(
+            email="test@test.com",
+            password="123test",
+        )
+        self.client.force_authenticate(self.user)
+
+    def _payload(self, count, prefix="Item"):
+        return {
+            "title": "Plov",
+            "time_minutes": 90,
+            "price": Decimal("12.00"),
+            "tags": [{"name": f"{prefix} tag {i}"} for i in range(count)],
+            "ingredients": [
+                {"name": f"{prefix} ingredient {i}"} for i in range(count)
+            ],
+        }
+
+    def _count_queries(self, method, url, payload):
+        with CaptureQueriesContext(connection) as ctx:
+            response = getattr(self.client, method)(
+                url, payload, format="json"
+            )
+
+        self.assertIn(
+            response.status_code,
+            (status.HTTP_200_OK, status.HTTP_201_CREATED),
+        )
+        return len(ctx.captured_queries)
+
+    def test_create_queries_independent_of_nested_items(self):
+        """Test creating with 30 nested items costs the same as with 1."""
+        one = self._count_queries("post", RECIPE_URL, self._payload(1, "A"))
+        many = self._count_queries("post", RECIPE_URL, self._payload(30, "B"))
+
+        self.assertEqual(one, many)
+        recipe = Recipe.objects.get(user=self.user, tags__name="B tag 29")
+        self.assertEqual(recipe.tags.count(), 30)
+        self.assertEqual(recipe.ingredients.count(), 30)
+
+    def test_create_with_existing_items(self):
+        """Test reusing existing names costs no more than creating them."""
+        fresh = self._count_queries("post", RECIPE_URL, self._payload(30))
+        reused = self._count_queries("post", RECIPE_URL, self._payload(30))
+
+        self.assertLessEqual(reused, fresh)
+        self.assertEqual(Tag.objects.filter(user=self.user).count(), 30)
+
+    def test_update_queries_independent_of_nested_items(self):
+        """Test replacing 30 nested items costs the same as replacing 1."""
+        recipe = Recipe.objects.create(
+            user=self.user,
+            title="Plov",
+            time_minutes=90,
+            price=Decimal("12.00"),
+        )
+        url = detail_url(recipe.id)
+        self._count_queries("patch", url, self._payload(1, "A"))
+
+        one = self._count_queries("patch", url, self._payload(1, "B"))
+        many = self._count_queries("patch", url, self._payload(30, "C"))
+
+        self.assertEqual(one, many)
+        self.assertEqual(recipe.tags.count(), 30)
+
+    def test_update_keeps_unchanged_links(self):
+        """Test updating only touches links that changed."""
+        recipe = Recipe.objects.create(
+            user=self.user,
+            title="Plov",
+            time_minutes=90,
+            price=Decimal("12.00"),
+        )
+        kept = Tag.objects.create(user=self.user, name="Kept")
+        dropped = Tag.objects.create(user=self.user, name="Dropped")
+        recipe.tags.add(kept, dropped)
+        link_id = Recipe.tags.through.objects.get(
+            recipe=recipe, tag=kept
+        ).id
+
+        response = self.client.patch(
+            detail_url(recipe.id),
+            {"tags": [{"name": "Kept"}, {"name": "New"}]},
+            format="json",
+        )
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            set(recipe.tags.values_list("name", flat=True)),
+            {"Kept", "New"},
+        )
+        self.assertTrue(
+            Recipe.tags.through.objects.filter(id=link_id).exists()
+        )
+
+
+@skipUnless(connection.vendor == "sqlite", "Query plans are SQLite specific.")
+class QueryPlanTests(TestCase):
+    """Test the query plans of the filtered list endpoints."""
+
+    def setUp(self):
+        self.user = get_user_model().objects.create_user(
+            email="test@test.com",
+            password="123test",
+        )
+        create_recipes(self.user, 3)
+
+    def _plan(self, viewset, params):
+        request = Request(APIRequestFactory().get("/", params))
+        request.user = self.user
+        view = viewset(action="list", request=request, format_kwarg=None)
+
+        return view.get_queryset().explain()
+
+    def test_recipe_filters_use_exists(self):
+        """Test tag and ingredient filters do not deduplicate rows."""
+        tag = Tag.objects.get(user=self.user)
+        ingredient = Ingredient.objects.filter(user=self.user).first()
+
+        plan = self._plan(RecipeViewSet, {
+            "tags": f"{tag.id}",
+            "ingredients": f"{ingredient.id}",
+        })
+
+        self.assertNotIn("DISTINCT", plan)
+        self.assertIn("recipe_user_id_idx", plan)
+        self.assertIn("CORRELATED", plan)
+
+    def test_assigned_only_uses_counter(self):
+        """Test assigned_only filtering reads no recipe links."""
+        plan = self._plan(TagViewSet, {"assigned_only": 1})
+
+        self.assertNotIn("DISTINCT", plan)
+        self.assertNotIn("SCAN core_tag", plan)
+        self.assertNotIn("core_recipe_tags", plan)
+
+    def test_match_modes_use_covering_indexes(self):
+        """Test match counting only reads through-table indexes."""
+        ids = ",".join(str(pk) for pk in Ingredient.objects.filter(
+            user=self.user,
+        ).values_list("id", flat=True))
+
+        plan = self._plan(RecipeViewSet, {"ingredients": ids, "match": "all"})
+        self.assertIn("COVERING INDEX core_recipe_ingredients_match_idx", plan)
+
+        plan = self._plan(
+            RecipeViewSet, {"ingredients": ids, "match": "ranked"},
+        )
+        self.assertNotIn("SCAN U0", plan)
+        self.assertIn("SEARCH U0 USING COVERING INDEX", plan)
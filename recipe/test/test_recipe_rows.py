@@ -0,0 +1,132 @@
+"""
+Test the values() fast path renders recipes like RecipeSerializer.
+"""
+from decimal import Decimal
+
+from django.contrib.auth import get_user_model
+from django.db.models import Prefetch
+from django.test import TestCase
+from django.urls import reverse
+
+from rest_framework.renderers import JSONRenderer
+from rest_framework.test import APIClient
+
+from core.models import (
+    Recipe,
+    Tag,
+    Ingredient,
+)
+from recipe.serializers import (
+    RecipeSerializer,
+    RecipeRowListSerializer,
+)
+
+RECIPE_URL = reverse("recipe:recipe-list")
+
+
+class RecipeRowListSerializerTests(TestCase):
+    """Test the fast list output is byte-identical to the serializer's."""
+
+    def setUp(self):
+        self.user = get_user_model().objects.create_user(
+            email="test@test.com",
+            password="123test",
+        )
+
+    def _create(self, title, price, link="", tags=(), ingredients=()):
+        recipe = Recipe.objects.create(
+            user=self.user,
+            title=title,
+            time_minutes=10,
+            price=Decimal(price),
+            link=link,
+        )
+        for name in tags:
+            tag, _ = Tag.objects.get_or_create(user=self.user, name=name)
+            recipe.tags.add(tag)
+        for name in ingredients:
+            ingredient, _ = Ingredient.objects.get_or_create(
+                user=self.user, name=name,
+            )
+            recipe.ingredients.add(ingredient)
+
+        return recipe
+
+    def _assert_identical(self, queryset):
+        """Assert both paths render ``queryset`` to the same JSON bytes."""
+        expected = RecipeSerializer(
+            queryset.prefetch_related(
+                Prefetch("tags", queryset=Tag.objects.only("id", "name")),
+                Prefetch(
+                    "ingredients",
+                    queryset=Ingredient.objects.only("id", "name"),
+                ),
+            ),
+            many=True,
+        ).data
+        rows = queryset.values(*RecipeRowListSerializer.value_fields())
+        actual = RecipeRowListSerializer(rows).data
+
+        self.assertEqual(
+            JSONRenderer().render(actual),
+            JSONRenderer().render(expected),
+        )
+
+    def test_empty(self):
+        """Test an empty list renders the same."""
+        self._assert_identical(Recipe.objects.none())
+
+    def test_plain_recipes(self):
+        """Test recipes without tags or ingredients render the same."""
+        self._create("Soup", "5.00")
+        self._create("Bread", "0.50", link="https://example.com/bread")
+
+        self._assert_identical(Recipe.objects.order_by("-id"))
+
+    def test_decimal_formatting(self):
+        """Test prices keep their two decimal places."""
+        for price in ("0.00", "1.10", "999.99", "12.5"):
+            self._create(f"Recipe {price}", price)
+
+        self._assert_identical(Recipe.objects.order_by("id"))
+
+    def test_nested_items(self):
+        """Test nested tags and ingredients render the same, in order."""
+        self._create("Curry", "7.25", tags=["Spicy", "Dinner"],
+                     ingredients=["Rice", "Chili", "Garlic"])
+        self._create("Salad", "3.10", tags=["Dinner", "Vegan", "Quick"],
+                     ingredients=["Garlic"])
+        self._create("Water", "0.00")
+
+        self._assert_identical(Recipe.objects.order_by("-id"))
+
+    def test_unicode_text(self):
+        """Test non-ASCII titles and names render the same."""
+        self._create("Crème brûlée", "4.40", tags=["Désert"],
+                     ingredients=["Œuf", "Sucre"])
+        self._create("Плов", "12.00", tags=["Ужин"])
+
+        self._assert_identical(Recipe.objects.order_by("-id"))
+
+    def test_api_list_identical(self):
+        """Test the list API renders the serializer's JSON bytes."""
+        self._create("Curry", "7.25", tags=["Spicy", "Dinner"],
+                     ingredients=["Rice"])
+        self._create("Salad", "3.10", tags=["Dinner"])
+        client = APIClient()
+        client.force_authenticate(self.user)
+
+        response = client.get(RECIPE_URL)
+
+        expected = RecipeSerializer(
+            Recipe.objects.filter(user=self.user).order_by("-id"),
+            many=True,
+        ).data
+        self.assertEqual(response.content, JSONRenderer().render(expected))
+
+    def test_value_fields(self):
+        """Test rows only carry the plain fields the serializer renders."""
+        self.assertEqual(
+            RecipeRowListSerializer.value_fields(),
+            ["id", "title", "time_minutes", "price", "link"],
+        )
@@ -0,0 +1,249 @@
+"""
+Test routing the recipe API's reads to a read replica.
+
+A second SQLite database stands in for the replica. Rows are written to
+each database separately, as if the replica lagged behind the primary.
+"""
+from decimal import Decimal
+from unittest.mock import patch
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache as django_cache
+from django.db import (
+    DEFAULT_DB_ALIAS,
+    connections,
+    router,
+)
+from django.test import (
+    TestCase,
+    override_settings,
+)
+from django.urls import reverse
+
+from rest_framework import status
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APIClient
+
+from core import routers
+from core.authentication import token_cache
+from core.models import (
+    Recipe,
+    RecipeStats,
+    Tag,
+)
+from recipe.views import (
+    AsyncRecipeViewSet,
+    StatsViewSet,
+)
+
+REPLICA = "replica"
+
+RECIPES_URL = reverse("recipe:recipe-list")
+TAGS_URL = reverse("recipe:tag-list")
+STATS_URL = reverse("recipe:stats-list")
+
+
+def detail_url(recipe_id):
+    """Create and return a recipe detail URL."""
+    return reverse("recipe:recipe-detail", args=[recipe_id])
+
+
+def create_recipe(user, using=DEFAULT_DB_ALIAS, **params):
+    """Create and return a sample recipe in the database ``using``."""
+    defaults = {
+        "title": "Sample recipe",
+        "time_minutes": 22,
+        "price": Decimal("5.25"),
+    }
+    defaults.update(params)
+
+    return Recipe.objects.using(using).create(user=user, **defaults)
+
+
+@override_settings(DATABASE_REPLICAS=[REPLICA])
+class ReplicaRoutingTests(TestCase):
+    """Test reads are routed to the replica.
+
+    The replica's database is only set up, and its test database created,
+    while these tests run.
+    """
+
+    @classmethod
+    def setUpClass(cls):
+        connections.settings[REPLICA] = {
+            **connections.settings[DEFAULT_DB_ALIAS],
+            "NAME": REPLICA,
+            "TEST": {**connections.settings[DEFAULT_DB_ALIAS]["TEST"]},
+        }
+        cls.addClassCleanup(cls._remove_replica)
+        connections[REPLICA].creation.create_test_db(verbosity=0)
+        cls.databases = {DEFAULT_DB_ALIAS, REPLICA}
+        super().setUpClass()
+
+    @classmethod
+    def _remove_replica(cls):
+        connections[REPLICA].creation.destroy_test_db(REPLICA, verbosity=0)
+        del connections[REPLICA]
+        del connections.settings[REPLICA]
+
+    def setUp(self):
+        django_cache.clear()
+        token_cache.clear()
+        self.user = get_user_model().objects.create_user(
+            email="test@test.com",
+            password="123test",
+        )
+        self.user.save(using=REPLICA)
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def test_list_from_replica(self):
+        """Test recipes and tags are listed from the replica."""
+        create_recipe(self.user, title="Primary")
+        create_recipe(self.user, using=REPLICA, title="Replica")
+        Tag.objects.using(REPLICA).create(user=self.user, name="Vegan")
+
+        recipes = self.client.get(RECIPES_URL)
+        tags = self.client.get(TAGS_URL)
+
+        self.assertEqual(
+            [recipe["title"] for recipe in recipes.data],
+            ["Replica"],
+        )
+        self.assertEqual([tag["name"] for tag in tags.data], ["Vegan"])
+
+    def test_authentication_from_primary(self):
+        """Test tokens are looked up on the primary."""
+        key = Token.objects.create(user=self.user).key
+        client = APIClient()
+
+        response = client.get(RECIPES_URL, HTTP_AUTHORIZATION=f"Token {key}")
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+    def test_writes_to_primary(self):
+        """Test updates read and write the primary."""
+        recipe = create_recipe(self.user, title="Primary")
+
+        response = self.client.patch(detail_url(recipe.id), {"title": "New"})
+
+        recipe.refresh_from_db()
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(recipe.title, "New")
+        self.assertFalse(Recipe.objects.using(REPLICA).exists())
+
+    def test_reads_own_writes(self):
+        """Test a user reads from the primary after writing."""
+        create_recipe(self.user, using=REPLICA, title="Replica")
+
+        self.client.post(RECIPES_URL, {
+            "title": "Created", "time_minutes": 5, "price": "1.00",
+        })
+        response = self.client.get(RECIPES_URL)
+
+        self.assertEqual(
+            [recipe["title"] for recipe in response.data],
+            ["Created"],
+        )
+
+    @override_settings(DATABASE_REPLICA_PIN_SECONDS=0)
+    def test_pin_expires(self):
+        """Test reads go back to the replica after the pin window."""
+        create_recipe(self.user, using=REPLICA, title="Replica")
+
+        self.client.post(RECIPES_URL, {
+            "title": "Created", "time_minutes": 5, "price": "1.00",
+        })
+        response = self.client.get(RECIPES_URL)
+
+        self.assertEqual(
+            [recipe["title"] for recipe in response.data],
+            ["Replica"],
+        )
+
+    def test_lagging_replica_not_cached(self):
+        """Test responses of a replica behind the primary aren't cached."""
+        get_user_model().objects.touch_data(self.user.id)
+
+        for _ in range(2):
+            response = self.client.get(RECIPES_URL)
+            self.assertEqual(response["X-Cache"], "MISS")
+            self.assertNotIn("ETag", response)
+
+    def test_current_replica_cached(self):
+        """Test responses of a replica that caught up are cached."""
+        get_user_model().objects.touch_data(self.user.id)
+        self.user.refresh_from_db(using=DEFAULT_DB_ALIAS)
+        self.user.save(using=REPLICA)
+
+        first = self.client.get(RECIPES_URL)
+        second = self.client.get(RECIPES_URL)
+
+        self.assertEqual(second["X-Cache"], "HIT")
+        self.assertEqual(second["ETag"], first["ETag"])
+
+    def test_missing_stats_counted_on_primary(self):
+        """Test stats missing from the replica are counted on the primary."""
+        create_recipe(self.user, title="Primary")
+        RecipeStats.objects.all().delete()
+        RecipeStats.objects.using(REPLICA).all().delete()
+
+        response = self.client.get(STATS_URL)
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data["recipe_count"], 1)
+
+    def test_replica_released_on_error(self):
+        """Test a request failing with an exception releases the replica."""
+        client = APIClient(raise_request_exception=True)
+        client.force_authenticate(self.user)
+
+        with patch.object(StatsViewSet, "_stats", side_effect=RuntimeError):
+            with self.assertRaises(RuntimeError):
+                client.get(STATS_URL)
+
+        self.assertIsNone(routers._replica_request.get())
+        self.assertEqual(router.db_for_read(Recipe), DEFAULT_DB_ALIAS)
+
+    @override_settings(ROOT_URLCONF="recipe.test.test_async_views")
+    async def test_async_replica_released_on_error(self):
+        """Test the async views release the replica on exceptions too."""
+        token = await Token.objects.acreate(user=self.user)
+
+        with patch.object(
+            AsyncRecipeViewSet, "_alist_rows", side_effect=RuntimeError,
+        ):
+            with self.assertRaises(RuntimeError):
+                await self.async_client.get(
+                    RECIPES_URL, headers={"Authorization": f"Token {token}"},
+                )
+
+        self.assertIsNone(routers._replica_request.get())
+
+    def test_router_outside_views(self):
+        """Test reads elsewhere use the primary and writes always do."""
+        replica_recipe = create_recipe(self.user, using=REPLICA)
+
+        self.assertEqual(router.db_for_read(Recipe), DEFAULT_DB_ALIAS)
+        self.assertEqual(
+            router.db_for_write(Recipe, instance=replica_recipe),
+            DEFAULT_DB_ALIAS,
+        )
+        self.assertFalse(router.allow_migrate(REPLICA, "core"))
+
+    @override_settings(ROOT_URLCONF="recipe.test.test_async_views")
+    async def test_async_list_from_replica(self):
+        """Test the async views list from the replica."""
+        await Recipe.objects.using(REPLICA).acreate(
+            user=self.user, title="Replica", time_minutes=1,
+            price=Decimal("1"),
+        )
+        token = await Token.objects.acreate(user=self.user)
+        response = await self.async_client.get(
+            RECIPES_URL, headers={"Authorization": f"Token {token}"},
+        )
+
+        self.assertEqual(
+            [recipe["title"] for recipe in response.json()],
+            ["Replica"],
+        )
@@ -0,0 +1,184 @@
+"""
+Test the recipe stats API.
+"""
+import json
+from unittest.mock import patch
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache as django_cache
+from django.test import TestCase
+from django.urls import reverse
+
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from core import stats
+from core.models import (
+    RecipeStats,
+    Tag,
+)
+
+STATS_URL = reverse("recipe:stats-list")
+RECIPES_URL = reverse("recipe:recipe-list")
+BULK_URL = reverse("recipe:recipe-bulk")
+TAGS_URL = reverse("recipe:tag-list")
+
+
+def detail_url(recipe_id):
+    """Create and return a recipe detail URL."""
+    return reverse("recipe:recipe-detail", args=[recipe_id])
+
+
+def recipe_payload(title, **params):
+    """Return a sample recipe payload."""
+    payload = {
+        "title": title,
+        "time_minutes": 30,
+        "price": "4.50",
+    }
+    payload.update(params)
+
+    return payload
+
+
+class PublicStatsApiTests(TestCase):
+    """Test unauthenticated stats requests."""
+
+    def test_auth_required(self):
+        """Test auth is required for the stats."""
+        response = APIClient().get(STATS_URL)
+
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+
+
+class PrivateStatsApiTests(TestCase):
+    """Test authenticated stats requests."""
+
+    def setUp(self):
+        django_cache.clear()
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user(
+            email="test@test.com",
+            password="123test",
+        )
+        self.client.force_authenticate(self.user)
+
+    def _create(self, **params):
+        payload = recipe_payload("Plov", **params)
+        response = self.client.post(RECIPES_URL, payload, format="json")
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        return response.data["id"]
+
+    def assertCounted(self):
+        """Assert the stats kept on writes match recounting them."""
+        kept = self.client.get(STATS_URL).data
+        uses = dict(Tag.objects.values_list("name", "recipe_count"))
+        stats.rebuild()
+        django_cache.clear()
+
+        self.assertEqual(kept, self.client.get(STATS_URL).data)
+        self.assertEqual(
+            uses, dict(Tag.objects.values_list("name", "recipe_count")),
+        )
+
+    def test_empty_stats(self):
+        """Test the stats of a user without recipes."""
+        response = self.client.get(STATS_URL)
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data, {
+            "recipe_count": 0,
+            "tag_count": 0,
+            "ingredient_count": 0,
+            "total_time_minutes": 0,
+            "avg_time_minutes": None,
+        })
+
+    def test_stats_follow_writes(self):
+        """Test recipe creates, updates and deletes update the stats."""
+        self.client.get(STATS_URL)
+        plov = self._create(
+            tags=[{"name": "Dinner"}, {"name": "Rice"}],
+            ingredients=[{"name": "Rice"}],
+        )
+        self._create(time_minutes=10, tags=[{"name": "Dinner"}])
+
+        response = self.client.get(STATS_URL)
+        self.assertEqual(response.data["recipe_count"], 2)
+        self.assertEqual(response.data["tag_count"], 2)
+        self.assertEqual(response.data["ingredient_count"], 1)
+        self.assertEqual(response.data["avg_time_minutes"], 20)
+        self.assertCounted()
+
+        self.client.patch(detail_url(plov), {
+            "time_minutes": 50, "tags": [{"name": "Lunch"}],
+        }, format="json")
+        self.assertEqual(self.client.get(STATS_URL).data["tag_count"], 3)
+        self.assertCounted()
+
+        self.client.delete(detail_url(plov))
+        self.assertEqual(
+            self.client.get(STATS_URL).data["total_time_minutes"], 10,
+        )
+        self.assertCounted()
+
+    def test_bulk_import(self):
+        """Test bulk imported recipes are counted."""
+        records = [
+            recipe_payload("Plov", tags=[{"name": "Dinner"}]),
+            recipe_payload("Lagman", time_minutes=60, tags=[
+                {"name": "Dinner"}, {"name": "Noodles"},
+            ]),
+        ]
+        response = self.client.post(
+            BULK_URL,
+            "".join(json.dumps(record) + "\n" for record in records),
+            content_type="application/x-ndjson",
+        )
+        b"".join(response.streaming_content)
+
+        self.assertEqual(
+            dict(Tag.objects.values_list("name", "recipe_count")),
+            {"Dinner": 2, "Noodles": 1},
+        )
+        self.assertEqual(self.client.get(STATS_URL).data["recipe_count"], 2)
+        self.assertCounted()
+
+    def test_concurrent_attr_insert(self):
+        """Test tags another request inserted first are counted once."""
+        bulk_create = Tag.objects.bulk_create
+
+        def insert_first(objs, **kwargs):
+            Tag.objects.create(user=self.user, name="Dinner")
+            return bulk_create(objs, **kwargs)
+
+        with patch.object(Tag.objects, "bulk_create", insert_first):
+            self._create(tags=[{"name": "Dinner"}, {"name": "Rice"}])
+
+        self.assertEqual(self.client.get(STATS_URL).data["tag_count"], 2)
+        self.assertCounted()
+
+    def test_missing_stats(self):
+        """Test stats are counted for users without a stats row."""
+        self._create()
+        RecipeStats.objects.all().delete()
+
+        response = self.client.get(STATS_URL)
+
+        self.assertEqual(response.data["recipe_count"], 1)
+
+    def test_assigned_only(self):
+        """Test assigned_only follows the usage counts."""
+        plov = self._create(tags=[{"name": "Dinner"}])
+        Tag.objects.create(user=self.user, name="Breakfast")
+
+        response = self.client.get(TAGS_URL, {"assigned_only": 1})
+        self.assertEqual([tag["name"] for tag in response.data], ["Dinner"])
+
+        self.client.patch(detail_url(plov), {
+            "tags": [{"name": "Breakfast"}],
+        }, format="json")
+        response = self.client.get(TAGS_URL, {"assigned_only": 1})
+        self.assertEqual(
+            [tag["name"] for tag in response.data], ["Breakfast"],
+        )
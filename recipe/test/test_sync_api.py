@@ -0,0 +1,241 @@
+"""
+Test the delta sync API.
+"""
+from datetime import timedelta
+from decimal import Decimal
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.test import (
+    TestCase,
+    override_settings,
+)
+from django.urls import reverse
+from django.utils import timezone
+
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from core.models import (
+    Recipe,
+    Tag,
+    Ingredient,
+    Tombstone,
+)
+from recipe import sync
+
+SYNC_URL = reverse("recipe:sync-list")
+
+
+def detail_url(recipe_id):
+    """Create and return a recipe detail URL."""
+    return reverse("recipe:recipe-detail", args=[recipe_id])
+
+
+def create_recipe(user, **params):
+    """Create and return a sample recipe."""
+    defaults = {
+        "title": "Sample recipe",
+        "time_minutes": 22,
+        "price": Decimal("5.25"),
+    }
+    defaults.update(params)
+
+    return Recipe.objects.create(user=user, **defaults)
+
+
+@override_settings(SYNC_TOKEN_LAG_SECONDS=0)
+class SyncApiTests(TestCase):
+    """Test syncing changes since a token.
+
+    Tokens don't lag here, so each delta holds exactly the changes since.
+    """
+
+    def setUp(self):
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user(
+            email="test@test.com",
+            password="123test",
+        )
+        self.client.force_authenticate(self.user)
+        self.recipe = create_recipe(self.user, title="Kept")
+        self.tag = Tag.objects.create(user=self.user, name="Vegan")
+        self.recipe.tags.add(self.tag)
+
+    def _sync(self, token=None):
+        params = {"since": token} if token is not None else {}
+        response = self.client.get(SYNC_URL, params)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+        return response.data
+
+    def test_auth_required(self):
+        """Test auth is required to sync."""
+        response = APIClient().get(SYNC_URL)
+
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_full_sync(self):
+        """Test syncing without a token returns everything of the user."""
+        other_user = get_user_model().objects.create_user(
+            email="other@test.com",
+            password="123test",
+        )
+        create_recipe(other_user)
+
+        data = self._sync()
+
+        self.assertEqual([r["id"] for r in data["recipes"]], [self.recipe.id])
+        self.assertEqual(data["recipes"][0]["tags"], [
+            {"id": self.tag.id, "name": "Vegan"},
+        ])
+        self.assertEqual([t["id"] for t in data["tags"]], [self.tag.id])
+        self.assertTrue(data["token"])
+
+    def test_nothing_changed(self):
+        """Test syncing right after a sync returns no changes."""
+        token = self._sync()["token"]
+
+        data = self._sync(token)
+
+        self.assertEqual(data["recipes"], [])
+        self.assertEqual(data["tags"], [])
+        self.assertEqual(data["ingredients"], [])
+        self.assertEqual(
+            data["deleted"],
+            {"recipes": [], "tags": [], "ingredients": []},
+        )
+
+    def test_changes_since_token(self):
+        """Test only rows written after the token are returned."""
+        untouched = create_recipe(self.user, title="Untouched")
+        token = self._sync()["token"]
+
+        self.client.patch(detail_url(self.recipe.id), {"title": "Changed"})
+        new = create_recipe(self.user, title="New")
+        ingredient = Ingredient.objects.create(user=self.user, name="Salt")
+        data = self._sync(token)
+
+        ids = [recipe["id"] for recipe in data["recipes"]]
+        self.assertEqual(ids, [self.recipe.id, new.id])
+        self.assertNotIn(untouched.id, ids)
+        self.assertEqual(data["tags"], [])
+        self.assertEqual([i["id"] for i in data["ingredients"]], [ingredient.id])
+
+    def test_deletions_returned_as_tombstones(self):
+        """Test deleted rows are reported by id."""
+        token = self._sync()["token"]
+
+        tag_id = self.tag.id
+        self.client.delete(detail_url(self.recipe.id))
+        self.tag.delete()
+        data = self._sync(token)
+
+        self.assertEqual(data["recipes"], [])
+        self.assertEqual(data["deleted"]["recipes"], [self.recipe.id])
+        self.assertEqual(data["deleted"]["tags"], [tag_id])
+
+    def test_relinking_changes_recipe(self):
+        """Test adding a tag to a recipe marks the recipe changed."""
+        tag = Tag.objects.create(user=self.user, name="Quick")
+        token = self._sync()["token"]
+
+        self.recipe.tags.add(tag)
+        data = self._sync(token)
+
+        self.assertEqual([r["id"] for r in data["recipes"]], [self.recipe.id])
+
+    def test_renaming_tag_changes_recipes(self):
+        """Test renaming a tag marks recipes nesting it changed."""
+        token = self._sync()["token"]
+
+        self.tag.name = "Vegetarian"
+        self.tag.save()
+        data = self._sync(token)
+
+        self.assertEqual(data["recipes"][0]["tags"][0]["name"], "Vegetarian")
+        self.assertEqual([t["id"] for t in data["tags"]], [self.tag.id])
+
+    def test_deleting_user_leaves_no_tombstones(self):
+        """Test deleting a user doesn't record their rows as tombstones."""
+        self.user.delete()
+
+        self.assertFalse(Tombstone.objects.exists())
+
+    def test_invalid_token(self):
+        """Test a malformed token is rejected."""
+        response = self.client.get(SYNC_URL, {"since": "yesterday"})
+
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_query_count_independent_of_catalogue(self):
+        """Test a sync costs the same queries with few or many rows."""
+        token = self._sync()["token"]
+        Recipe.objects.bulk_create([
+            Recipe(
+                user=self.user,
+                title=f"Recipe {i}",
+                time_minutes=5,
+                price=Decimal("1.00"),
+            )
+            for i in range(50)
+        ])
+
+        # Data version, tombstones, recipes and their two prefetches, tags
+        # and ingredients.
+        with self.assertNumQueries(7):
+            data = self._sync(token)
+
+        self.assertEqual(len(data["recipes"]), 50)
+
+
+@override_settings(SYNC_TOKEN_LAG_SECONDS=60, SYNC_TOMBSTONE_RETENTION_DAYS=30)
+class SyncTokenTests(TestCase):
+    """Test sync tokens lag the clock and expire with the tombstones."""
+
+    def setUp(self):
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user(
+            email="test@test.com",
+            password="123test",
+        )
+        self.client.force_authenticate(self.user)
+
+    def test_late_commit_sent_next(self):
+        """Test a row saved before a sync but committed after is sent."""
+        token = self.client.get(SYNC_URL).data["token"]
+        recipe = create_recipe(self.user)
+        Recipe.objects.filter(id=recipe.id).update(
+            updated_at=timezone.now() - timedelta(seconds=30),
+        )
+
+        response = self.client.get(SYNC_URL, {"since": token})
+
+        self.assertEqual(
+            [r["id"] for r in response.data["recipes"]], [recipe.id],
+        )
+
+    def test_expired_token(self):
+        """Test tokens older than the tombstones kept are refused."""
+        token = sync.encode_token(timezone.now() - timedelta(days=31))
+
+        response = self.client.get(SYNC_URL, {"since": token})
+
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_prune_tombstones_command(self):
+        """Test the prune command deletes tombstones past retention."""
+        old, new = [
+            Tombstone.objects.create(
+                user=self.user, kind=Tombstone.RECIPE, object_id=i,
+            )
+            for i in range(2)
+        ]
+        Tombstone.objects.filter(id=old.id).update(
+            deleted_at=timezone.now() - timedelta(days=31),
+        )
+
+        call_command("prune_tombstones", stdout=StringIO())
+
+        self.assertEqual(list(Tombstone.objects.all()), [new])
@@ -85,7 +85,19 @@ class PrivateTagsApiTests(TestCase):
         tag.refresh_from_db()
 
         self.assertEqual(tag.name, payload['name'])
-    
+
+    def test_update_tag_duplicate_name_error(self):
+        """Test renaming a tag onto an existing name returns an error."""
+        Tag.objects.create(user=self.user, name="Dessert")
+        tag = Tag.objects.create(user=self.user, name="After dinner")
+
+        url = detail_url(tag.id)
+        response = self.client.patch(url, {'name': 'Dessert'})
+
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        tag.refresh_from_db()
+        self.assertEqual(tag.name, "After dinner")
+
     def test_delete_tag(self):
         """Test deleting a tag."""
         tag = Tag.objects.create(user=self.user, name="Bakery")
@@ -0,0 +1,217 @@
+"""
+Test the bounded streaming image upload handler.
+"""
+import hashlib
+import io
+import os
+import shutil
+import struct
+import tempfile
+import tracemalloc
+import zlib
+from decimal import Decimal
+
+from django.contrib.auth import get_user_model
+from django.test import (
+    TestCase,
+    override_settings,
+)
+from django.urls import reverse
+
+from PIL import Image
+from rest_framework import status
+from rest_framework.exceptions import ValidationError
+from rest_framework.test import APIClient
+
+from core.models import Recipe
+from recipe.uploads import (
+    ImageUploadHandler,
+    UploadTooLarge,
+)
+
+CHUNK = 64 * 2**10
+
+
+def image_upload_url(recipe_id):
+    """Create and return an image upload URL."""
+    return reverse("recipe:recipe-upload-image", args=[recipe_id])
+
+
+def png_chunk(kind, data):
+    """Return a PNG chunk of ``kind`` holding ``data``."""
+    return (
+        struct.pack(">I", len(data)) + kind + data
+        + struct.pack(">I", zlib.crc32(kind + data))
+    )
+
+
+def png_header(width, height):
+    """Return the header of a PNG claiming to be ``width`` x ``height``."""
+    return (
+        b"\x89PNG\r\n\x1a\n"
+        + png_chunk(b"IHDR", struct.pack(">IIBBBBB", width, height, 8, 2, 0, 0, 0))
+        + png_chunk(b"IDAT", b"")
+    )
+
+
+def png_bytes(size=(100, 100)):
+    """Return a valid PNG image of ``size``."""
+    buffer = io.BytesIO()
+    Image.new("RGB", size, "blue").save(buffer, format="PNG")
+
+    return buffer.getvalue()
+
+
+class ImageUploadHandlerTests(TestCase):
+    """Test the handler on chunks fed directly."""
+
+    def _handler(self):
+        handler = ImageUploadHandler()
+        handler.new_file("image", "image.png", "image/png", None)
+
+        return handler
+
+    def _feed(self, handler, data, chunk_size=CHUNK):
+        """Feed ``data`` to ``handler`` in chunks."""
+        for start in range(0, len(data), chunk_size):
+            handler.receive_data_chunk(data[start:start + chunk_size], start)
+
+    def test_non_image_rejected_on_first_chunk(self):
+        """Test a non-image is rejected before more data is read."""
+        handler = self._handler()
+        path = handler.file.temporary_file_path()
+
+        with self.assertRaises(ValidationError):
+            handler.receive_data_chunk(b"%PDF-1.7 not an image at all", 0)
+
+        self.assertFalse(os.path.exists(path))
+
+    @override_settings(RECIPE_IMAGE_MAX_BYTES=4 * CHUNK)
+    def test_stops_at_byte_limit(self):
+        """Test the upload stops at the first chunk over the limit."""
+        handler = self._handler()
+        data = png_bytes() + os.urandom(10 * CHUNK)
+
+        with self.assertRaises(UploadTooLarge):
+            self._feed(handler, data)
+
+        self.assertLessEqual(handler.received, 5 * CHUNK)
+
+    def test_decompression_bomb_rejected_from_header(self):
+        """Test a header claiming a huge image is rejected immediately."""
+        handler = self._handler()
+
+        with self.assertRaises(ValidationError) as ctx:
+            handler.receive_data_chunk(png_header(100_000, 100_000), 0)
+
+        self.assertIn("pixels", str(ctx.exception.detail["image"][0]))
+
+    @override_settings(RECIPE_IMAGE_MAX_DIMENSION=1000)
+    def test_dimension_limit(self):
+        """Test images over the dimension limit are rejected."""
+        handler = self._handler()
+
+        with self.assertRaises(ValidationError):
+            handler.receive_data_chunk(png_header(1001, 10), 0)
+
+    def test_truncated_header_rejected(self):
+        """Test a file ending before its header is complete is rejected."""
+        handler = self._handler()
+        handler.receive_data_chunk(b"\x89PNG\r\n\x1a\n\x00\x00\x00\x0d", 0)
+
+        with self.assertRaises(ValidationError):
+            handler.file_complete(12)
+
+    def test_content_hashed(self):
+        """Test the finished file carries the SHA-256 of its content."""
+        handler = self._handler()
+        data = png_bytes(size=(400, 400))
+        self._feed(handler, data, chunk_size=1024)
+
+        uploaded = handler.file_complete(len(data))
+
+        self.assertEqual(uploaded.content_hash, hashlib.sha256(data).hexdigest())
+        self.assertEqual(uploaded.read(), data)
+        self.assertEqual(handler.image_size, (400, 400))
+
+    @override_settings(RECIPE_IMAGE_MAX_BYTES=64 * 2**20)
+    def test_memory_bounded(self):
+        """Test streaming a large upload buffers no more than its header."""
+        handler = self._handler()
+        data = png_bytes() + os.urandom(16 * 2**20)
+
+        tracemalloc.start()
+        try:
+            self._feed(handler, data)
+            _current, peak = tracemalloc.get_traced_memory()
+        finally:
+            tracemalloc.stop()
+        handler.file.close()
+
+        self.assertLess(peak, 1 * 2**20)
+
+
+class ImageUploadApiTests(TestCase):
+    """Test the upload-image action rejects bad uploads."""
+
+    def setUp(self):
+        self.media_root = tempfile.mkdtemp()
+        settings_override = override_settings(MEDIA_ROOT=self.media_root)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+        self.addCleanup(shutil.rmtree, self.media_root)
+
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user(
+            email="test@test.com",
+            password="123test",
+        )
+        self.client.force_authenticate(self.user)
+        self.recipe = Recipe.objects.create(
+            user=self.user,
+            title="Sample recipe",
+            time_minutes=22,
+            price=Decimal("5.25"),
+        )
+
+    def _upload(self, data, name="image.png"):
+        upload = io.BytesIO(data)
+        upload.name = name
+
+        return self.client.post(
+            image_upload_url(self.recipe.id),
+            {"image": upload},
+            format="multipart",
+        )
+
+    def test_upload_image(self):
+        """Test a valid image is accepted."""
+        response = self._upload(png_bytes())
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+    @override_settings(RECIPE_IMAGE_MAX_BYTES=CHUNK)
+    def test_oversized_upload(self):
+        """Test an upload over the byte limit is refused."""
+        response = self._upload(png_bytes() + os.urandom(4 * CHUNK))
+
+        self.assertEqual(
+            response.status_code,
+            status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+        )
+        self.recipe.refresh_from_db()
+        self.assertFalse(self.recipe.image)
+
+    def test_non_image_upload(self):
+        """Test a file that isn't an image is refused."""
+        response = self._upload(b"<html>not an image</html>" * 100)
+
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn("image", response.data)
+
+    def test_decompression_bomb_upload(self):
+        """Test an image claiming huge dimensions is refused."""
+        response = self._upload(png_header(100_000, 100_000))
+
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertFalse(os.listdir(self.media_root))
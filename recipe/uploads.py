@@ -0,0 +1,145 @@
+"""
+Upload handler bounding recipe image uploads while they stream in.
+"""
+import hashlib
+import io
+import warnings
+
+from django.conf import settings
+from django.core.files.uploadhandler import TemporaryFileUploadHandler
+from django.utils.translation import (
+    gettext as _,
+    gettext_lazy,
+)
+
+from PIL import Image
+from rest_framework import status
+from rest_framework.exceptions import (
+    APIException,
+    ValidationError,
+)
+
+# Leading bytes of the accepted image formats.
+SIGNATURES = {
+    "JPEG": (b"\xff\xd8\xff",),
+    "PNG": (b"\x89PNG\r\n\x1a\n",),
+    "GIF": (b"GIF87a", b"GIF89a"),
+    "WEBP": (b"RIFF",),
+}
+
+# Bytes needed to tell the formats apart; WebP has its tag at offset 8.
+SIGNATURE_BYTES = 12
+
+# Bytes to buffer while looking for the image size. JPEG puts it after any
+# EXIF data, which is at most 64 KiB.
+HEADER_BYTES = 256 * 2**10
+
+# Allowance for multipart boundaries and headers over the file itself.
+MULTIPART_OVERHEAD = 64 * 2**10
+
+
+class UploadTooLarge(APIException):
+    """Upload over ``RECIPE_IMAGE_MAX_BYTES``."""
+    status_code = status.HTTP_413_REQUEST_ENTITY_TOO_LARGE
+    default_detail = gettext_lazy("The uploaded image is too large.")
+    default_code = "upload_too_large"
+
+
+def sniff_format(head):
+    """Return the image format ``head`` starts with, or ``None``."""
+    for image_format, signatures in SIGNATURES.items():
+        if head.startswith(signatures):
+            if image_format == "WEBP" and head[8:12] != b"WEBP":
+                continue
+            return image_format
+
+    return None
+
+
+class ImageUploadHandler(TemporaryFileUploadHandler):
+    """Stream an image upload to disk, rejecting it as soon as it fails.
+
+    The request is refused from its Content-Length before any body is read,
+    a file from its first bytes if they aren't a known image format, and
+    from its header if the image is larger than
+    ``RECIPE_IMAGE_MAX_DIMENSION`` on a side. Bytes past
+    ``RECIPE_IMAGE_MAX_BYTES`` stop the upload. Only the header is ever
+    buffered, and the finished file carries the SHA-256 of its content as
+    ``content_hash``.
+    """
+
+    def __init__(self, request=None):
+        super().__init__(request)
+        self.max_bytes = settings.RECIPE_IMAGE_MAX_BYTES
+        self.max_dimension = settings.RECIPE_IMAGE_MAX_DIMENSION
+
+    def _reject(self, exc):
+        """Drop the partial file and raise ``exc``."""
+        self.upload_interrupted()
+        raise exc
+
+    def handle_raw_input(self, input_data, META, content_length, boundary,
+                         encoding=None):
+        if content_length > self.max_bytes + MULTIPART_OVERHEAD:
+            raise UploadTooLarge()
+
+    def new_file(self, *args, **kwargs):
+        super().new_file(*args, **kwargs)
+        self.head = b""
+        self.image_size = None
+        self.received = 0
+        self.hasher = hashlib.sha256()
+
+    def receive_data_chunk(self, raw_data, start):
+        self.received += len(raw_data)
+        if self.received > self.max_bytes:
+            self._reject(UploadTooLarge())
+        if self.image_size is None:
+            self.head += raw_data
+            self._check_header()
+
+        self.hasher.update(raw_data)
+        super().receive_data_chunk(raw_data, start)
+
+    def _check_header(self, complete=False):
+        """Check the buffered head once it is long enough to judge."""
+        if len(self.head) < SIGNATURE_BYTES and not complete:
+            return
+        image_format = sniff_format(self.head)
+        if image_format is None:
+            self._reject(ValidationError({"image": [
+                _("Upload a JPEG, PNG, GIF or WebP image."),
+            ]}))
+
+        try:
+            with warnings.catch_warnings():
+                warnings.simplefilter("error", Image.DecompressionBombWarning)
+                with Image.open(
+                    io.BytesIO(self.head), formats=[image_format],
+                ) as image:
+                    size = image.size
+        except (Image.DecompressionBombError, Image.DecompressionBombWarning):
+            size = None
+        except Exception:
+            # The header isn't complete yet.
+            if complete or len(self.head) > HEADER_BYTES:
+                self._reject(ValidationError({"image": [
+                    _("The image header could not be read."),
+                ]}))
+            return
+
+        if size is None or max(size) > self.max_dimension:
+            self._reject(ValidationError({"image": [
+                _("Images may be at most %(size)s pixels on a side.")
+                % {"size": self.max_dimension},
+            ]}))
+        self.image_size = size
+        self.head = b""
+
+    def file_complete(self, file_size):
+        if self.image_size is None:
+            self._check_header(complete=True)
+        file = super().file_complete(file_size)
+        file.content_hash = self.hasher.hexdigest()
+
+        return file
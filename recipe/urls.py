@@ -1,6 +1,7 @@
 """
 URL mappings for the recipe app
 """
+from django.conf import settings
 from django.urls import (
     path,
     include
@@ -9,15 +10,27 @@ from django.urls import (
 from rest_framework.routers import DefaultRouter
 
 from recipe.views import (
+    AsyncRecipeViewSet,
+    AsyncTagViewSet,
+    AsyncIngredientViewSet,
     RecipeViewSet,
     TagViewSet,
     IngredientViewSet,
+    StatsViewSet,
+    SyncViewSet,
 )
 
 router = DefaultRouter()
-router.register("recipes", RecipeViewSet)
-router.register("tags", TagViewSet)
-router.register("ingredients", IngredientViewSet)
+if settings.API_ASYNC_VIEWS:
+    router.register("recipes", AsyncRecipeViewSet)
+    router.register("tags", AsyncTagViewSet)
+    router.register("ingredients", AsyncIngredientViewSet)
+else:
+    router.register("recipes", RecipeViewSet)
+    router.register("tags", TagViewSet)
+    router.register("ingredients", IngredientViewSet)
+router.register("sync", SyncViewSet, basename="sync")
+router.register("stats", StatsViewSet, basename="stats")
 
 app_name = "recipe"
 
@@ -1,6 +1,19 @@
 """
 Views for the recipe APIs.
 """
+from functools import partial
+
+from django.db import transaction
+from django.db.models import (
+    Count,
+    Exists,
+    OuterRef,
+    Prefetch,
+    Subquery,
+)
+from django.db.models.functions import Coalesce
+from django.http import StreamingHttpResponse
+
 from drf_spectacular.utils import (
     extend_schema,
     extend_schema_view,
@@ -12,29 +25,72 @@ from rest_framework.viewsets import (
     GenericViewSet,
 )
 from rest_framework.decorators import action
+from rest_framework.exceptions import ValidationError
 from rest_framework.response import Response
 from rest_framework.mixins import (
     ListModelMixin,
     UpdateModelMixin,
     DestroyModelMixin,
 )
-from rest_framework.authentication import TokenAuthentication
 from rest_framework.permissions import IsAuthenticated
 from rest_framework import status
 
+from core import (
+    search,
+    stats,
+    storage,
+)
+from core.asyncviews import AsyncAPIViewMixin
+from core.authentication import (
+    CachedTokenAuthentication,
+    SignedTokenAuthentication,
+)
 from core.models import (
     Recipe,
     Tag,
     Ingredient,
 )
+from core.routers import ReplicaReadMixin
+from recipe import (
+    bulk,
+    images,
+    sync,
+    uploads,
+)
+from recipe.cache import CachedResponseMixin
+from recipe.pagination import (
+    RecipeCursorPagination,
+    RecipeAttrCursorPagination,
+)
 from recipe.serializers import (
     RecipeSerializer, 
     RecipeDetailSerializer, 
     TagSerializer,
     IngredientSerializer,
     RecipeImageSerializer,
+    RecipeRowListSerializer,
+    RecipeStatsSerializer,
+    SyncSerializer,
 )
 
+def _recipe_links(relation):
+    """Return the through rows of a recipe relation and their target column."""
+    field = Recipe._meta.get_field(relation)
+    column = f"{field.m2m_reverse_field_name()}_id"
+    return field.remote_field.through.objects.all(), column
+
+# How the tags/ingredients filters combine the listed IDs: recipes linked to
+# any of them, recipes linked to all of them, or any of them ordered by how
+# many they are linked to.
+MATCH_MODES = ["any", "all", "ranked"]
+
+EXPORT_FORMATS = {
+    "ndjson": (bulk.render_ndjson, bulk.NDJSON_CONTENT_TYPE),
+    "csv": (bulk.render_csv, "text/csv"),
+}
+# Listed out here, as ``list`` is the list action inside RecipeViewSet.
+EXPORT_FORMAT_NAMES = list(EXPORT_FORMATS)
+
 @extend_schema_view(
     list=extend_schema(
         parameters=[
@@ -47,38 +103,152 @@ from recipe.serializers import (
                 'ingredients',
                 OpenApiTypes.STR,
                 description="Comma separated list of ingredient IDs to filter",
-            )
+            ),
+            OpenApiParameter(
+                'match',
+                OpenApiTypes.STR,
+                enum=MATCH_MODES,
+                description=(
+                    "How to match the tags and ingredients filters: any "
+                    "(default), all, or ranked by number of matches. "
+                    "Ranked results are not paginated."
+                ),
+            ),
+            OpenApiParameter(
+                'search',
+                OpenApiTypes.STR,
+                description=(
+                    "Full-text search over titles, descriptions, tags and "
+                    "ingredients. Results are ordered by relevance and not "
+                    "paginated."
+                ),
+            ),
         ]
     )
 )
 
-class RecipeViewSet(ModelViewSet):
+class RecipeViewSet(ReplicaReadMixin, CachedResponseMixin, ModelViewSet):
     """View for manage recipe APIs."""
     serializer_class = RecipeDetailSerializer
     queryset = Recipe.objects.all()
-    authentication_classes = [TokenAuthentication]
+    authentication_classes = [
+        CachedTokenAuthentication,
+        SignedTokenAuthentication,
+    ]
     permission_classes = [IsAuthenticated]
+    pagination_class = RecipeCursorPagination
 
     def _params_to_ints(self, qs):
         """Convert a list of strings into integers."""
         return [int(str_id) for str_id in qs.split(',')]
 
+    def _with_related(self, queryset):
+        """Prefetch the nested tags and ingredients the serializers render."""
+        return queryset.prefetch_related(
+            Prefetch("tags", queryset=Tag.objects.only("id", "name")),
+            Prefetch(
+                "ingredients",
+                queryset=Ingredient.objects.only("id", "name"),
+            ),
+        )
+
+    def _match_mode(self):
+        """Return the requested match mode for the related filters."""
+        match = self.request.query_params.get("match", "any")
+        if match not in MATCH_MODES:
+            raise ValidationError(
+                {"match": f"Choose one of {', '.join(MATCH_MODES)}."}
+            )
+
+        return match
+
+    def _match_counts(self, relation, ids):
+        """Return the number of ``ids`` each recipe is linked to.
+
+        Compiles to ``GROUP BY recipe_id`` over the through rows of
+        ``relation``, so the counting happens in the database.
+        """
+        links, column = _recipe_links(relation)
+        return links.filter(**{f"{column}__in": ids}).values(
+            "recipe_id"
+        ).annotate(matched=Count("id"))
+
+    def _filter_related(self, queryset, relation, ids, match):
+        """Keep recipes linked to ``ids`` through ``relation``.
+
+        A correlated EXISTS avoids joining the through table into the outer
+        query, so no DISTINCT is needed to drop duplicate recipes.
+        """
+        if match == "all":
+            return queryset.filter(pk__in=self._match_counts(
+                relation, ids
+            ).filter(matched=len(ids)).values("recipe_id"))
+
+        links, column = _recipe_links(relation)
+        return queryset.filter(Exists(links.filter(
+            recipe_id=OuterRef("pk"),
+            **{f"{column}__in": ids},
+        )))
+
     def get_queryset(self):
         """Retrieve recipes for authenticated user."""
         # return self.queryset.filter(user=self.request.user).order_by("-id")
-        tags = self.request.query_params.get('tags')
-        ingredients = self.request.query_params.get('ingredients')
+        match = self._match_mode()
         queryset = self.queryset
-        if tags:
-            tag_ids = self._params_to_ints(tags)
-            queryset = queryset.filter(tags__id__in=tag_ids)
-        if ingredients:
-            ingredient_ids = self._params_to_ints(ingredients)
-            queryset = queryset.filter(ingredients__id__in=ingredient_ids)
+        ranks = []
+        for relation in ("tags", "ingredients"):
+            param = self.request.query_params.get(relation)
+            if not param:
+                continue
+            ids = set(self._params_to_ints(param))
+            queryset = self._filter_related(queryset, relation, ids, match)
+            if match == "ranked":
+                ranks.append(Coalesce(Subquery(self._match_counts(
+                    relation, ids
+                ).filter(recipe_id=OuterRef("pk")).values("matched")), 0))
         
-        return queryset.filter(
-            user=self.request.user
-        ).order_by("-id").distinct()
+        queryset = queryset.filter(user=self.request.user)
+        ordering = ["-id"]
+        ranked = []
+        query = self.request.query_params.get("search", "").strip()
+        if query:
+            queryset = search.get_backend().search(queryset, query)
+            ordering.insert(0, "-search_rank")
+            ranked.insert(0, "search_rank")
+        if ranks:
+            queryset = queryset.annotate(matched=sum(ranks[1:], ranks[0]))
+            ordering.insert(0, "-matched")
+            ranked.insert(0, "matched")
+        queryset = queryset.order_by(*ordering)
+
+        if self.action == "list":
+            # Rows carry the ranks so cursors can hold their positions.
+            return queryset.values(
+                *RecipeRowListSerializer.value_fields(), *ranked,
+            )
+        elif self.action in ("retrieve", "export"):
+            return self._with_related(queryset)
+
+        return queryset
+
+    def list(self, request, *args, **kwargs):
+        return self.cached_response(self._list_rows, request, *args, **kwargs)
+
+    def _list_rows(self, request, *args, **kwargs):
+        """List recipes from ``values()`` rows, skipping model instances."""
+        queryset = self.filter_queryset(self.get_queryset())
+        page = self.paginate_queryset(queryset)
+        serializer = RecipeRowListSerializer(
+            queryset if page is None else page,
+            context=self.get_serializer_context(),
+        )
+        if page is not None:
+            return self.get_paginated_response(serializer.data)
+
+        return Response(serializer.data)
+
+    def retrieve(self, request, *args, **kwargs):
+        return self.cached_response(super().retrieve, request, *args, **kwargs)
     
     def get_serializer_class(self):
         """Return the serializer class for request."""
@@ -92,18 +262,88 @@ class RecipeViewSet(ModelViewSet):
     def perform_create(self, serializer):
         """Create a new recipe."""
         serializer.save(user=self.request.user)
+        self.invalidate_cache()
     
     @action(methods=["POST"], detail=True, url_path='upload-image')
     def upload_image(self, request, pk=None):
-        """Upload an image to recipe."""
+        """Upload an image to recipe.
+
+        The image is stored as uploaded, once per distinct content; its
+        renditions are rendered in the background and show up on the recipe
+        when done. A replaced image is deleted if no recipe uses it.
+        """
+        request.upload_handlers = [uploads.ImageUploadHandler(request)]
         recipe = self.get_object()
         serializer = self.get_serializer(recipe, data=request.data)
 
         if serializer.is_valid():
-            serializer.save()
+            replaced = recipe.image.name, list(recipe.renditions.values())
+            serializer.save(renditions={})
+            images.process_image(recipe)
+            if replaced[0] and replaced[0] != recipe.image.name:
+                transaction.on_commit(
+                    partial(storage.release_image, *replaced)
+                )
+            self.invalidate_cache()
             return Response(serializer.data, status=status.HTTP_200_OK)
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
+    @extend_schema(
+        request={
+            bulk.NDJSON_CONTENT_TYPE: RecipeDetailSerializer,
+            "application/json": RecipeDetailSerializer(many=True),
+        },
+        responses={(200, bulk.NDJSON_CONTENT_TYPE): OpenApiTypes.OBJECT},
+    )
+    @action(methods=["POST"], detail=False, url_path="bulk", url_name="bulk")
+    def bulk_import(self, request):
+        """Import recipes from an NDJSON stream or a JSON array.
+
+        Every input line gets one NDJSON result line, holding either the new
+        recipe id or the validation errors for that line.
+        """
+        results = bulk.import_recipes(
+            request.user,
+            bulk.iter_records(request),
+            self.get_serializer_context(),
+        )
+        return StreamingHttpResponse(
+            bulk.render_ndjson(results),
+            content_type=bulk.NDJSON_CONTENT_TYPE,
+        )
+
+    @extend_schema(
+        parameters=[
+            OpenApiParameter(
+                "export_format",
+                OpenApiTypes.STR,
+                enum=EXPORT_FORMAT_NAMES,
+                description="Output format, ndjson (default) or csv.",
+            ),
+        ],
+        responses={(200, bulk.NDJSON_CONTENT_TYPE): RecipeDetailSerializer},
+    )
+    @action(methods=["GET"], detail=False, url_path="export")
+    def export(self, request):
+        """Stream every recipe of the user as NDJSON or CSV."""
+        export_format = request.query_params.get("export_format", "ndjson")
+        if export_format not in EXPORT_FORMATS:
+            return Response(
+                {"export_format": f"Choose one of {', '.join(EXPORT_FORMATS)}."},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+
+        render, content_type = EXPORT_FORMATS[export_format]
+        rows = bulk.export_recipes(
+            self.filter_queryset(self.get_queryset()),
+            self.get_serializer_context(),
+        )
+        response = StreamingHttpResponse(render(rows), content_type=content_type)
+        response["Content-Disposition"] = (
+            f'attachment; filename="recipes.{export_format}"'
+        )
+        return response
+
 @extend_schema_view(
     list=extend_schema(
         parameters=[
@@ -116,13 +356,19 @@ class RecipeViewSet(ModelViewSet):
     )
 )
 
-class BaseRecipeAttrViewSet(ListModelMixin,
+class BaseRecipeAttrViewSet(ReplicaReadMixin,
+                            CachedResponseMixin,
+                            ListModelMixin,
                             GenericViewSet,
                             UpdateModelMixin,
                             DestroyModelMixin):
     """BaseV Viewset for recipe attributes."""
-    authentication_classes = [TokenAuthentication]
+    authentication_classes = [
+        CachedTokenAuthentication,
+        SignedTokenAuthentication,
+    ]
     permission_classes = [IsAuthenticated]
+    pagination_class = RecipeAttrCursorPagination
 
     def get_queryset(self):
         """Filter queryset for authenticated user."""
@@ -131,11 +377,12 @@ class BaseRecipeAttrViewSet(ListModelMixin,
         )
         queryset = self.queryset
         if assigned_only:
-            queryset = queryset.filter(recipe__isnull=False)
+            # The usage counter spares probing the recipe links per row.
+            queryset = queryset.filter(recipe_count__gt=0)
         
         return queryset.filter(
             user=self.request.user
-        ).order_by('-name').distinct()
+        ).order_by('-name', '-id')
 
 class TagViewSet(BaseRecipeAttrViewSet):
     """Manage tags in database."""
@@ -146,4 +393,111 @@ class TagViewSet(BaseRecipeAttrViewSet):
 class IngredientViewSet(BaseRecipeAttrViewSet):
     """Mapping ingredients in the database."""
     serializer_class = IngredientSerializer
-    queryset = Ingredient.objects.all()
\ No newline at end of file
+    queryset = Ingredient.objects.all()
+
+@extend_schema_view(
+    list=extend_schema(
+        parameters=[
+            OpenApiParameter(
+                "since",
+                OpenApiTypes.STR,
+                description=(
+                    "Token from the previous sync. Omit it for a full sync."
+                ),
+            ),
+        ],
+        responses=SyncSerializer,
+    )
+)
+
+class SyncViewSet(CachedResponseMixin, GenericViewSet):
+    """Return the recipes, tags and ingredients changed since a token."""
+    authentication_classes = [
+        CachedTokenAuthentication,
+        SignedTokenAuthentication,
+    ]
+    permission_classes = [IsAuthenticated]
+    serializer_class = SyncSerializer
+
+    def list(self, request):
+        """Return the changes and deletions since ``since``."""
+        return self.cached_response(self._sync, request)
+
+    def _sync(self, request):
+        since = request.query_params.get("since")
+        if since is not None:
+            since = sync.decode_token(since)
+        serializer = self.get_serializer(sync.changes(request.user, since))
+
+        return Response(serializer.data)
+
+
+class StatsViewSet(ReplicaReadMixin, CachedResponseMixin, GenericViewSet):
+    """Return the counts of the user's recipes, tags and ingredients."""
+    authentication_classes = [
+        CachedTokenAuthentication,
+        SignedTokenAuthentication,
+    ]
+    permission_classes = [IsAuthenticated]
+    serializer_class = RecipeStatsSerializer
+
+    def list(self, request):
+        """Return the user's precomputed stats."""
+        return self.cached_response(self._stats, request)
+
+    def _stats(self, request):
+        serializer = self.get_serializer(stats.get(request.user.id))
+
+        return Response(serializer.data)
+
+
+class AsyncRecipeViewSet(AsyncAPIViewMixin, RecipeViewSet):
+    """``RecipeViewSet`` listing, retrieving and creating in the event loop.
+
+    The other actions run in a worker thread as they do under ASGI.
+    """
+
+    async def list(self, request, *args, **kwargs):
+        return await self.acached_response(
+            self._alist_rows, request, *args, **kwargs
+        )
+
+    async def _alist_rows(self, request, *args, **kwargs):
+        """``_list_rows`` reading the rows with ``aiterator``."""
+        queryset = self.filter_queryset(self.get_queryset())
+        page = await self.apaginate_queryset(queryset)
+        rows = page
+        if page is None:
+            rows = [row async for row in queryset.aiterator()]
+        data = await RecipeRowListSerializer(
+            rows, context=self.get_serializer_context(),
+        ).adata()
+        if page is not None:
+            return self.get_paginated_response(data)
+
+        return Response(data)
+
+    async def retrieve(self, request, *args, **kwargs):
+        return await self.acached_response(
+            self.aretrieve, request, *args, **kwargs
+        )
+
+    async def create(self, request, *args, **kwargs):
+        return await self.acreate(request, *args, **kwargs)
+
+
+class AsyncRecipeAttrViewSetMixin(AsyncAPIViewMixin):
+    """Recipe attribute viewset listing in the event loop."""
+
+    async def list(self, request, *args, **kwargs):
+        return await self.acached_response(
+            self.alist, request, *args, **kwargs
+        )
+
+
+class AsyncTagViewSet(AsyncRecipeAttrViewSetMixin, TagViewSet):
+    """``TagViewSet`` listing in the event loop."""
+
+
+class AsyncIngredientViewSet(AsyncRecipeAttrViewSetMixin, IngredientViewSet):
+    """``IngredientViewSet`` listing in the event loop."""
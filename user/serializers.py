@@ -6,6 +6,8 @@ from django.utils.translation import gettext as _
 
 from rest_framework import serializers
 
+from core import tokens
+
 class UserSerializer(serializers.ModelSerializer):
     """Serializers for user objects."""
     class Meta:
@@ -25,6 +27,7 @@ class UserSerializer(serializers.ModelSerializer):
         if password:
             user.set_password(password)
             user.save()
+            tokens.revoke_user(user.id)
         
         return user
     
@@ -51,3 +54,15 @@ class AuthTokenSerializer(serializers.Serializer):
         
         attrs["user"] = user
         return attrs
+
+
+class RefreshTokenSerializer(serializers.Serializer):
+    """Serializer for a refresh token."""
+    refresh = serializers.CharField(trim_whitespace=False)
+
+
+class TokenPairSerializer(serializers.Serializer):
+    """Serializer for a signed access and refresh token pair."""
+    access = serializers.CharField()
+    refresh = serializers.CharField()
+    expires_in = serializers.IntegerField()
@@ -0,0 +1,231 @@
+"""
+Tests for signed access tokens and refresh token rotation.
+"""
+from datetime import timedelta
+from unittest.mock import patch
+
+from django.contrib.auth import get_user_model
+from django.test import (
+    TestCase,
+    override_settings,
+)
+from django.urls import reverse
+from django.utils import timezone
+
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from core import (
+    throttling,
+    tokens,
+)
+from core.authentication import SignedTokenAuthentication
+from core.models import RefreshToken
+
+TOKEN_URL = reverse("user:token")
+REFRESH_URL = reverse("user:token-refresh")
+REVOKE_URL = reverse("user:token-revoke")
+ME_URL = reverse("user:me")
+RECIPES_URL = reverse("recipe:recipe-list")
+
+
+@override_settings(AUTH_TOKEN_TYPE="signed", AUTH_ACCESS_TOKEN_TTL=300)
+class SignedTokenApiTests(TestCase):
+    """Test issuing, verifying and refreshing signed tokens."""
+
+    def setUp(self):
+        throttling.reset()
+        self.user = get_user_model().objects.create_user(
+            email="test@test.com",
+            password="test1234",
+            name="Test Testov",
+        )
+        self.client = APIClient()
+
+    def _login(self):
+        response = self.client.post(TOKEN_URL, {
+            "email": "test@test.com",
+            "password": "test1234",
+        })
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+        return response.data
+
+    def _get(self, url, access):
+        return self.client.get(url, HTTP_AUTHORIZATION=f"Bearer {access}")
+
+    def test_token_pair_issued(self):
+        """Test logging in returns an access and a refresh token."""
+        pair = self._login()
+
+        self.assertEqual(set(pair), {"access", "refresh", "expires_in"})
+        self.assertEqual(pair["expires_in"], 300)
+        self.assertEqual(RefreshToken.objects.get().user, self.user)
+
+    @override_settings(AUTH_TOKEN_TYPE="db")
+    def test_db_token_by_default(self):
+        """Test the stored token is issued unless signed tokens are set."""
+        response = self.client.post(TOKEN_URL, {
+            "email": "test@test.com",
+            "password": "test1234",
+        })
+
+        self.assertEqual(set(response.data), {"token"})
+
+    def test_access_verified_without_queries(self):
+        """Test an access token authenticates without the database."""
+        self.user.is_staff = True
+        access = tokens.access_token(self.user)
+        authentication = SignedTokenAuthentication()
+
+        with self.assertNumQueries(0):
+            user, _token = authentication.authenticate_credentials(access)
+            self.assertTrue(user.is_active)
+            self.assertTrue(user.is_staff)
+            self.assertFalse(user.is_superuser)
+
+        self.assertEqual(user.pk, self.user.pk)
+        self.assertEqual(user.email, "test@test.com")
+
+    def test_access_token_of_inactive_user(self):
+        """Test an access token issued to an inactive user is rejected."""
+        self.user.is_active = False
+
+        response = self._get(ME_URL, tokens.access_token(self.user))
+
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_access_token_of_deleted_user(self):
+        """Test an access token of a deleted user is rejected."""
+        access = self._login()["access"]
+        self.user.delete()
+
+        response = self._get(ME_URL, access)
+
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_access_token_authenticates(self):
+        """Test APIs accept an access token as a bearer token."""
+        access = self._login()["access"]
+
+        response = self._get(ME_URL, access)
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data["name"], "Test Testov")
+        self.assertEqual(
+            self._get(RECIPES_URL, access).status_code, status.HTTP_200_OK,
+        )
+
+    def test_access_token_expires(self):
+        """Test an access token is rejected after its TTL."""
+        access = self._login()["access"]
+
+        with patch("django.core.signing.time.time") as now:
+            now.return_value = timezone.now().timestamp() + 301
+            response = self._get(ME_URL, access)
+
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_tampered_access_token(self):
+        """Test an access token for another user is rejected."""
+        access = self._login()["access"]
+        payload, rest = access.split(":", 1)
+
+        response = self._get(ME_URL, f"{payload}x:{rest}")
+
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_key_rotation(self):
+        """Test tokens signed with a retired key verify until removed."""
+        with override_settings(SECRET_KEY="old-key"):
+            access = tokens.access_token(self.user)
+
+        with override_settings(
+            SECRET_KEY="new-key", SECRET_KEY_FALLBACKS=["old-key"],
+        ):
+            self.assertEqual(
+                tokens.verify_access_token(access)["id"], self.user.pk,
+            )
+        with override_settings(SECRET_KEY="new-key", SECRET_KEY_FALLBACKS=[]):
+            response = self._get(ME_URL, access)
+
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_refresh_rotates(self):
+        """Test refreshing issues new tokens and retires the old one."""
+        pair = self._login()
+
+        response = self.client.post(REFRESH_URL, {"refresh": pair["refresh"]})
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertNotEqual(response.data["refresh"], pair["refresh"])
+        self.assertEqual(
+            self._get(ME_URL, response.data["access"]).status_code,
+            status.HTTP_200_OK,
+        )
+        self.assertEqual(
+            RefreshToken.objects.filter(revoked_at=None).count(), 1,
+        )
+
+    def test_refresh_reuse_revokes_family(self):
+        """Test reusing a rotated refresh token revokes its successors."""
+        first = self._login()["refresh"]
+        second = self.client.post(REFRESH_URL, {"refresh": first}).data
+
+        reused = self.client.post(REFRESH_URL, {"refresh": first})
+        response = self.client.post(
+            REFRESH_URL, {"refresh": second["refresh"]},
+        )
+
+        self.assertEqual(reused.status_code, status.HTTP_401_UNAUTHORIZED)
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_expired_refresh_rejected(self):
+        """Test a refresh token is rejected after its TTL."""
+        refresh = self._login()["refresh"]
+        RefreshToken.objects.update(
+            expires_at=timezone.now() - timedelta(seconds=1),
+        )
+
+        response = self.client.post(REFRESH_URL, {"refresh": refresh})
+
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_unknown_refresh_rejected(self):
+        """Test an unknown refresh token is rejected."""
+        response = self.client.post(REFRESH_URL, {"refresh": "unknown"})
+
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_revoke(self):
+        """Test a revoked refresh token can't be used."""
+        refresh = self._login()["refresh"]
+
+        revoked = self.client.post(REVOKE_URL, {"refresh": refresh})
+        response = self.client.post(REFRESH_URL, {"refresh": refresh})
+
+        self.assertEqual(revoked.status_code, status.HTTP_204_NO_CONTENT)
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_password_change_revokes(self):
+        """Test changing the password revokes the user's refresh tokens."""
+        pair = self._login()
+
+        self.client.patch(
+            ME_URL,
+            {"password": "newpass123"},
+            HTTP_AUTHORIZATION=f"Bearer {pair['access']}",
+        )
+        response = self.client.post(REFRESH_URL, {"refresh": pair["refresh"]})
+
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_deactivation_revokes(self):
+        """Test deactivating a user revokes their refresh tokens."""
+        refresh = self._login()["refresh"]
+
+        self.user.is_active = False
+        self.user.save()
+        response = self.client.post(REFRESH_URL, {"refresh": refresh})
+
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
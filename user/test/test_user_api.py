@@ -9,6 +9,8 @@ from django.urls import reverse
 from rest_framework.test import APIClient
 from rest_framework import status
 
+from core import throttling
+
 CREATE_USER_URL = reverse("user:create")
 TOKEN_URL = reverse("user:token")
 ME_URL = reverse("user:me")
@@ -21,6 +23,7 @@ def create_user(**params):
 class PublicUserApiTests(TestCase):
     """Test the public features of the API."""
     def setUp(self):
+        throttling.reset()
         self.client = APIClient()
     
     def test_create_user_successful(self):
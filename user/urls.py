@@ -2,6 +2,7 @@
 URL mappings for user API
 """
 
+from django.conf import settings
 from django.urls import path
 
 from user import views
@@ -11,5 +12,22 @@ app_name = "user"
 urlpatterns = [
     path("create/", views.CreateUserModel.as_view(), name="create"),
     path("token/", views.CreateTokenView.as_view(), name="token"),
-    path("me/", views.ManageUserView.as_view(), name="me"),
+    path(
+        "token/refresh/",
+        views.RefreshTokenView.as_view(),
+        name="token-refresh",
+    ),
+    path(
+        "token/revoke/",
+        views.RevokeTokenView.as_view(),
+        name="token-revoke",
+    ),
+    path(
+        "me/",
+        (
+            views.AsyncManageUserView if settings.API_ASYNC_VIEWS
+            else views.ManageUserView
+        ).as_view(),
+        name="me",
+    ),
 ]
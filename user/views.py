@@ -1,31 +1,157 @@
 """
 Views for user API
 """
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.db import DEFAULT_DB_ALIAS
+from django.utils.translation import gettext_lazy as _
+
+from drf_spectacular.utils import extend_schema
+from rest_framework import (
+    exceptions,
+    status,
+)
 from rest_framework.generics import CreateAPIView, RetrieveUpdateAPIView
-from rest_framework.authentication import TokenAuthentication
-from rest_framework.permissions import IsAuthenticated
+from rest_framework.permissions import (
+    SAFE_METHODS,
+    IsAuthenticated,
+)
 from rest_framework.authtoken.views import ObtainAuthToken
+from rest_framework.response import Response
 from rest_framework.settings import api_settings
+from rest_framework.views import APIView
 
+from core.asyncviews import AsyncAPIViewMixin
+from core.authentication import (
+    CachedTokenAuthentication,
+    SignedTokenAuthentication,
+)
+from core import tokens
+from core.throttling import (
+    LoginAccountThrottle,
+    LoginIPThrottle,
+)
 from user.serializers import (
     UserSerializer,
     AuthTokenSerializer,
+    RefreshTokenSerializer,
+    TokenPairSerializer,
 )
 
 class CreateUserModel(CreateAPIView):
     serializer_class = UserSerializer
 
 class CreateTokenView(ObtainAuthToken):
-    """Create a new auth token for user."""
+    """Create a new auth token for user.
+
+    With ``AUTH_TOKEN_TYPE = "signed"`` a signed access token and a refresh
+    token are issued instead of the stored token.
+    """
     serializer_class = AuthTokenSerializer
     renderer_classes = api_settings.DEFAULT_RENDERER_CLASSES
+    throttle_classes = [LoginIPThrottle, LoginAccountThrottle]
+
+    def post(self, request, *args, **kwargs):
+        if settings.AUTH_TOKEN_TYPE != "signed":
+            return super().post(request, *args, **kwargs)
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+
+        return Response(tokens.issue_tokens(serializer.validated_data["user"]))
+
+
+class RefreshTokenBaseView(APIView):
+    """Base view taking a refresh token in the request body."""
+    authentication_classes = []
+
+    def get_authenticate_header(self, request):
+        # Answer rejected refresh tokens with 401, not 403.
+        return SignedTokenAuthentication().authenticate_header(request)
+
+
+class RefreshTokenView(RefreshTokenBaseView):
+    """Exchange a refresh token for a new access and refresh token."""
+
+    @extend_schema(
+        request=RefreshTokenSerializer,
+        responses=TokenPairSerializer,
+    )
+    def post(self, request):
+        serializer = RefreshTokenSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+
+        return Response(tokens.rotate(serializer.validated_data["refresh"]))
+
+
+class RevokeTokenView(RefreshTokenBaseView):
+    """Revoke a refresh token and those rotated from the same login."""
+
+    @extend_schema(request=RefreshTokenSerializer, responses={204: None})
+    def post(self, request):
+        serializer = RefreshTokenSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        tokens.revoke(serializer.validated_data["refresh"])
+
+        return Response(status=status.HTTP_204_NO_CONTENT)
 
 class ManageUserView(RetrieveUpdateAPIView):
     """Manage the authenticated user."""
     serializer_class = UserSerializer
-    authentication_classes = [TokenAuthentication]
+    authentication_classes = [
+        CachedTokenAuthentication,
+        SignedTokenAuthentication,
+    ]
     permission_classes = [IsAuthenticated]
 
     def get_object(self):
-        "Retrieve and return authenticated user."
-        return self.request.user
\ No newline at end of file
+        """Retrieve and return authenticated user.
+
+        Reads get ``request.user``, which may be a cached copy or built
+        from a signed token, with the fields shown loaded. Updates get the
+        user as stored on the primary, so saving it writes back no stale
+        fields.
+        """
+        user = self.request.user
+        try:
+            if self.request.method not in SAFE_METHODS:
+                user = get_user_model().objects.using(DEFAULT_DB_ALIAS).get(
+                    pk=user.pk,
+                )
+            else:
+                deferred = self._deferred_shown_fields(user)
+                if deferred:
+                    user.refresh_from_db(fields=deferred)
+        except get_user_model().DoesNotExist:
+            raise exceptions.AuthenticationFailed(
+                _("User inactive or deleted.")
+            )
+
+        return user
+
+    def _deferred_shown_fields(self, user):
+        """Return the fields shown in responses that ``user`` lacks."""
+        return user.get_deferred_fields().intersection(
+            name for name, field in self.get_serializer().fields.items()
+            if not field.write_only
+        )
+
+
+class AsyncManageUserView(AsyncAPIViewMixin, ManageUserView):
+    """``ManageUserView`` retrieving the user in the event loop."""
+
+    async def get(self, request, *args, **kwargs):
+        return await self.aretrieve(request, *args, **kwargs)
+
+    async def aget_object(self):
+        """Return the user, loading the shown fields it was loaded without."""
+        user = self.request.user
+        deferred = self._deferred_shown_fields(user)
+        if deferred:
+            try:
+                await user.arefresh_from_db(fields=deferred)
+            except get_user_model().DoesNotExist:
+                raise exceptions.AuthenticationFailed(
+                    _("User inactive or deleted.")
+                )
+
+        return user